@@ -0,0 +1,149 @@
+"""
+Deterministic synthetic caption corpus.
+
+The same parameters always produce the same file, so results of different runs
+(and different commits) are comparable.
+
+Example:
+
+python benchmarks/corpus.py -c 100000 -l en es -m 0.5 --cjk 0.2 -o benchmarks/.corpus
+"""
+import argparse
+import os
+import random
+
+
+FORMATS = ("srt", "vtt", "sub", "ttml")
+FRAME_RATE = 25
+
+WORDS = (
+    "the", "a", "caption", "time", "line", "you", "what", "we", "going", "here", "there", "never", "always",
+    "subtitle", "frame", "light", "night", "morning", "river", "city", "window", "voice", "silence", "again"
+)
+CJK_WORDS = (
+    "今日", "は", "字幕", "の", "テスト", "です", "明日", "また", "会い", "ましょう", "我们", "去", "看", "电影",
+    "吧", "자막", "테스트", "입니다"
+)
+
+MARKUP = {
+    "srt": ("<b>{}</b>", "<i>{}</i>", "<u>{}</u>", '<font color="#ff0000">{}</font>'),
+    "vtt": ("<b>{}</b>", "<i>{}</i>", "<u>{}</u>", "<b><i>{}</i></b>"),
+    "sub": ("{{y:i}}{}", "{{y:b}}{}", "{{y:u}}{}", "{{c:$0000FF}}{}"),
+    "ttml": ('<span tts:fontWeight="bold">{}</span>', '<span tts:fontStyle="italic">{}</span>',
+             '<span style="s1">{}</span>', '<span tts:color="yellow">{}</span>')
+}
+
+
+def corpusFilename(format: str, cues: int, languages: list[str], markup: float, cjk: float, seed: int) -> str:
+    return f"bench_{cues}_m{int(markup*100)}_c{int(cjk*100)}_s{seed}.{'.'.join(languages)}.{format}"
+
+
+def makeText(rng: random.Random, markup: float, cjk: float, format: str) -> str:
+    if rng.random() < cjk:
+        text = "".join(rng.choice(CJK_WORDS) for _ in range(rng.randint(3, 12)))
+    else:
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 9)))
+    if rng.random() < markup:
+        text = rng.choice(MARKUP[format]).format(text)
+    return text
+
+
+def makeCues(cues: int, languages: list[str], markup: float, cjk: float, seed: int, format: str):
+    """
+    Yields start and end time in milliseconds and text of each language.
+    """
+    rng = random.Random(seed)
+    time = 0
+    for _ in range(cues):
+        time += rng.randint(0, 2000)
+        duration = rng.randint(500, 6000)
+        yield time, time + duration, [makeText(rng, markup, cjk, format) for _ in languages]
+        time += duration
+
+
+def _srtTime(ms: int, separator: str = ",") -> str:
+    return f"{ms // 3_600_000:02d}:{ms // 60_000 % 60:02d}:{ms // 1000 % 60:02d}{separator}{ms % 1000:03d}"
+
+
+def writeSRT(file, cues, languages):
+    for index, (start, end, texts) in enumerate(cues, 1):
+        file.write(f"{index}\n{_srtTime(start)} --> {_srtTime(end)}\n" + "\n".join(texts) + "\n\n")
+
+
+def writeVTT(file, cues, languages):
+    file.write("WEBVTT\n\n")
+    for index, (start, end, texts) in enumerate(cues, 1):
+        file.write(f"{index}\n{_srtTime(start, '.')} --> {_srtTime(end, '.')}\n" + "\n".join(texts) + "\n\n")
+
+
+def writeSUB(file, cues, languages):
+    for start, end, texts in cues:
+        file.write(f"{{{start * FRAME_RATE // 1000}}}{{{end * FRAME_RATE // 1000}}}" + "|".join(texts) + "\n")
+
+
+def writeTTML(file, cues, languages):
+    cues = list(cues)
+    file.write('<tt xml:lang="' + languages[0] + '" xmlns="http://www.w3.org/ns/ttml" '
+               'xmlns:tts="http://www.w3.org/ns/ttml#styling">\n<head>\n<styling>\n'
+               '<style xml:id="s1" tts:color="white" tts:fontSize="22px" tts:textAlign="center"/>\n'
+               '</styling>\n</head>\n<body>\n')
+    for index, language in enumerate(languages):
+        file.write(f'<div xml:lang="{language}">\n')
+        for start, end, texts in cues:
+            file.write(f'<p begin="{_srtTime(start, ".")}" end="{_srtTime(end, ".")}">{texts[index]}</p>\n')
+        file.write("</div>\n")
+    file.write("</body>\n</tt>\n")
+
+
+WRITERS = {
+    "srt": writeSRT,
+    "vtt": writeVTT,
+    "sub": writeSUB,
+    "ttml": writeTTML
+}
+
+
+def generate(directory: str, format: str, cues: int, languages: list[str] = None, markup: float = 0.3,
+             cjk: float = 0.0, seed: int = 0, overwrite: bool = False) -> str:
+    """
+    Writes a synthetic captions file and returns its file name, existing files are reused.
+
+    Parameters:
+    - directory (str): Output directory
+    - format (str): One of FORMATS
+    - cues (int): Number of cues
+    - languages (list[str], optional): Languages, each cue has one line per language (default is ["en"])
+    - markup (float, optional): Fraction of lines with markup, e.g. <b> or MicroDVD control codes (default is 0.3)
+    - cjk (float, optional): Fraction of lines with CJK text (default is 0.0)
+    - seed (int, optional): Random seed (default is 0)
+    - overwrite (bool, optional): Generate the file even if it exists (default is False)
+    """
+    languages = languages or ["en"]
+    filename = os.path.join(directory, corpusFilename(format, cues, languages, markup, cjk, seed))
+    if os.path.exists(filename) and not overwrite:
+        return filename
+    os.makedirs(directory, exist_ok=True)
+    with open(filename + ".tmp", "w", encoding="UTF-8", newline="\n") as f:
+        WRITERS[format](f, makeCues(cues, languages, markup, cjk, seed, format), languages)
+    os.replace(filename + ".tmp", filename)
+    return filename
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description="Generate synthetic captions files")
+    parser.add_argument("-f", "--formats", nargs="+", default=list(FORMATS), choices=FORMATS)
+    parser.add_argument("-c", "--cues", nargs="+", type=int, default=[1000])
+    parser.add_argument("-l", "--languages", nargs="+", default=["en"])
+    parser.add_argument("-m", "--markup", type=float, default=0.3, help="Fraction of lines with markup.")
+    parser.add_argument("--cjk", type=float, default=0.0, help="Fraction of lines with CJK text.")
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("-o", "--output-directory", default=os.path.join(os.path.dirname(__file__), ".corpus"))
+    args = parser.parse_args(argv)
+    for cues in args.cues:
+        for format in args.formats:
+            print(generate(args.output_directory, format, cues, args.languages, args.markup, args.cjk, args.seed,
+                           overwrite=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Read, write, round-trip and memory benchmarks on the synthetic corpus (see corpus.py).
+
+Results are stored as JSON, a previous result file can be given as a baseline
+and every measurement is compared with it.
+
+Example:
+
+python benchmarks/run.py -c 1000 10000 -o base.json
+python benchmarks/run.py -c 1000 10000 -o new.json -b base.json
+"""
+import argparse
+import datetime
+import gc
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pycaptions  # noqa: E402
+from pycaptions import Captions  # noqa: E402
+from corpus import FORMATS, generate  # noqa: E402
+
+
+DEFAULT_THRESHOLD = 0.1
+"""
+Relative slowdown (or memory growth) reported as a regression.
+"""
+
+
+def measure(function, repeat: int) -> tuple[float, object]:
+    """
+    Returns the best time of repeated calls and the result of the last call.
+    """
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def peakMemory(function) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def read(filename: str) -> Captions:
+    with Captions(filename) as captions:
+        return captions
+
+
+def write(captions: Captions, output_format: str) -> str:
+    output = io.StringIO()
+    captions.save(None, None, output_format, stream=output)
+    return output.getvalue()
+
+
+def readString(text: str, language: str) -> Captions:
+    with Captions(text, language, isFile=False) as captions:
+        return captions
+
+
+def run(directory: str, formats: list[str], cue_counts: list[int], languages: list[str], markup: float,
+        cjk: float, seed: int, repeat: int, memory: bool = True) -> dict:
+    results = dict()
+    for cues in cue_counts:
+        for input_format in formats:
+            filename = generate(directory, input_format, cues, languages, markup, cjk, seed)
+            size = os.path.getsize(filename)
+            elapsed, captions = measure(lambda: read(filename), repeat)
+            results[f"read/{input_format}/{cues}"] = {"seconds": elapsed, "bytes": size, "cues": len(captions)}
+            print(f"read {input_format} {cues}: {elapsed:.3f} s, {size / elapsed / 1024 / 1024:.2f} MB/s")
+            if memory:
+                peak = peakMemory(lambda: read(filename))
+                results[f"memory/{input_format}/{cues}"] = {"peak_bytes": peak}
+                print(f"memory {input_format} {cues}: {peak / 1024 / 1024:.1f} MB peak")
+            for output_format in formats:
+                pair = f"{input_format}->{output_format}"
+                elapsed, text = measure(lambda: write(captions, output_format), repeat)
+                results[f"write/{pair}/{cues}"] = {"seconds": elapsed, "bytes": len(text.encode("UTF-8"))}
+                print(f"write {pair} {cues}: {elapsed:.3f} s")
+                reread_elapsed, reread = measure(lambda: readString(text, captions.default_language), repeat)
+                results[f"roundtrip/{pair}/{cues}"] = {"seconds": elapsed + reread_elapsed, "cues": len(reread)}
+                print(f"roundtrip {pair} {cues}: {elapsed + reread_elapsed:.3f} s")
+            del captions
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> list[str]:
+    """
+    Prints ratios to the baseline and returns names of regressed measurements.
+    """
+    regressions = []
+    print(f"\n{'measurement':<40} {'baseline':>12} {'current':>12} {'ratio':>8}")
+    for name, value in results.items():
+        if name not in baseline:
+            continue
+        key = "peak_bytes" if "peak_bytes" in value else "seconds"
+        old, new = baseline[name][key], value[key]
+        ratio = new / old if old else 1.0
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = " !"
+        print(f"{name:<40} {old:>12.4g} {new:>12.4g} {ratio:>8.2f}{flag}")
+    return regressions
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description="pycaptions benchmarks")
+    parser.add_argument("-f", "--formats", nargs="+", default=list(FORMATS), choices=FORMATS)
+    parser.add_argument("-c", "--cues", nargs="+", type=int, default=[1000, 10000],
+                        help="Cue counts, e.g. 1000 10000 100000 1000000.")
+    parser.add_argument("-l", "--languages", nargs="+", default=["en"])
+    parser.add_argument("-m", "--markup", type=float, default=0.3, help="Fraction of lines with markup.")
+    parser.add_argument("--cjk", type=float, default=0.0, help="Fraction of lines with CJK text.")
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Best of N runs.")
+    parser.add_argument("--no-memory", action="store_true", help="Skip memory measurements.")
+    parser.add_argument("-d", "--corpus-directory", default=os.path.join(os.path.dirname(__file__), ".corpus"))
+    parser.add_argument("-o", "--output", help="Write results to this JSON file.")
+    parser.add_argument("-b", "--baseline", help="Compare with results of a previous run.")
+    parser.add_argument("-t", "--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Regression threshold (default is {DEFAULT_THRESHOLD}).")
+    args = parser.parse_args(argv)
+
+    results = run(args.corpus_directory, args.formats, args.cues, args.languages, args.markup, args.cjk,
+                  args.seed, args.repeat, not args.no_memory)
+    data = {
+        "meta": {
+            "pycaptions": pycaptions.__version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "date": datetime.datetime.now().isoformat(timespec="seconds")
+        },
+        "parameters": {key: value for key, value in vars(args).items()
+                       if key in ("formats", "cues", "languages", "markup", "cjk", "seed", "repeat")},
+        "results": results
+    }
+    if args.output:
+        with open(args.output, "w", encoding="UTF-8") as f:
+            json.dump(data, f, indent=1)
+    if args.baseline:
+        with open(args.baseline, encoding="UTF-8") as f:
+            baseline = json.load(f)
+        if baseline.get("parameters") != data["parameters"]:
+            print("Warning: baseline was run with different parameters")
+        regressions = compare(results, baseline["results"], args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regressions: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
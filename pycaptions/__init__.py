@@ -9,7 +9,11 @@ import pycaptions.vtt as vtt
 # import pycaptions.usf as usf
 
 from pycaptions.microTime import MicroTime
-from pycaptions.captions import Captions
+from pycaptions.captions import (Captions, CaptionsStream, apply_patch, convert, convert_archive, convert_stream,
+                                 diff)
+from pycaptions.aio import aconvert
+from pycaptions.index import CaptionsIndex
+from pycaptions.development import CaptionsDiff, ConversionCache, ParseCache, Stats
 from pycaptions.srt._class import detectSRT, SubRip
 from pycaptions.sub._class import detectSUB, MicroDVD
 from pycaptions.ttml._class import detectTTML, TTML
@@ -23,4 +27,4 @@ supported_readers = srt.EXTENSIONS + sub.EXTENSIONS + ttml.EXTENSIONS + vtt.EXTE
 supported_extensions = srt.EXTENSIONS + sub.EXTENSIONS + ttml.EXTENSIONS + vtt.EXTENSIONS
                        # + lrc.EXTENSIONS + sami.EXTENSIONS + usf.EXTENSIONS
 
-from pycaptions.options import save_extensions, style_options
+from pycaptions.options import save_extensions, style_options, Settings, useSettings
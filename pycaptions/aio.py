@@ -0,0 +1,132 @@
+import asyncio
+import contextvars
+import functools
+import weakref
+
+from concurrent.futures import Executor, ProcessPoolExecutor
+from .captions import Captions, convert
+from .development.serialization import fromBytes, toBytes
+
+
+DEFAULT_CONCURRENCY = 32
+"""
+Maximum number of jobs running in the executor at the same time, other calls wait.
+"""
+
+_executor = None
+_concurrency = DEFAULT_CONCURRENCY
+_limiters = weakref.WeakKeyDictionary()
+
+
+def configure(executor: Executor = None, concurrency: int = None):
+    """
+    Set default executor and concurrency limit of the async API.
+
+    Parameters:
+    - executor (Executor, optional): Executor for file I/O, parsing and rendering, ProcessPoolExecutor
+      runs CPU-bound work outside the interpreter of the event loop (default is the loop default executor)
+    - concurrency (int, optional): Maximum number of jobs in the executor (default is DEFAULT_CONCURRENCY)
+    """
+    global _executor, _concurrency
+    _executor = executor
+    _concurrency = concurrency or DEFAULT_CONCURRENCY
+    _limiters.clear()
+
+
+def _limiter() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    limiter = _limiters.get(loop)
+    if limiter is None:
+        limiter = _limiters[loop] = asyncio.Semaphore(_concurrency)
+    return limiter
+
+
+async def run(function, *args, executor: Executor = None, **kwargs):
+    """
+    Run function in the executor, limited by the concurrency limit.
+
+    Cancelling the awaiting task cancels the job if it has not started yet,
+    a running job finishes in the background.
+    """
+    executor = executor or _executor
+    if not isinstance(executor, ProcessPoolExecutor):
+        # threads do not inherit context, keep settings from useSettings
+        function = functools.partial(contextvars.copy_context().run, function)
+    async with _limiter():
+        return await asyncio.get_running_loop().run_in_executor(executor, functools.partial(function, *args, **kwargs))
+
+
+def _load(filename: str, options: dict, serialize: bool):
+    captions = Captions(filename, **options)
+    captions.__enter__()
+    if serialize:
+        return captions.fileFormat, toBytes(captions)
+    return captions
+
+
+def _save(captions: Captions | tuple, filename: str, languages: list[str], output_format: str, options: dict,
+          kwargs: dict):
+    if isinstance(captions, tuple):
+        format, data = captions
+        captions = Captions(**options)
+        fromBytes(captions, data)
+        captions.fileFormat = format
+    return captions.save(filename, languages, output_format, **kwargs)
+
+
+async def aload(filename: str, executor: Executor = None, **options) -> Captions:
+    """
+    Read captions file without blocking the event loop, see Captions.
+
+    Example:
+
+    captions = await aload("path/to/file.srt")
+
+    Parameters:
+    - filename (str): Captions file name
+    - executor (Executor, optional): Executor to use (default is set by configure)
+    - **options: Passed to Captions (e.g. encoding, default_language, cache)
+    """
+    executor = executor or _executor
+    if not isinstance(executor, ProcessPoolExecutor):
+        return await run(_load, filename, options, False, executor=executor)
+    options.setdefault("settings", Captions().getSettings())
+    format, data = await run(_load, filename, options, True, executor=executor)
+    captions = Captions(filename, **options)
+    fromBytes(captions, data)
+    captions.fileFormat = format
+    return captions
+
+
+async def asave(captions: Captions, filename: str, languages: list[str] = None, output_format: str = None,
+                executor: Executor = None, **kwargs) -> bool:
+    """
+    Save captions without blocking the event loop, see Captions.save.
+
+    Parameters:
+    - captions (Captions): Captions to save
+    - filename (str): Output file name
+    - languages (list[str], optional): List of languages
+    - output_format (str, optional): Output format (default is format of the captions)
+    - executor (Executor, optional): Executor to use (default is set by configure)
+    - **kwargs: Passed to the writer
+    """
+    executor = executor or _executor
+    options = {}
+    if isinstance(executor, ProcessPoolExecutor):
+        options["settings"] = captions.getSettings()
+        captions = (captions.fileFormat, toBytes(captions))
+    return await run(_save, captions, filename, languages, output_format, options, kwargs, executor=executor)
+
+
+async def aconvert(input: str, output: str = None, output_format: str = None, executor: Executor = None,
+                   **kwargs) -> bool:
+    """
+    Convert captions file without blocking the event loop, see convert.
+
+    With a ProcessPoolExecutor the cache option is local to each worker process.
+    """
+    executor = executor or _executor
+    if isinstance(executor, ProcessPoolExecutor) and not kwargs.get("settings"):
+        kwargs["settings"] = Captions().getSettings()
+    return await run(convert, input, output, output_format, executor=executor, **kwargs)
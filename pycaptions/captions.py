@@ -1,6 +1,26 @@
 import io
+import mmap
+import os
+import contextvars
+import queue
+import threading
 
-from .development import CaptionsFormat
+from charset_normalizer import detect as detect_encoding
+
+from .development import BlockType, CaptionsFormat, ConversionCache, CueIndex, ParseCache, readHead, sniffFormat
+from .development.archive import ArchiveWriter, iterMembers, mapMembers
+from .development.compression import detectCompression, splitCompression
+from .development.diff import CaptionsDiff, applyPatch, diffBlocks
+from .development.serialization import fromBytes, toBytes
+from .development.sniffer import HEAD_SIZE
+from .development.stats import count, stage
+from .development.timing import normalizeStream
+from .microTime import MicroTime as MT
+from .options import Settings
+from .srt import EXTENSIONS as SRT_EXTENSIONS
+from .sub import EXTENSIONS as SUB_EXTENSIONS
+from .ttml import EXTENSIONS as TTML_EXTENSIONS
+from .vtt import EXTENSIONS as VTT_EXTENSIONS
 
 
 class Captions(CaptionsFormat):
@@ -15,15 +35,18 @@ class Captions(CaptionsFormat):
         captions.saveSRT("file")
     """
     def __init__(self, filename: str = None, default_language: str = "und", **options):
+        self.fileFormat = None
+        self.format_confidence = 0.0
+        self._sniffed = None
         super().__init__(filename, default_language, **options)
 
     # from .lrc.functions import detectLRC, saveLRC, readLRC
     # from .sami.functions import detectSAMI, saveSAMI, readSAMI
-    from .srt.functions import detectSRT, saveSRT, readSRT
+    from .srt.functions import detectSRT, saveSRT, readSRT, readSRTMapped
     from .sub.functions import detectSUB, saveSUB, readSUB
     from .ttml.functions import detectTTML, saveTTML, readTTML
     # from .usf.functions import detectUSF, saveUSF, readUSF
-    from .vtt.functions import detectVTT, saveVTT, readVTT
+    from .vtt.functions import detectVTT, saveVTT, readVTT, readVTTMapped
 
     readers = {
         # "lrc": readLRC,
@@ -35,6 +58,11 @@ class Captions(CaptionsFormat):
         "vtt": readVTT
     }
 
+    mappedReaders = {
+        "srt": readSRTMapped,
+        "vtt": readVTTMapped
+    }
+
     savers = {
         # "lrc": saveLRC,
         # "sami": saveSAMI,
@@ -57,11 +85,36 @@ class Captions(CaptionsFormat):
         # "lrc": detectLRC
     }
 
+    def sniff(self, content: str | io.IOBase, filename: str = None) -> tuple[str | None, float, str | io.IOBase]:
+        """
+        Detect the format from the head of the content in one pass.
+
+        Non-seekable streams (pipes, sockets) are read only once, the returned content
+        replays the head and should be used for reading.
+
+        Parameters:
+        - content (str | io.IOBase): Content of file or string
+        - filename (str, optional): Used as a hint for detection (default is name of the stream)
+
+        Returns:
+            tuple[str | None, float, str | io.IOBase]: format, confidence and content for reading
+        """
+        if self._sniffed and self._sniffed[0] is content:
+            return self._sniffed[1:]
+        with stage("detect"):
+            head, stream = readHead(content)
+            if filename is None and isinstance(getattr(content, "name", None), str):
+                filename = content.name
+            format, confidence = sniffFormat(head, filename, self.detectors)
+        if format:
+            self.fileFormat = format
+            self.format_confidence = confidence
+        # read() sniffs again after detect(), reuse the result
+        self._sniffed = (content, format, confidence, stream)
+        return format, confidence, stream
+
     def get_format(self, file: str | io.IOBase) -> str | None:
-        for format, detector in self.detectors.items():
-            if detector(file):
-                self.fileFormat = format
-                return format
+        self.sniff(file)
         return self.fileFormat
 
     def detect(self, content: str | io.IOBase) -> bool:
@@ -70,10 +123,12 @@ class Captions(CaptionsFormat):
         return True
 
     def read(self, content: str | io.IOBase, languages: list[str] = None, **kwargs):
-        format = self.get_format(content)
+        _, _, stream = self.sniff(content)
+        self._sniffed = None
+        format = self.fileFormat
         if not format:
             return
-        self.readers[format](self, content, languages, **kwargs)
+        self.readers[format](self, stream, languages, **kwargs)
 
     def save(self, filename: str, languages: list[str] = None, output_format: str = None, **kwargs):
         if output_format:
@@ -82,4 +137,542 @@ class Captions(CaptionsFormat):
             output_format = self.fileFormat
         if output_format not in self.savers:
             raise ValueError(f"Incorect output format {output_format}")
-        self.savers[output_format](self, filename=filename, languages=languages, **kwargs)
+        return self.savers[output_format](self, filename=filename, languages=languages, **kwargs)
+
+    def readMapped(self, filename: str, languages: list[str] = None, encoding: str = "UTF-8", **kwargs) -> bool:
+        """
+        Read a file by memory-mapping it, format detection and cue scanning run on the mapped bytes
+        and only cue text is decoded. Used by "with" when the mmap option is set.
+
+        Parameters:
+        - filename (str): Captions file name
+        - languages (list[str], optional): List of languages (default are languages from filename)
+        - encoding (str, optional): File encoding (default is "UTF-8")
+        - **kwargs: Passed to the reader
+
+        Returns:
+            bool: False if the format does not support mapped reading, the file should be read normally
+        """
+        if detectCompression(filename):
+            return False
+        with open(filename, "rb") as f:
+            if not os.fstat(f.fileno()).st_size:
+                return False
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                with stage("detect"):
+                    format, confidence = sniffFormat(str(data[:HEAD_SIZE], encoding, errors="ignore"), filename,
+                                                     self.detectors)
+                if format not in self.mappedReaders:
+                    return False
+                self.fileFormat = format
+                self.format_confidence = confidence
+                file_languages = self.getLanguagesFromFilename(filename)
+                if file_languages and self.default_language == "und":
+                    self.setDefaultLanguage(file_languages[0])
+                with stage("read") as stats:
+                    blocks = len(self._block_list)
+                    self.mappedReaders[format](self, data, languages or file_languages or [self.default_language],
+                                               encoding=encoding, **kwargs)
+                if stats:
+                    stats.count("cues_parsed", len(self._block_list) - blocks)
+        return True
+
+    @classmethod
+    def load_range(cls, filename: str, start_time: MT = None, end_time: MT = None,
+                   languages: list[str] = None, index_filename: str = None, **kwargs) -> "Captions":
+        """
+        Load only captions overlapping [start_time, end_time) from a large file.
+
+        For SRT and VTT a sidecar cue index (see CueIndex) is used to read only the needed
+        part of the file, the index is created on first use. Other formats and compressed
+        files are read whole.
+
+        Parameters:
+        - filename (str): Captions file name
+        - start_time (MicroTime, optional): Load captions ending after start_time (default is None)
+        - end_time (MicroTime, optional): Load captions starting before end_time (default is None)
+        - languages (list[str], optional): List of languages (default are languages from filename)
+        - index_filename (str, optional): Sidecar index file (default is filename + ".pcidx")
+        - **kwargs: Passed to Captions (e.g. default_language, encoding, settings)
+
+        Returns:
+            Captions: Captions with only overlapping caption blocks
+        """
+        captions = cls(filename, **kwargs)
+        start = start_time.toTime() if start_time is not None else None
+        end = end_time.toTime() if end_time is not None else None
+        encoding = captions.options.get("encoding") or "UTF-8"
+        if encoding == "auto":
+            encoding = captions.getEncoding(filename)
+
+        with open(filename, "rb") as f:
+            format, _ = sniffFormat(f.read(HEAD_SIZE).decode(encoding, errors="ignore"), filename,
+                                    captions.detectors)
+            if format not in captions.mappedReaders or detectCompression(filename):
+                captions.__enter__()
+            else:
+                captions.fileFormat = format
+                index = CueIndex.open(filename, index_filename)
+                first, last = index.find(start, end)
+                file_languages = captions.getLanguagesFromFilename(filename)
+                if file_languages and captions.default_language == "und":
+                    captions.setDefaultLanguage(file_languages[0])
+                if index.size:
+                    range_start, range_end = index.byteRange(first, last)
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                        captions.mappedReaders[format](captions, data,
+                                                       languages or file_languages or [captions.default_language],
+                                                       encoding=encoding, start=range_start, end=range_end)
+
+        captions._block_list = [block for block in captions if block.block_type != BlockType.CAPTION or (
+            (start is None or block.end_time.toTime() > start) and (end is None or block.start_time.toTime() < end))]
+        return captions
+
+    @classmethod
+    async def aload(cls, filename: str, executor=None, **options) -> "Captions":
+        """
+        Read captions file without blocking the event loop, see pycaptions.aio.
+
+        Example:
+
+        captions = await Captions.aload("path/to/file.srt")
+        """
+        from .aio import aload
+
+        return await aload(filename, executor, **options)
+
+    async def asave(self, filename: str, languages: list[str] = None, output_format: str = None,
+                    executor=None, **kwargs) -> bool:
+        """
+        Save captions without blocking the event loop, see pycaptions.aio.
+        """
+        from .aio import asave
+
+        return await asave(self, filename, languages, output_format, executor, **kwargs)
+
+    @classmethod
+    def open_archive(cls, filename: str, workers: int = None, executor=None, **options):
+        """
+        Read caption files from a zip or tar archive without extracting it.
+
+        Members are parsed in a process pool, formats and languages are detected from member names.
+
+        Example:
+
+        for member, captions in Captions.open_archive("pack.zip"):
+            captions.saveVTT(member)
+
+        Parameters:
+        - filename (str): Archive file name (.zip, .tar, .tar.gz, ...)
+        - workers (int, optional): Number of processes, 1 parses in the current process (default is os.cpu_count())
+        - executor (Executor, optional): Executor to use instead of creating a new process pool
+        - **options: Passed to Captions (e.g. encoding, default_language, settings)
+
+        Yields:
+            tuple[str, Captions]: member name and captions, in archive order
+        """
+        options.setdefault("settings", cls().getSettings())
+        for member, (format, data) in mapMembers(_readArchiveMember, iterMembers(filename, READ_EXTENSIONS), options,
+                                                 workers=workers, executor=executor):
+            captions = cls(member, **options)
+            if data:
+                fromBytes(captions, data)
+                captions.fileFormat = format
+            else:
+                print(f"Error reading {member}")
+            yield member, captions
+
+    def merge_many(self, tracks, mode: str = "concat", offsets: list[MT] = None, workers: int = 1,
+                   executor=None, **options):
+        """
+        Join many tracks in one pass, see CaptionsFormat.merge_many, tracks can also be file names.
+
+        Example:
+
+        captions = Captions()
+        captions.merge_many(sorted(glob.glob("segments/*.vtt")), workers=4)
+        captions.saveVTT("full")
+
+        Parameters:
+        - tracks (iterable): File names, CaptionsFormat instances or other iterables of blocks sorted by start time
+        - mode (str, optional): "concat" or "interleave", see CaptionsFormat.merge_many (default is "concat")
+        - offsets (list[MicroTime], optional): Time offset of each track (default is None)
+        - workers (int, optional): Number of processes parsing files ahead of the merge, 1 parses them
+          one by one in the current process, None is os.cpu_count() (default is 1)
+        - executor (Executor, optional): Executor to use instead of creating a new process pool
+        - **options: Passed to Captions of the files (e.g. encoding)
+
+        Returns:
+            Counter: number of joined tracks
+        """
+        tracks = list(tracks)
+        filenames = [i for i in tracks if isinstance(i, str)]
+        if filenames:
+            options.setdefault("settings", self.getSettings())
+            loaded = self._readTracks(filenames, workers, executor, options)
+            tracks = (next(loaded) if isinstance(i, str) else i for i in tracks)
+        return super().merge_many(tracks, mode, offsets)
+
+    @classmethod
+    def _readTracks(cls, filenames: list[str], workers: int, executor, options: dict):
+        if workers == 1 and not executor:
+            for filename in filenames:
+                with cls(filename, **options) as captions:
+                    yield captions
+            return
+        for filename, (format, data) in mapMembers(_readTrack, ((i, None) for i in filenames), options,
+                                                   workers=workers, executor=executor):
+            captions = cls(filename, **options)
+            fromBytes(captions, data)
+            captions.fileFormat = format
+            yield captions
+
+
+STREAM_QUEUE_SIZE = 256
+"""
+Maximum number of blocks waiting between the reader and the writer of CaptionsStream.
+"""
+
+
+class _StreamClosed(Exception):
+    pass
+
+
+class CaptionsStream(Captions):
+    """
+    Captions that pass blocks from the reader straight to the writer.
+
+    The reader runs in a background thread and blocks wait in a bounded queue,
+    so memory use does not depend on the number of cues. Blocks can be iterated only once.
+
+    Example:
+
+    with CaptionsStream(sys.stdin) as captions:
+        captions.saveVTT(None, stream=sys.stdout)
+    """
+    streamingReaders = ("srt", "sub", "vtt")
+
+    def __init__(self, content: io.IOBase = None, default_language: str = "und", input_format: str = None,
+                 languages: list[str] = None, queue_size: int = STREAM_QUEUE_SIZE, normalize: dict = None,
+                 **options):
+        """
+        Parameters:
+        - content (io.IOBase): Text stream to read
+        - default_language (str, optional): Language of the captions
+        - input_format (str, optional): Format of the content (default is detected from the head of the stream)
+        - languages (list[str], optional): Languages of the content (default is default_language)
+        - queue_size (int, optional): Maximum number of blocks waiting for the writer
+        - normalize (dict, optional): Resolve overlaps while streaming, options of timing.normalizeStream
+          (e.g. {"policy": "trim", "min_gap": 40_000})
+        """
+        super().__init__(content, default_language, isFile=False, **options)
+        self.languages = languages
+        self.normalize = normalize
+        if input_format:
+            self.fileFormat = input_format.lstrip(".").lower()
+        self._queue = queue.Queue(queue_size)
+        self._thread = None
+        self._error = None
+        self._closed = False
+
+    def __enter__(self):
+        if not self.fileFormat:
+            _, _, self.file_name_or_content = self.sniff(self.file_name_or_content)
+            self._sniffed = None
+        if self.fileFormat not in self.readers:
+            raise ValueError(f"Unknown input format {self.fileFormat}")
+        if self.fileFormat not in self.streamingReaders:
+            # whole document is needed (e.g. TTML), read it before writing
+            self._queue = None
+            self.readers[self.fileFormat](self, self.file_name_or_content, self.languages)
+            return self
+        # keep settings and stats of the caller
+        self._thread = threading.Thread(target=contextvars.copy_context().run, args=(self._read,), daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._closed = True
+        if self._thread:
+            while self._thread.is_alive():
+                try:
+                    self._queue.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            self._thread.join()
+
+    def _read(self):
+        try:
+            self.readers[self.fileFormat](self, self.file_name_or_content, self.languages)
+        except _StreamClosed:
+            pass
+        except Exception as e:
+            self._error = e
+        finally:
+            self._put(None)
+
+    def _put(self, item):
+        while True:
+            if self._closed:
+                raise _StreamClosed()
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def append(self, item):
+        if self._queue is None:
+            return super().append(item)
+        if item.end_time and item.end_time > self.time_length:
+            self.time_length = item.end_time
+        self._put(item)
+
+    def shift_time(self, time):
+        if time and time.toTime() and self._queue is None:
+            super().shift_time(time)
+
+    def __iter__(self):
+        if self.normalize:
+            return normalizeStream(self._blocks(), **self.normalize)
+        return self._blocks()
+
+    def _blocks(self):
+        if self._queue is None:
+            yield from super().__iter__()
+            return
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            yield item
+        if self._error:
+            raise self._error
+
+
+def convert_stream(input: io.IOBase, output: io.IOBase, output_format: str, input_format: str = None,
+                   languages: list[str] = None, settings: Settings = None, normalize: dict = None, **kwargs) -> bool:
+    """
+    Convert captions from a text stream (e.g. sys.stdin) to a text stream (e.g. sys.stdout).
+
+    SRT, SUB and VTT input is written while it is being read, memory use is constant.
+    TTML input and output need the whole document.
+
+    Parameters:
+    - input (io.IOBase): Input text stream, may be non-seekable
+    - output (io.IOBase): Output text stream
+    - output_format (str): Output format
+    - input_format (str, optional): Input format (default is detected from the head of the stream)
+    - languages (list[str], optional): Languages of the captions (default is "und")
+    - settings (Settings, optional): Reader and writer settings
+    - normalize (dict, optional): Resolve overlaps with bounded lookahead, see timing.normalizeStream
+    - **kwargs: Passed to the writer (e.g. lines, style)
+
+    Returns:
+        bool: True if the output was written
+    """
+    output_format = output_format.lstrip(".").lower()
+    if output_format not in Captions.savers:
+        raise ValueError(f"Incorect output format {output_format}")
+    default_language = languages[0] if languages else "und"
+    with CaptionsStream(input, default_language, input_format, languages, normalize=normalize,
+                        settings=settings) as captions:
+        return captions.save(None, languages, output_format, stream=output, **kwargs)
+
+
+READ_EXTENSIONS = SRT_EXTENSIONS + SUB_EXTENSIONS + TTML_EXTENSIONS + VTT_EXTENSIONS
+
+
+def _readMember(member: str, data: bytes, options: dict) -> Captions:
+    """
+    Returns captions of an archive member, without fileFormat if the member could not be read.
+    """
+    encoding = options.get("encoding") or "UTF-8"
+    if encoding == "auto":
+        with stage("encoding"):
+            encoding = detect_encoding(data).get("encoding") or "UTF-8"
+    count("bytes_in", len(data))
+    captions = Captions(isFile=False, **options)
+    try:
+        format, _, stream = captions.sniff(io.StringIO(data.decode(encoding)), member)
+        if not format:
+            return captions
+        languages = captions.getLanguagesFromFilename(member)
+        if languages and captions.default_language == "und":
+            captions.setDefaultLanguage(languages[0])
+        captions.readers[format](captions, stream, languages)
+    except Exception as e:
+        # one bad member must not stop the whole archive
+        print(f"Error reading {member}: {e}")
+        return Captions(isFile=False, **options)
+    return captions
+
+
+def _readArchiveMember(member: str, data: bytes, options: dict) -> tuple[str | None, bytes | None]:
+    captions = _readMember(member, data, options)
+    if not captions.fileFormat:
+        return None, None
+    return captions.fileFormat, toBytes(captions)
+
+
+def _readTrack(filename: str, data: None, options: dict) -> tuple[str | None, bytes]:
+    with Captions(filename, **options) as captions:
+        return captions.fileFormat, toBytes(captions)
+
+
+def _convertArchiveMember(member: str, data: bytes, output_format: str, languages: list[str],
+                          options: dict, kwargs: dict) -> tuple[str | None, bytes | None]:
+    captions = _readMember(member, data, options)
+    if not captions.fileFormat:
+        return None, None
+    output = io.StringIO()
+    try:
+        if not captions.save(None, languages, output_format, stream=output, **kwargs):
+            return None, None
+    except Exception as e:
+        print(f"Error writing {member}: {e}")
+        return None, None
+    saver = captions.savers[output_format]
+    name = captions.makeFilename(Captions.getFilename(member), getattr(captions.extensions, saver.extension),
+                                 languages)
+    return name, output.getvalue().encode(kwargs.get("file_encoding") or "UTF-8")
+
+
+def _uniqueName(name: str, member: str, names: set[str]) -> str:
+    """
+    Returns a name not in names for output of member, e.g. name.en.sub.vtt for name.en.sub
+    if name.en.vtt is taken, otherwise name.en.1.vtt, name.en.2.vtt, ...
+    """
+    root, extension = os.path.splitext(name)
+    source = os.path.splitext(splitCompression(member)[0])[1]
+    if source.lower() != extension.lower() and root + source + extension not in names:
+        return root + source + extension
+    counter = 1
+    while f"{root}.{counter}{extension}" in names:
+        counter += 1
+    return f"{root}.{counter}{extension}"
+
+
+def convert_archive(input: str, output: str, output_format: str, languages: list[str] = None,
+                    workers: int = None, executor=None, settings: Settings = None, encoding: str = "UTF-8",
+                    **kwargs) -> int:
+    """
+    Convert all caption files in a zip or tar archive and write them into a new archive in one pass.
+
+    Parameters:
+    - input (str): Input archive file name
+    - output (str): Output archive file name, type is chosen by extension (.zip, .tar, .tar.gz, ...)
+    - output_format (str): Output format
+    - languages (list[str], optional): List of languages to save (default is language of each file)
+    - workers (int, optional): Number of processes, 1 converts in the current process (default is os.cpu_count())
+    - executor (Executor, optional): Executor to use instead of creating a new process pool
+    - settings (Settings, optional): Reader and writer settings
+    - encoding (str, optional): Encoding of input files, "auto" to detect it (default is "UTF-8")
+    - **kwargs: Passed to the writer (e.g. lines, style)
+
+    Returns:
+        int: Number of converted files
+    """
+    output_format = output_format.lstrip(".").lower()
+    if output_format not in Captions.savers:
+        raise ValueError(f"Incorect output format {output_format}")
+    options = {"settings": settings or Captions().getSettings(), "encoding": encoding}
+    names = set()
+    with ArchiveWriter(output) as archive:
+        for member, (name, data) in mapMembers(_convertArchiveMember, iterMembers(input, READ_EXTENSIONS),
+                                               output_format, languages, options, kwargs,
+                                               workers=workers, executor=executor):
+            if name is None:
+                print(f"Error converting {member}")
+                continue
+            if name in names:
+                name = _uniqueName(name, member, names)
+            names.add(name)
+            archive.write(name, data)
+    return len(names)
+
+
+def convert(input: str, output: str = None, output_format: str = None, languages: list[str] = None,
+            cache: ConversionCache = None, parse_cache: ParseCache | str | bool = None,
+            encoding: str = "UTF-8", settings: Settings = None, **kwargs) -> bool:
+    """
+    Convert captions file into another format.
+
+    With cache, repeated conversions of unchanged files are written from the cache without parsing.
+
+    Parameters:
+    - input (str): Input file name
+    - output (str, optional): Output file name, languages and extension are added (default is input without languages and extension)
+    - output_format (str, optional): Output format (default is input extension)
+    - languages (list[str], optional): List of languages to save
+    - cache (ConversionCache, optional): Cache of conversion outputs
+    - parse_cache (ParseCache | str | bool, optional): Cache of parsed input files, see CaptionsFormat
+    - encoding (str, optional): Input file encoding, "auto" to detect it (default is "UTF-8")
+    - settings (Settings, optional): Reader and writer settings
+    - **kwargs: Passed to the writer (e.g. lines, style)
+
+    Returns:
+        bool: True if the output was written
+    """
+    output = output or Captions.getFilename(input)
+    output_format = output_format or os.path.splitext(splitCompression(input)[0])[1]
+    captions = Captions(input, cache=parse_cache, settings=settings, encoding=encoding)
+    file_languages = captions.getLanguagesFromFilename(input)
+    if file_languages:
+        captions.setDefaultLanguage(file_languages[0])
+    if cache:
+        kwargs["cache"] = cache
+        kwargs["cache_source"] = f"{cache.fileHash(input)}:{encoding}:{captions.default_language}"
+        if captions.save(output, languages, output_format, cache_only=True, **kwargs):
+            return True
+    with captions:
+        return captions.save(output, languages, output_format, **kwargs)
+
+
+def _openTrack(captions: CaptionsFormat | str, options: dict) -> CaptionsFormat:
+    if isinstance(captions, CaptionsFormat):
+        return captions
+    with Captions(captions, **options) as track:
+        return track
+
+
+def diff(old: CaptionsFormat | str, new: CaptionsFormat | str, max_shift: MT = None, **options) -> CaptionsDiff:
+    """
+    Compare two captions tracks, e.g. a redelivery with the previous version.
+
+    Example:
+
+    changes = diff("old.en.srt", "new.en.srt")
+    print(changes.retimed, changes.retexted)
+    json.dump(changes.toPatch(), f)
+
+    Parameters:
+    - old (CaptionsFormat | str): Old captions or file name
+    - new (CaptionsFormat | str): New captions or file name
+    - max_shift (MicroTime, optional): Maximum time shift of retimed cues (default is None, unlimited)
+    - **options: Passed to Captions of file names (e.g. encoding)
+
+    Returns:
+        CaptionsDiff: inserted, deleted, retimed and re-texted captions, see development.diff.diffBlocks
+    """
+    return diffBlocks(_openTrack(old, options), _openTrack(new, options),
+                      max_shift.toTime() if max_shift is not None else None)
+
+
+def apply_patch(captions: CaptionsFormat, patch: dict, strict: bool = True) -> CaptionsFormat:
+    """
+    Apply a patch from CaptionsDiff.toPatch to the old captions, the captions are modified in place.
+
+    Parameters:
+    - captions (CaptionsFormat): Old captions
+    - patch (dict): Patch
+    - strict (bool, optional): Raise ValueError if the captions are not the old captions of the patch (default is True)
+
+    Returns:
+        CaptionsFormat: the captions
+    """
+    captions._block_list = applyPatch(captions._block_list, patch, strict)
+    captions.time_length = max((i.end_time for i in captions._block_list
+                                if i.block_type == BlockType.CAPTION and i.end_time is not None),
+                               key=lambda i: i.toTime(), default=MT())
+    return captions
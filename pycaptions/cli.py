@@ -1,14 +1,41 @@
 import argparse
+import contextlib
+import cProfile
+import glob
+import io
+import itertools
+import json
 import os
+import sys
+import time
 
-from .captions import Captions
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from .captions import Captions, convert_stream
+from .development.cache import hashFile
+from .development.compression import COMPRESSIONS, openFile
+from .development.profiling import MemoryTrace, profileReport
+from .development.stats import Stats
+from .development.wrappers import _outputFilename
 from .microTime import MicroTime as MT
-from .styling import changeStyleOption
-from .options import save_extensions, style_options
-from pycaptions import supported_extensions
+from .options import currentSettings, useSettings
+from pycaptions import supported_extensions, supported_readers
 
 
-def main():
+MANIFEST_FILENAME = ".pycaptions-manifest.json"
+MANIFEST_VERSION = 1
+
+
+def main(argv: list[str] = None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["serve"]:
+        from .server import main as serve
+
+        return serve(argv[1:])
+    if argv[:1] == ["index"]:
+        from .index import main as index
+
+        return index(argv[1:])
+
     time_formats_help = {
         "time": "u (microseconds)",
         "microtime": "'h m s S u' (doesn't need all the values)",
@@ -23,21 +50,76 @@ def main():
     time_formats = '\n'.join(f" - '{i}': {v}" for i, v in time_formats_help.items() if i != default_time_format)
 
     parser = argparse.ArgumentParser(prog='PyCaptions', description='Captions converter', formatter_class=argparse.RawTextHelpFormatter)
-    parser.add_argument("filenames", nargs="+", help="List of input filenames.")
+    parser.add_argument("filenames", nargs="*", help="List of input filenames or glob patterns (e.g. 'library/**/*.srt').\n'-' reads from stdin and writes to stdout.")
     parser.add_argument("-f", "--format", nargs="+", default="all", help=f"Specify output format(s).\nOptions:\n - 'all' (default): exports to all formats specified in FileExtensions\n{extensions}")
-    parser.add_argument("-j", "--join", nargs="+", default="end_time", help="Specify join criteria.\nOptions:\n - 'end_time' (default): Adds next file to the end of previous\n - 'add': Adds new language to existing file\n - 'offset [TIME_FORMAT_FORMAT ...]': Specify length of each file")
+    parser.add_argument("-j", "--join", nargs="+", default="end_time", help="Specify join criteria.\nOptions:\n - 'end_time' (default): Adds next file to the end of previous\n - 'add': Adds new language to existing file, cues are\n   paired by time\n - 'interleave': Merges files by start time\n - 'offset [TIME_FORMAT_FORMAT ...]': Specify length of each file\nWith -j, glob patterns are joined in sorted order\nand -J parses files in parallel.")
     parser.add_argument("-tf", "--time-format", nargs="+", default=default_time_format, help=f"Specify time format.\nOptions:\n - '{default_time_format}' (default): {time_formats_help[default_time_format]}\n{time_formats}")
     parser.add_argument("-l", "--languages", nargs="+", help="List of languages. For more than one language in the\nsame file it's recomended to set '-li 1' for better visibility.")
     parser.add_argument("-o", "--output-filenames", nargs="+", help="List of output filenames.")
     parser.add_argument("-od", "--output-directory", help="Output directory path.\nCreates new directory in current working\ndirectory if it doesn't exist.")
     parser.add_argument("-li", "--lines", type=int, help="Number of lines per language.\nOptions:\n - '-1': preservs original\n - '0': auto format \n - n: positive integer")
     parser.add_argument("-s", "--style", help="Either 'full' (default) or 'none'", default="full")
-    args = parser.parse_args()
+    parser.add_argument("-r", "--recursive", nargs="+", metavar="DIR", help="Convert all caption files in directories\nand their subdirectories, files are converted\nseparately (batch mode).")
+    parser.add_argument("-J", "--jobs", type=int, help="Number of files converted in parallel (batch mode).")
+    parser.add_argument("-i", "--incremental", nargs="?", const=True, metavar="MANIFEST", help=f"Skip files that did not change since the last\nrun (batch mode). Default manifest is\n'{MANIFEST_FILENAME}' in the output directory.")
+    parser.add_argument("-if", "--input-format", help="Input format, detected from content if not set.")
+    parser.add_argument("-of", "--output-format", help="Output format for stdin/stdout mode (default is '-f').")
+    parser.add_argument("--scale", metavar="FACTOR", help="Multiply all times, e.g. '25/23.976' for PAL\nspeed-up (with less than two --anchor).")
+    parser.add_argument("--shift", metavar="TIME", help="Add TIME (in -tf format) to all times after\n--scale and --anchor, '--shift=-TIME' subtracts it.")
+    parser.add_argument("--anchor", nargs=2, action="append", metavar=("SOURCE", "TARGET"), help="Sync point, SOURCE time is moved to TARGET\n(in -tf format). Times between anchors are\ninterpolated. Can be repeated.")
+    parser.add_argument("--stats", action="store_true", help="Print time spent in each stage and counters\n(bytes, cues, cache hits) to stderr.")
+    parser.add_argument("--profile", metavar="FILE", help="Profile the conversion with cProfile, save it to\nFILE (e.g. for snakeviz) and print top functions\nto stderr. With -J only the main process is profiled.")
+    parser.add_argument("--profile-top", type=int, default=25, metavar="N", help="Number of functions printed by --profile\n(default is 25).")
+    parser.add_argument("--trace-memory", nargs="?", type=int, const=10, metavar="N", help="Trace memory with tracemalloc, print peak memory\nand top N (default 10) allocation sites of each\nstage to stderr.")
+    args = parser.parse_args(argv)
 
-    style_options.style = args.style
+    settings = {"style": args.style}
     if args.lines:
-        style_options.lines = args.lines
+        settings["lines"] = args.lines
+
+    if not args.filenames and not args.recursive:
+        parser.error("the following arguments are required: filenames")
+    try:
+        args.retime = retimeOptions(args)
+    except ValueError as e:
+        parser.error(f"invalid retiming: {e}")
 
+    stats = None
+    if args.trace_memory:
+        stats = MemoryTrace(args.trace_memory)
+    elif args.stats:
+        stats = Stats()
+    profiler = cProfile.Profile() if args.profile else None
+
+    with useSettings(**settings), stats or contextlib.nullcontext():
+        if profiler:
+            profiler.enable()
+        try:
+            if args.filenames == ["-"] or args.output_filenames == ["-"]:
+                result = convertPipe(args)
+            elif isinstance(args.join, list) and not args.recursive and not args.incremental:
+                # explicit join, e.g. of many segment files
+                args.filenames = expandInputs(args.filenames)
+                result = convert(args)
+            elif args.recursive or args.jobs or args.incremental or any(glob.has_magic(i) for i in args.filenames):
+                result = convertBatch(args, stats)
+            else:
+                result = convert(args)
+        finally:
+            if profiler:
+                profiler.disable()
+    if profiler:
+        try:
+            profiler.dump_stats(args.profile)
+        except IOError as e:
+            print(f"I/O error({e.errno}): {e.strerror}", file=sys.stderr)
+        print(profileReport(profiler, args.profile_top), file=sys.stderr)
+    if stats:
+        print(stats.report(), file=sys.stderr)
+    return result
+
+
+def convert(args):
     formats = None
     languages = None
 
@@ -46,13 +128,13 @@ def main():
 
     if args.output_filenames:
         if args.output_directory:
-            out_filenames = [os.path.join(args.output_directory, i) for i in args.out_filenames]
+            out_filenames = [os.path.join(args.output_directory, i) for i in args.output_filenames]
         else:
-            out_filenames = args.out_filenames
+            out_filenames = args.output_filenames
         if args.format == "all":
             formats = []
             for i in args.filenames:
-                _, ext = os.path.splitext(i)[0]
+                _, ext = os.path.splitext(i)
                 if ext not in supported_extensions:
                     print(f"Incorect file format {ext} for {i}")
                     print(f"Supported extensions {supported_extensions}")
@@ -60,7 +142,7 @@ def main():
                 formats.append(ext)
 
         languages = [Captions.getLanguagesFromFilename(i) or args.languages
-                     for i in args.out_filenames]
+                     for i in args.output_filenames]
 
     else:
         out_filenames = [Captions.getFilename(i, args.output_directory) for i in args.filenames]
@@ -74,31 +156,297 @@ def main():
     if not languages:
         languages = [args.languages for _ in args.filenames]
 
-    if not args.join:
+    join = [args.join] if isinstance(args.join, str) else args.join
+    workers = args.jobs or 1
+    if not join:
         for _in, _out, _lang, _format in zip(args.filenames, out_filenames, languages, formats):
             with Captions(_in) as c:
+                if args.retime:
+                    c.retime(**args.retime)
                 for out_format in _format:
                     c.save(_out, _lang, out_format)
-    elif args.join == "end_time":
-        with Captions(args.filenames[0]) as c:
+        return
+    with Captions(args.filenames[0]) as c:
+        if join[0] == "end_time":
+            c.merge_many(args.filenames[1:], workers=workers)
+        elif join[0] == "interleave":
+            c.merge_many(args.filenames[1:], "interleave", workers=workers)
+        elif join[0] == "add":
             for next_file in args.filenames[1:]:
-                c.join(Captions(next_file), True)
-            for out_format in formats[0]:
-                c.save(out_filenames[0], languages[0], out_format)
-    elif args.join == "add":
-        with Captions(args.filenames[0]) as c:
-            for next_file in args.filenames[1:]:
-                c += Captions(next_file)
-            for out_format in formats[0]:
-                c.save(out_filenames[0], languages[0], out_format)
-    elif args.join == "offset":
-        with Captions(args.filenames[0]) as c:
-            time_offset = MT()
-            for next_file, offset in zip(args.filenames[1:], args.join[1:]):
-                time_offset += MT.fromAnyFormat(args.time_format, *offset)
-                c.join(Captions(next_file), False, time_offset)
-            for out_format in formats[0]:
-                c.save(out_filenames[0], languages[0], out_format)
+                with Captions(next_file) as other:
+                    c += other
+        elif join[0] == "offset":
+            offsets = list(itertools.accumulate(parseTime(i, timeFormat(args)) for i in join[1:]))
+            c.merge_many(args.filenames[1:len(offsets) + 1], offsets=offsets, workers=workers)
+        else:
+            print(f"Invalid join criteria {join[0]}")
+            return -1
+        if args.retime:
+            c.retime(**args.retime)
+        for out_format in formats[0]:
+            c.save(out_filenames[0], languages[0], out_format)
+
+
+def timeFormat(args) -> str:
+    return args.time_format if isinstance(args.time_format, str) else args.time_format[0]
+
+
+def parseTime(value: str, time_format: str) -> MT:
+    """
+    Parses time in time_format, a leading '-' makes it negative.
+    """
+    if value.startswith("-"):
+        return MT.fromTime(-parseTime(value[1:], time_format).toTime())
+    return MT.fromAnyFormat(time_format, *value.split())
+
+
+def retimeOptions(args) -> dict | None:
+    """
+    Returns CaptionsFormat.retime arguments of --scale, --shift and --anchor, or None.
+    """
+    if not args.scale and not args.shift and not args.anchor:
+        return None
+    scale = 1.0
+    if args.scale:
+        numerator, _, denominator = args.scale.partition("/")
+        scale = float(numerator) / float(denominator or 1)
+        if scale <= 0:
+            raise ValueError("scale must be positive")
+    time_format = timeFormat(args)
+    return {
+        "anchors": [(parseTime(source, time_format), parseTime(target, time_format))
+                    for source, target in args.anchor or []],
+        "scale": scale,
+        "offset": parseTime(args.shift, time_format) if args.shift else None
+    }
+
+
+def convertPipe(args):
+    """
+    Converts one input (a file or stdin) to stdout, cues are written while they are read.
+    """
+    if args.retime:
+        print("Retiming is not supported with stdout, cues are written while they are read", file=sys.stderr)
+        return -1
+    output_format = args.output_format
+    if not output_format:
+        if args.format == "all" or len(args.format) != 1:
+            print("Output format is required for stdout, use '-of FORMAT'", file=sys.stderr)
+            return -1
+        output_format = args.format[0]
+    if len(args.filenames) != 1:
+        print("Only one input can be written to stdout", file=sys.stderr)
+        return -1
+    if args.filenames == ["-"]:
+        input = sys.stdin
+        if hasattr(input, "buffer"):
+            input = io.TextIOWrapper(input.buffer, encoding="UTF-8")
+    else:
+        input = openFile(args.filenames[0], "r")
+    output = sys.stdout
+    if hasattr(output, "buffer"):
+        output = io.TextIOWrapper(output.buffer, encoding="UTF-8", write_through=True)
+    try:
+        # messages must not be mixed with the captions
+        with contextlib.redirect_stdout(sys.stderr):
+            if not convert_stream(input, output, output_format, args.input_format, args.languages):
+                return -1
+        output.flush()
+    except BrokenPipeError:
+        # reader of the pipe exited (e.g. head)
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    except Exception as e:
+        print(f"Error {e}", file=sys.stderr)
+        return -1
+    finally:
+        output.flush()
+        if input is not sys.stdin:
+            input.detach() if args.filenames == ["-"] else input.close()
+        if output is not sys.stdout:
+            output.detach()
+    return 0
+
+
+def findInputs(patterns: list[str], directories: list[str] = None) -> list[tuple[str, str]]:
+    """
+    Returns (filename, root directory) of all caption files matching glob patterns or in directories (recursive).
+
+    Root directory is used to keep the directory structure in the output directory.
+    """
+    extensions = tuple(supported_readers) + tuple(i + c for i in supported_readers for c in COMPRESSIONS)
+    inputs = dict()
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            parts = list(itertools.takewhile(lambda i: not glob.has_magic(i), pattern.split(os.sep)[:-1]))
+            root = os.sep.join(parts) or (os.sep if pattern.startswith(os.sep) else ".")
+            for filename in sorted(glob.glob(pattern, recursive=True)):
+                if os.path.isfile(filename):
+                    inputs.setdefault(filename, root)
+        else:
+            inputs.setdefault(pattern, os.path.dirname(pattern) or ".")
+    for directory in directories or []:
+        for current, subdirectories, filenames in os.walk(directory):
+            subdirectories.sort()
+            for filename in sorted(filenames):
+                if filename.lower().endswith(extensions):
+                    inputs.setdefault(os.path.join(current, filename), directory)
+    return list(inputs.items())
+
+
+def expandInputs(patterns: list[str]) -> list[str]:
+    """
+    Returns file names with glob patterns expanded in place (sorted), repeated file names are kept in order.
+    """
+    filenames = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            filenames += [i for i in sorted(glob.glob(pattern, recursive=True)) if os.path.isfile(i)]
+        else:
+            filenames.append(pattern)
+    return filenames
+
+
+def loadManifest(filename: str) -> dict:
+    try:
+        with open(filename, "r", encoding="UTF-8") as f:
+            data = json.load(f)
+        if data.get("version") == MANIFEST_VERSION:
+            return data["files"]
+    except (OSError, ValueError, KeyError):
+        pass
+    return dict()
+
+
+def saveManifest(filename: str, files: dict):
+    tmp = filename + ".tmp"
+    with open(tmp, "w", encoding="UTF-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "files": files}, f, indent=1)
+    os.replace(tmp, filename)
+
+
+def isUpToDate(entry: dict, filename: str, stat: os.stat_result, options: str) -> bool:
+    """
+    Returns True if the file and options did not change since the entry was made and all outputs exist.
+    """
+    if not entry or entry.get("options") != options:
+        return False
+    if not all(os.path.exists(i) for i in entry.get("outputs", [])) or not entry.get("outputs"):
+        return False
+    if entry.get("size") == stat.st_size and entry.get("mtime") == stat.st_mtime_ns:
+        return True
+    # touched but not changed
+    return entry.get("size") == stat.st_size and entry.get("hash") == hashFile(filename)
+
+
+def _convertFile(filename: str, output: str, formats: list[str], languages: list[str], settings,
+                 incremental: bool, collect_stats: bool = False,
+                 retime: dict = None) -> tuple[list[str], str | None, dict | None]:
+    """
+    Converts one file into all formats, returns written output files, content hash of the input
+    and stats collected in a worker process.
+    """
+    if collect_stats:
+        with Stats() as stats:
+            return *_convertFile(filename, output, formats, languages, settings, incremental,
+                                 retime=retime)[:2], stats.toDict()
+    outputs = []
+    with Captions(filename, settings=settings) as c:
+        if not c.fileFormat:
+            raise ValueError(f"Unknown format of {filename}")
+        if retime:
+            c.retime(**retime)
+        for out_format in formats:
+            out_format = out_format.lstrip(".").lower()
+            if not c.save(output, languages, out_format):
+                raise ValueError(f"Could not convert to {out_format}")
+            extension = c.savers[out_format].extension
+            outputs.append(_outputFilename(c, output, extension, languages or [c.default_language])[0])
+    return outputs, hashFile(filename) if incremental else None, None
+
+
+def convertBatch(args, stats: Stats = None):
+    """
+    Converts every input file separately, optionally in parallel and skipping unchanged files.
+    """
+    start = time.perf_counter()
+    inputs = findInputs(args.filenames, args.recursive)
+    if not inputs:
+        print("No input files found")
+        return -1
+    if args.format == "all":
+        formats = list(supported_extensions)
+    else:
+        formats = args.format
+    settings = currentSettings()
+
+    manifest_filename = None
+    manifest = dict()
+    if args.incremental:
+        manifest_filename = (args.incremental if isinstance(args.incremental, str)
+                             else os.path.join(args.output_directory or ".", MANIFEST_FILENAME))
+        manifest = loadManifest(manifest_filename)
+    options = json.dumps([sorted(formats), args.languages, settings.style, settings.lines,
+                          [args.scale, args.shift, args.anchor, timeFormat(args)] if args.retime else None,
+                          os.path.abspath(args.output_directory) if args.output_directory else None])
+
+    jobs = []
+    skipped = 0
+    for filename, root in inputs:
+        output_directory = None
+        if args.output_directory:
+            output_directory = os.path.join(args.output_directory, os.path.relpath(os.path.dirname(filename), root))
+            os.makedirs(output_directory, exist_ok=True)
+        stat = os.stat(filename)
+        key = os.path.abspath(filename)
+        if args.incremental and isUpToDate(manifest.get(key), filename, stat, options):
+            skipped += 1
+            continue
+        jobs.append((filename, key, stat, Captions.getFilename(filename, output_directory)))
+
+    converted = failed = size = 0
+
+    def done(job, outputs, content_hash, worker_stats):
+        nonlocal converted, size
+        filename, key, stat, _ = job
+        if stats and worker_stats:
+            stats.merge(worker_stats)
+        converted += 1
+        size += stat.st_size
+        print(f"[{converted + failed}/{len(jobs)}] {filename}")
+        if args.incremental:
+            manifest[key] = {"size": stat.st_size, "mtime": stat.st_mtime_ns, "hash": content_hash,
+                             "options": options, "outputs": outputs}
+
+    def error(job, e):
+        nonlocal failed
+        failed += 1
+        manifest.pop(job[1], None)
+        print(f"[{converted + failed}/{len(jobs)}] {job[0]}: Error {e}")
+
+    if (args.jobs or 1) > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            futures = {pool.submit(_convertFile, job[0], job[3], formats, args.languages, settings,
+                                   bool(args.incremental), bool(stats), args.retime): job for job in jobs}
+            for future in as_completed(futures):
+                try:
+                    done(futures[future], *future.result())
+                except Exception as e:
+                    error(futures[future], e)
+    else:
+        for job in jobs:
+            try:
+                done(job, *_convertFile(job[0], job[3], formats, args.languages, settings, bool(args.incremental),
+                                        retime=args.retime))
+            except Exception as e:
+                error(job, e)
+
+    if manifest_filename:
+        saveManifest(manifest_filename, manifest)
+    elapsed = time.perf_counter() - start
+    print(f"Converted {converted} files ({skipped} unchanged skipped, {failed} failed) in {elapsed:.2f} s, "
+          f"{converted / elapsed:.1f} files/s, {size / elapsed / 1024 / 1024:.2f} MB/s")
+    return 1 if failed else 0
 
 
 if __name__ == "__main__":
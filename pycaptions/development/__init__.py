@@ -6,3 +6,10 @@ from .wrappers import (
     captionsDetector,
     captionsReader
 )
+from .sniffer import sniffFormat, readHead
+from .cache import ConversionCache, ParseCache
+from .jsonStream import JsonStreamReader
+from .cueIndex import CueIndex
+from .stats import Stats
+from .profiling import MemoryTrace
+from .diff import CaptionsDiff
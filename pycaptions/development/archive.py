@@ -0,0 +1,129 @@
+import collections
+import io
+import os
+import tarfile
+import time
+import zipfile
+
+from concurrent.futures import Executor, ProcessPoolExecutor
+from .compression import COMPRESSIONS, splitCompression
+
+
+TAR_WRITE_MODES = {
+    ".tar": "w",
+    ".tar.gz": "w:gz",
+    ".tgz": "w:gz",
+    ".tar.bz2": "w:bz2",
+    ".tbz2": "w:bz2",
+    ".tar.xz": "w:xz",
+    ".txz": "w:xz"
+}
+
+JOBS_PER_WORKER = 4
+"""
+Number of members read ahead for each worker, bounds memory use for large archives.
+"""
+
+
+def iterMembers(filename: str, extensions: list[str] = None):
+    """
+    Yields name and content of regular files in a zip or tar (optionally compressed) archive.
+
+    Compressed members (e.g. "name.en.srt.gz") are decompressed.
+
+    Parameters:
+    - filename (str): Archive file name
+    - extensions (list[str], optional): Only members with these extensions, compression extension
+      is ignored (default is all)
+    """
+    def accept(name: str) -> bool:
+        if not extensions:
+            return True
+        return os.path.splitext(splitCompression(name)[0])[1].lower() in extensions
+
+    def decompress(name: str, data: bytes) -> bytes:
+        _, compression = splitCompression(name)
+        if compression:
+            return COMPRESSIONS[compression].decompress(data)
+        return data
+
+    if zipfile.is_zipfile(filename):
+        with zipfile.ZipFile(filename) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and accept(info.filename):
+                    yield info.filename, decompress(info.filename, archive.read(info))
+    else:
+        with tarfile.open(filename, "r:*") as archive:
+            for info in archive:
+                if info.isfile() and accept(info.name):
+                    yield info.name, decompress(info.name, archive.extractfile(info).read())
+
+
+def mapMembers(function, members, *args, workers: int = None, executor: Executor = None):
+    """
+    Calls function(name, data, *args) for every member in a process pool.
+
+    Yields:
+        tuple[str, object]: member name and result, in archive order
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 and not executor:
+        for name, data in members:
+            yield name, function(name, data, *args)
+        return
+
+    pool = executor or ProcessPoolExecutor(max_workers=workers)
+    try:
+        pending = collections.deque()
+        for name, data in members:
+            pending.append((name, pool.submit(function, name, data, *args)))
+            if len(pending) >= workers * JOBS_PER_WORKER:
+                name, future = pending.popleft()
+                yield name, future.result()
+        while pending:
+            name, future = pending.popleft()
+            yield name, future.result()
+    finally:
+        if not executor:
+            pool.shutdown(cancel_futures=True)
+
+
+class ArchiveWriter:
+    """
+    Writes members into a new zip or tar archive, type is chosen by extension
+    (.zip, .tar, .tar.gz, .tgz, .tar.bz2, .tbz2, .tar.xz, .txz).
+
+    Example:
+
+    with ArchiveWriter("out.zip") as archive:
+        archive.write("name.en.srt", data)
+    """
+    def __init__(self, filename: str):
+        self.filename = filename
+        lower = filename.lower()
+        if lower.endswith(".zip"):
+            self.archive = zipfile.ZipFile(filename, "w", compression=zipfile.ZIP_DEFLATED)
+            return
+        for extension, mode in TAR_WRITE_MODES.items():
+            if lower.endswith(extension):
+                self.archive = tarfile.open(filename, mode)
+                return
+        raise ValueError(f"Unsupported archive {filename}. Expected: '.zip', '{', '.join(TAR_WRITE_MODES)}'")
+
+    def write(self, name: str, data: bytes):
+        if isinstance(self.archive, zipfile.ZipFile):
+            self.archive.writestr(name, data)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            self.archive.addfile(info, io.BytesIO(data))
+
+    def close(self):
+        self.archive.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -1,11 +1,11 @@
 import copy
 
 from collections import defaultdict
-from langcodes import standardize_tag, tag_is_valid
 from ..microTime import MicroTime as MT
 from .styleFormat import cssParser
 from ..styling import Styling
 from .blockType import BlockType
+from .language import standardizeLanguage
 from .text import get_phrases, get_lines_ratio
 
 
@@ -173,9 +173,8 @@ class Block:
         if lines == 1:
             return [text]
 
-        standardized = standardize_tag(kwargs.get("parser_language") or lang, macro=True)
-        standardized = standardized if tag_is_valid(standardized) else "und"
-        
+        standardized = standardizeLanguage(kwargs.get("parser_language") or lang) or "und"
+
         phrases = get_phrases(text, standardized)
 
         split_ratios = get_lines_ratio(lines, length, character_limit, split_ratios, smaller_first_line)
@@ -0,0 +1,285 @@
+import hashlib
+import os
+import tempfile
+import threading
+
+from collections import OrderedDict
+from .serialization import fromBytes, toBytes
+
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+
+def defaultCacheDirectory(name: str = None) -> str:
+    """
+    Returns PYCAPTIONS_CACHE_DIR or pycaptions directory in the user cache directory.
+
+    Parameters:
+    - name (str, optional): Subdirectory, caches with their own size limit must not share a directory (default is None)
+    """
+    if os.environ.get("PYCAPTIONS_CACHE_DIR"):
+        base = os.environ["PYCAPTIONS_CACHE_DIR"]
+    else:
+        base = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+                            "pycaptions")
+    return os.path.join(base, name) if name else base
+
+
+def hashFile(filename: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hashKey(*values) -> str:
+    return hashlib.blake2b("\0".join(str(i) for i in values).encode("UTF-8"), digest_size=16).hexdigest()
+
+
+def contentHash(store, filename: str) -> str:
+    """
+    Returns content hash of the file, hashes are stored by path, size and mtime so unchanged files are not read.
+    """
+    if not store:
+        return hashFile(filename)
+    stat = os.stat(filename)
+    stat_key = "s" + hashKey(os.path.abspath(filename), stat.st_size, stat.st_mtime_ns)
+    content_hash = store.get(stat_key)
+    if content_hash:
+        return content_hash.decode("ascii")
+    content_hash = hashFile(filename)
+    store.set(stat_key, content_hash.encode("ascii"))
+    return content_hash
+
+
+class DiskStore:
+    """
+    Directory of files with size-bounded LRU eviction.
+
+    Reading an entry updates its modification time, the least recently used
+    entries are deleted when the total size exceeds max_size.
+    """
+    def __init__(self, directory: str = None, max_size: int = DEFAULT_MAX_SIZE):
+        self.directory = directory or defaultCacheDirectory()
+        self.max_size = max_size
+        self._size = None
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key: str) -> bytes | None:
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def set(self, key: str, data: bytes):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        if self._size is not None:
+            self._size += len(data) - replaced
+        if self._size is None or self._size > self.max_size:
+            self.evict()
+
+    def evict(self):
+        entries = []
+        total = 0
+        for subdirectory in os.scandir(self.directory):
+            if not subdirectory.is_dir():
+                continue
+            for entry in os.scandir(subdirectory.path):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                total += stat.st_size
+        if total > self.max_size:
+            entries.sort()
+            for _, size, path in entries:
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                if total <= self.max_size:
+                    break
+        self._size = total
+
+    def clear(self):
+        self.max_size, max_size = 0, self.max_size
+        self.evict()
+        self.max_size = max_size
+
+
+class ParseCache:
+    """
+    Content-addressed on-disk cache of parsed captions.
+
+    Files are looked up by path, size and modification time, which point to
+    the content hash of the file. Parsed data is stored by the content hash and
+    read options, so identical files at different paths share an entry.
+
+    Example:
+
+    cache = ParseCache("path/to/cache", max_size=64*1024*1024)
+    with Captions("path/to/file.srt", cache=cache) as captions:
+        captions.saveVTT("file")
+    """
+    VERSION = 2
+
+    def __init__(self, directory: str = None, max_size: int = DEFAULT_MAX_SIZE):
+        self.store = DiskStore(directory or defaultCacheDirectory("parsed"), max_size)
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, filename: str, **params) -> str:
+        """
+        Returns cache key of the file for read parameters (e.g. encoding, languages, media size, style).
+        """
+        from .. import __version__
+
+        return "c" + hashKey(self.VERSION, __version__, contentHash(self.store, filename),
+                             *sorted(params.items()))
+
+    def load(self, captions, key: str) -> bool:
+        data = self.store.get(key)
+        if data is None:
+            self.misses += 1
+            return False
+        media_size = captions.media_width, captions.media_height
+        try:
+            fromBytes(captions, data)
+        except Exception:
+            self.misses += 1
+            return False
+        # keep the media size the captions were created with
+        captions.media_width, captions.media_height = media_size
+        self.hits += 1
+        return True
+
+    def save(self, captions, key: str):
+        self.store.set(key, toBytes(captions))
+
+
+class ConversionCache:
+    """
+    Cache of rendered outputs, keyed by input content hash and output options.
+
+    Recently used outputs are kept in memory, all outputs are stored on disk
+    unless directory is False.
+
+    Example:
+
+    cache = ConversionCache()
+    convert("path/to/file.srt", output_format="vtt", cache=cache)
+    print(cache.stats())
+    """
+    VERSION = 2
+
+    def __init__(self, directory: str | bool = None, max_size: int = DEFAULT_MAX_SIZE, memory_size: int = 128):
+        """
+        Parameters:
+        - directory (str | bool, optional): Cache directory, False keeps outputs only in memory (default is defaultCacheDirectory("converted"))
+        - max_size (int, optional): Maximum size of the cache directory in bytes
+        - memory_size (int, optional): Number of outputs kept in memory
+        """
+        self.store = None if directory is False else DiskStore(directory or defaultCacheDirectory("converted"), max_size)
+        self.memory = OrderedDict()
+        self.memory_size = memory_size
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def key(self, source: str, *args, **kwargs) -> str:
+        """
+        Returns cache key for the source hash and output options.
+        """
+        from .. import __version__
+
+        return "o" + hashKey(self.VERSION, __version__, source, *args, *sorted(kwargs.items()))
+
+    def captionsHash(self, captions) -> str:
+        """
+        Returns hash of the current captions data.
+        """
+        return hashlib.blake2b(toBytes(captions), digest_size=16).hexdigest()
+
+    def fileHash(self, filename: str) -> str:
+        return contentHash(self.store, filename)
+
+    def get(self, key: str, count_miss: bool = True) -> tuple[str, bytes] | None:
+        """
+        Returns default language of the captions and rendered output.
+        """
+        with self._lock:
+            entry = self.memory.get(key)
+            if entry:
+                self.memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry
+        data = self.store.get(key) if self.store else None
+        if data is None:
+            if count_miss:
+                with self._lock:
+                    self.misses += 1
+            return None
+        language, separator, output = data.partition(b"\n")
+        if not separator:
+            if count_miss:
+                with self._lock:
+                    self.misses += 1
+            return None
+        entry = (language.decode("UTF-8"), output)
+        with self._lock:
+            self.disk_hits += 1
+            self._remember(key, entry)
+        return entry
+
+    def set(self, key: str, default_language: str, data: bytes):
+        entry = (default_language, data)
+        with self._lock:
+            self._remember(key, entry)
+        if self.store:
+            # default language line followed by the raw output
+            self.store.set(key, default_language.encode("UTF-8") + b"\n" + data)
+
+    def _remember(self, key: str, entry: tuple[str, bytes]):
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def stats(self) -> dict:
+        """
+        Returns number of hits and misses and the hit rate.
+        """
+        hits = self.memory_hits + self.disk_hits
+        total = hits + self.misses
+        return {
+            "hits": hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": hits / total if total else 0.0
+        }
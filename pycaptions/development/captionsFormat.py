@@ -3,14 +3,22 @@ import io
 import os
 import copy
 
-from langcodes import standardize_tag, tag_is_valid
+from collections import Counter
+
 from charset_normalizer import detect as detect_encoding
 from .block import Block, BlockType
+from .cache import ParseCache
+from .compression import openFile, splitCompression
+from .jsonStream import JsonStreamReader
+from .serialization import dumpJson, loadChunk, loadJsonHeader
+from .language import isLanguage, standardizeLanguage
+from .stats import count, stage
+from .timing import findOverlaps, mergeMany, mergeTracks, normalizeTiming, retime, sortBlocks
 from ..microTime import MicroTime as MT
-from ..options import FileExtensions, save_extensions
+from ..options import FileExtensions, Settings, currentSettings
 
 
-JSON_VERSION = 1
+JSON_VERSION = 2
 
 
 class CaptionsFormat:
@@ -19,8 +27,10 @@ class CaptionsFormat:
 
     Attributes:
         extensions (FileExtensions): An instance of the FileExtensions class for managing file extensions.
+        settings (Settings): Reader and writer settings of this instance, None uses the current context settings.
 
     Methods:
+        getSettings: Returns settings used by readers and writers.
         setDefaultLanguage: Set the default language for captions.
         insert: Insert a block at the specified index.
         detect: Detect the format of the captions file.
@@ -33,13 +43,14 @@ class CaptionsFormat:
         shift_start: Shift the start time of all blocks by the specified duration.
         shift_end: Shift the end time of all blocks by the specified duration.
         fromJson: Load captions format from a JSON file.
+        iterJson: Yield blocks of a JSON file one chunk at a time.
         toJson: Save captions format to a JSON file.
         join: Joins another CaptionsFormat class data.
         joinFile: Joins CaptionsFormat data from file.
         __getitem__: Retrieve the block at the specified index.
         __setitem__: Set the block at the specified index.
         __str__: Return a string representation of the captions format.
-        __iadd__: In-place addition for concatenating blocks.
+        __iadd__: In-place addition for merging languages of captions by time, see merge.
         __isub__: In-place subtraction for removing blocks in a specific language.
         __iter__: Iterator for iterating through blocks.
         __len__: Return the number of blocks in the captions format.
@@ -50,7 +61,8 @@ class CaptionsFormat:
     def __init__(self, file_name_or_content: str = None, default_language: str = "und",
                  time_length: MT = None, file_extensions: FileExtensions = None,
                  media_height: int = None, media_width: int = None, isFile: bool = True,
-                 legacyJson: bool = False, **options):
+                 legacyJson: bool = False, settings: Settings = None,
+                 cache: ParseCache | str | bool = None, **options):
         """
         Initialize a new instance of CaptionsFormat class.
 
@@ -58,6 +70,9 @@ class CaptionsFormat:
         - file_name_or_content (str, optional): The name of the file or file content/string associated with the captions, used for "with" keyword (default is None).
         - isFile (str, bool): Defines if file_name_or_content parameter is file name, used for "with" keyword (default is True).
         - default_language (str, optional): The default language for captions (default is "und" for undefined).
+        - settings (Settings, optional): Reader and writer settings, safe to use from multiple threads (default is current context settings).
+        - cache (ParseCache | str | bool, optional): Cache parsed files on disk, True uses the default cache directory, str is a cache directory (default is None).
+        - mmap (bool, optional): Memory-map the file and parse it as bytes, supported by Captions for SRT and VTT (default is False).
         - **options: Additional keyword arguments for customization (e.g. metadata, style, ...).
         """
         self.json_version = options.get("json_version") or JSON_VERSION
@@ -86,7 +101,24 @@ class CaptionsFormat:
             self.options["style_metadata"]["style_id_counter"] = 0
         self._block_list: list[Block] = []
         self.setDefaultLanguage(default_language)
-        self.extensions = file_extensions or save_extensions
+        self.settings = settings
+        self.extensions = file_extensions
+        if cache is True:
+            cache = ParseCache()
+        elif isinstance(cache, str):
+            cache = ParseCache(cache)
+        self.cache = cache or None
+
+    @property
+    def extensions(self) -> FileExtensions:
+        """
+        File extensions of this instance, if not set it uses extensions from settings.
+        """
+        return self._extensions or self.getSettings().extensions
+
+    @extensions.setter
+    def extensions(self, value: FileExtensions):
+        self._extensions = value
 
     def __getitem__(self, index: int):
         return self._block_list[index]
@@ -100,11 +132,7 @@ class CaptionsFormat:
     def __iadd__(self, value):
         if not isinstance(value, CaptionsFormat):
             raise ValueError("Unsupported type. Must be an instance of `CaptionsFormat`")
-        for i, value in enumerate(value):
-            if i < len(self._block_list):
-                self._block_list[i] += value
-            else:
-                self.append(value)
+        self.merge(value)
         return self
 
     def __isub__(self, language: str):
@@ -121,21 +149,33 @@ class CaptionsFormat:
     def __enter__(self):
         encoding = self.options.get("encoding") or "UTF-8"
         if self.isFile:
-            _, ext = os.path.splitext(self.file_name_or_content)
+            _, ext = os.path.splitext(splitCompression(self.file_name_or_content)[0])
             if ext == ".json":
                 if self.legacyJson:
                     self.fromLegacyJson(self.file_name_or_content, encoding=encoding)
                 else:
                     self.fromJson(self.file_name_or_content, encoding=encoding)
             else:
+                if self.cache:
+                    cache_key = self.cache.key(self.file_name_or_content, reader=type(self).__name__,
+                                               encoding=encoding, default_language=self.default_language,
+                                               languages=self.getLanguagesFromFilename(self.file_name_or_content),
+                                               media_width=self.media_width, media_height=self.media_height,
+                                               style=self.getSettings().style)
+                    if self.cache.load(self, cache_key):
+                        return self
                 if encoding == "auto":
                     encoding = self.getEncoding(self.file_name_or_content)
-                with open(self.file_name_or_content, "r", encoding=encoding) as stream:
-                    if self.detect(stream):
-                        languages = self.getLanguagesFromFilename(self.file_name_or_content)
-                        if languages and self.default_language == "und":
-                            self.setDefaultLanguage(languages[0])
-                        self.read(stream, languages)
+                count("bytes_in", os.path.getsize(self.file_name_or_content))
+                if not self.options.get("mmap") or not self.readMapped(self.file_name_or_content, encoding=encoding):
+                    with openFile(self.file_name_or_content, "r", encoding=encoding) as stream:
+                        if self.detect(stream):
+                            languages = self.getLanguagesFromFilename(self.file_name_or_content)
+                            if languages and self.default_language == "und":
+                                self.setDefaultLanguage(languages[0])
+                            self.read(stream, languages)
+                if self.cache and len(self):
+                    self.cache.save(self, cache_key)
         else:
             if self.detect(self.file_name_or_content):
                 self.read(self.file_name_or_content)
@@ -149,7 +189,84 @@ class CaptionsFormat:
 
     def sort(self):
         self.removeComments()
-        self.sort(key=lambda x: x.start_time)
+        self._block_list.sort(key=lambda x: x.start_time.toTime() if x.start_time is not None else 0)
+
+    def findOverlaps(self) -> list[tuple[int, int]]:
+        """
+        Returns pairs of indices of overlapping captions, see timing.findOverlaps.
+        """
+        return findOverlaps(self._block_list)
+
+    def normalizeTiming(self, policy: str = "trim", min_gap: MT = None, min_duration: MT = None,
+                        max_duration: MT = None) -> Counter:
+        """
+        Sort captions and resolve overlaps in one O(n log n) sweep, time_length is updated.
+
+        Parameters:
+        - policy (str, optional): "trim", "merge", "stack" or "keep", see timing.OVERLAP_POLICIES (default is "trim")
+        - min_gap (MicroTime, optional): Minimum gap between captions
+        - min_duration (MicroTime, optional): Minimum duration of captions
+        - max_duration (MicroTime, optional): Maximum duration of captions
+
+        Returns:
+            Counter: number of overlaps, trimmed, moved, merged, extended, shortened and inverted captions
+        """
+        self._block_list, counters = normalizeTiming(
+            self._block_list, policy, min_gap.toTime() if min_gap else 0, min_duration.toTime() if min_duration else 0,
+            max_duration.toTime() if max_duration else None)
+        self.time_length = max((i.end_time for i in self._block_list
+                                if i.block_type == BlockType.CAPTION and i.end_time is not None),
+                               key=lambda i: i.toTime(), default=MT())
+        return counters
+
+    def merge(self, other, tolerance: MT = None, mode: str = "nearest") -> Counter:
+        """
+        Merge languages of other captions by time, cues are paired even if the tracks are segmented differently.
+
+        Parameters:
+        - other (CaptionsFormat): Captions to merge
+        - tolerance (MicroTime, optional): Pair cues that are closer than this, in "split" mode align boundaries
+          closer than this (default is 0)
+        - mode (str, optional): "nearest" keeps timing of these captions, "split" splits captions where
+          the other track changes, see timing.MERGE_MODES (default is "nearest")
+
+        Returns:
+            Counter: number of paired, combined, shared, unmatched and split captions
+        """
+        counters = Counter()
+        self._block_list = mergeTracks(self._block_list, list(other), tolerance.toTime() if tolerance else 0,
+                                       mode, counters)
+        if other.time_length and other.time_length > self.time_length:
+            self.time_length = other.time_length
+        return counters
+
+    def retime(self, anchors: list[tuple[MT, MT]] = None, scale: float = 1.0, offset: MT = None,
+               min_duration: MT = None) -> Counter:
+        """
+        Map all start and end times with a piecewise-linear function, unlike shift_time it corrects drift.
+
+        Example:
+
+        captions.retime(scale=25 / 23.976)  # PAL speed-up
+        captions.retime([(MT(minutes=1), MT(minutes=1, seconds=2)), (MT(hours=1), MT(hours=1, seconds=5))])
+
+        Parameters:
+        - anchors (list[tuple[MicroTime, MicroTime]], optional): Pairs of source and target time (sync points),
+          see timing.timeMap
+        - scale (float, optional): Time scale used with less than two anchors (default is 1.0)
+        - offset (MicroTime, optional): Added to all times (default is 0)
+        - min_duration (MicroTime, optional): Duration of captions that would end before they start (default is 0)
+
+        Returns:
+            Counter: number of retimed, clamped and inverted captions
+        """
+        anchors = [(source.toTime(), target.toTime()) for source, target in anchors or []]
+        self._block_list, counters = retime(self._block_list, anchors, scale, offset.toTime() if offset else 0,
+                                            min_duration.toTime() if min_duration else 0)
+        self.time_length = max((i.end_time for i in self._block_list
+                                if i.block_type == BlockType.CAPTION and i.end_time is not None),
+                               key=lambda i: i.toTime(), default=MT())
+        return counters
 
     def removeOptionsComments(self):
         index = 0
@@ -160,12 +277,7 @@ class CaptionsFormat:
                 index += 1
 
     def removeComments(self):
-        index = 0
-        while index < len(self):
-            if self[index].block_type == BlockType.COMMENT:
-                del self[index]
-            else:
-                index += 1
+        self._block_list = [i for i in self._block_list if i.block_type != BlockType.COMMENT]
 
     def removeAllComments(self):
         self.removeComments()
@@ -239,9 +351,11 @@ class CaptionsFormat:
             return self.options["blocks"][self.options["metadata"][id]]
         return None
 
+    def getSettings(self) -> Settings:
+        return self.settings or currentSettings()
+
     def setDefaultLanguage(self, language: str):
-        standardized = standardize_tag(language, macro=True)
-        self.default_language = standardized if tag_is_valid(standardized) else "und"
+        self.default_language = standardizeLanguage(language) or "und"
 
     def insert(self, index: int, value: Block):
         self._block_list.insert(index, value)
@@ -252,6 +366,9 @@ class CaptionsFormat:
     def read(self, content: str | io.IOBase, languages: list[str] = None, **kwargs):
         raise ValueError("Not implemented")
 
+    def readMapped(self, filename: str, languages: list[str] = None, encoding: str = "UTF-8", **kwargs) -> bool:
+        return False
+
     def save(self, filename: str, languages: list[str] = None, **kwargs):
         raise ValueError("Not implemented")
 
@@ -271,34 +388,20 @@ class CaptionsFormat:
     def getFilename(filename: str, directory: str = None):
         if not directory:
             directory = os.path.dirname(filename)
-        filename, _ = os.path.splitext(os.path.basename(filename))
+        filename, _ = os.path.splitext(os.path.basename(splitCompression(filename)[0]))
         filename = filename.split(".")
         if len(filename) > 1:
-            clean_filename = []
-            for i in filename:
-                try:
-                    if tag_is_valid(standardize_tag(i, macro=True)):
-                        continue
-                    else:
-                        clean_filename.append(i)
-                except Exception:
-                    clean_filename.append(i)
+            clean_filename = [i for i in filename if not isLanguage(i)]
             if clean_filename:
                 return os.path.join(directory, ".".join(clean_filename))
         return os.path.join(directory, ".".join(filename))
 
     @staticmethod
     def getLanguagesFromFilename(filename: str):
-        filename, _ = os.path.splitext(os.path.basename(filename))
+        filename, _ = os.path.splitext(os.path.basename(splitCompression(filename)[0]))
         filename = filename.split(".")
         if len(filename) > 1:
-            languages = []
-            for i in filename:
-                try:
-                    if tag_is_valid(standardize_tag(i, macro=True)):
-                        languages.append(i)
-                except Exception:
-                    continue
+            languages = [i for i in filename if isLanguage(i)]
             if not languages:
                 return None
         else:
@@ -309,16 +412,15 @@ class CaptionsFormat:
     def getLanguagesAndFilename(filename: str, directory: str = None):
         if not directory:
             directory = os.path.dirname(filename)
-        filename, _ = os.path.splitext(os.path.basename(filename))
+        filename, _ = os.path.splitext(os.path.basename(splitCompression(filename)[0]))
         filename = filename.split(".")
         if len(filename) > 1:
             languages = []
             clean_filename = []
             for i in filename:
-                try:
-                    if tag_is_valid(standardize_tag(i, macro=True)):
-                        languages.append(i)
-                except Exception:
+                if isLanguage(i):
+                    languages.append(i)
+                else:
                     clean_filename.append(i)
             if not languages:
                 languages = None
@@ -347,15 +449,22 @@ class CaptionsFormat:
                 i.shift_time(time)
 
     def _loadJson(self, data, **kwargs):
-        self.time_length = data["time_length"]
+        self.time_length = MT(**data["time_length"]) if isinstance(data["time_length"], dict) else data["time_length"]
         self.default_language = data["default_language"]
         self.filename = data["filename"]
         self.media_height = data.get("media_height") or 1080
         self.media_width = data.get("media_width") or 1920
-        for key, value in data[kwargs.get("file_extensions") or "file_extensions"].items():
-            setattr(save_extensions, key, value)
+        self.extensions = FileExtensions(**data[kwargs.get("file_extensions") or "file_extensions"])
         self.options = data["options"]
-        self._block_list = [Block(**caption) for caption in data["block_list"]]
+        self.options["blocks"] = [Block(**self._loadJsonV1Block(block)) for block in self.options.get("blocks", [])]
+        self._block_list = [Block(**self._loadJsonV1Block(caption)) for caption in data["block_list"]]
+
+    @staticmethod
+    def _loadJsonV1Block(block: dict) -> dict:
+        for key in ("start_time", "end_time"):
+            if isinstance(block.get(key), dict):
+                block[key] = MT(**block[key])
+        return block
 
     def fromLegacyJson(self, file: str, **kwargs):
         encoding = kwargs.get("encoding") or "UTF-8"
@@ -365,7 +474,7 @@ class CaptionsFormat:
         if not ext:
             file += ".json"
         try:
-            with open(file, "r", encoding=encoding) as f:
+            with openFile(file, "r", encoding=encoding) as f:
                 data = json.load(f)
             self._loadJson(data, file_extensions="extensions")
         except IOError as e:
@@ -373,31 +482,82 @@ class CaptionsFormat:
         except Exception as e:
             print(f"Error {e}")
 
-    def fromJson(self, file: str, **kwargs):
+    def fromJson(self, file: str, start_time: MT = None, end_time: MT = None, **kwargs):
+        """
+        Load captions format from a JSON file.
+
+        JSON v2 files are read incrementally, one block_list chunk at a time.
+
+        Parameters:
+        - file (str): JSON file name
+        - start_time (MicroTime, optional): Load only blocks ending after start_time (default is None)
+        - end_time (MicroTime, optional): Load only blocks starting before end_time (default is None)
+
+        kwargs:
+         - encoding (str, optional): File encoding (default is "UTF-8")
+        """
+        try:
+            self._block_list = list(self.iterJson(file, start_time, end_time, **kwargs))
+        except IOError as e:
+            print(f"I/O error({e.errno}): {e.strerror}")
+        except Exception as e:
+            print(f"Error {e}")
+
+    def iterJson(self, file: str, start_time: MT = None, end_time: MT = None, **kwargs):
+        """
+        Load header fields of a JSON file and yield its blocks without keeping them in memory.
+
+        Untimed blocks are always yielded, timed blocks only if they overlap [start_time, end_time).
+        JSON v1 files are loaded whole and then yielded.
+
+        Parameters:
+        - file (str): JSON file name
+        - start_time (MicroTime, optional): Yield only blocks ending after start_time (default is None)
+        - end_time (MicroTime, optional): Yield only blocks starting before end_time (default is None)
+
+        kwargs:
+         - encoding (str, optional): File encoding (default is "UTF-8")
+        """
         encoding = kwargs.get("encoding") or "UTF-8"
         if encoding == "auto":
             encoding = self.getEncoding(file)
         _, ext = os.path.splitext(file)
         if not ext:
             file += ".json"
-        try:
-            with open(file, "r", encoding=encoding) as f:
-                data = json.load(f)
-                if not data.get("identifier") or not data["identifier"] == "pycaptions":
-                    raise ValueError("Incorect json format: File data does not contain 'identifier' with value of 'pycaptions'" +
-                                     "\nIf you have saves before 0.5.1 run your arguments with 'fromLegacyJson' function.")
-                compatibility = dict()
-                version = data.get("json_version")
-                if not version == JSON_VERSION:
-                    pass
-                self._loadJson(data, **compatibility)
-        except IOError as e:
-            print(f"I/O error({e.errno}): {e.strerror}")
-        except Exception as e:
-            print(f"Error {e}")
+        start = start_time.toTime() if start_time is not None else None
+        end = end_time.toTime() if end_time is not None else None
+        with openFile(file, "r", encoding=encoding) as f:
+            reader = JsonStreamReader(f)
+            header = reader.header()
+            if not header.get("identifier") or not header["identifier"] == "pycaptions":
+                raise ValueError("Incorect json format: File data does not contain 'identifier' with value of 'pycaptions'" +
+                                 "\nIf you have saves before 0.5.1 run your arguments with 'fromLegacyJson' function.")
+            if header.get("json_version") == JSON_VERSION:
+                loadJsonHeader(self, header)
+                for chunk in reader.chunks():
+                    yield from loadChunk(chunk, start, end)
+                return
+            f.seek(0)
+            self._loadJson(json.load(f))
+        blocks, self._block_list = self._block_list, []
+        for block in blocks:
+            if (block.start_time is None or block.end_time is None or
+                    ((start is None or block.end_time.toTime() > start) and
+                     (end is None or block.start_time.toTime() < end))):
+                yield block
 
     def toJson(self, file: str, **kwargs):
+        """
+        Save captions format to a JSON file.
+
+        kwargs:
+         - encoding (str, optional): File encoding (default is "UTF-8")
+         - json_version (int, optional): 1 saves in the legacy format (default is JSON_VERSION)
+         - compression (str, optional): Compress the file, "gz", "bz2", "xz" or "lzma" (default is from file extension)
+         - save_as (str, optional): Instead of saving returns "string", "dict" or "caption_array"
+        """
         encoding = kwargs.get("encoding") or "UTF-8"
+        json_version = kwargs.get("json_version") or self.json_version
 
         def serializer(obj):
             if hasattr(obj, '__json__'):
@@ -409,20 +569,25 @@ class CaptionsFormat:
             if self.isFile:
                 filename = self.file_name_or_content
 
-            data = {
-                    "identifier": "pycaptions",
-                    "json_version": self.json_version,
-                    "default_language": self.default_language,
-                    "time_length": self.time_length,
-                    "filename": filename,
-                    "media_height": self.media_height,
-                    "media_width": self.media_width,
-                    "file_extensions": vars(self.extensions),
-                    "options": self.options,
-                    "block_list": self._block_list
-                           }
+            if json_version == JSON_VERSION:
+                data = dumpJson(self, filename)
+            else:
+                data = {
+                        "identifier": "pycaptions",
+                        "json_version": json_version,
+                        "default_language": self.default_language,
+                        "time_length": self.time_length,
+                        "filename": filename,
+                        "media_height": self.media_height,
+                        "media_width": self.media_width,
+                        "file_extensions": vars(self.extensions),
+                        "options": self.options,
+                        "block_list": self._block_list
+                               }
             if kwargs.get("save_as"):
                 if kwargs.get("save_as") == "string":
+                    if json_version == JSON_VERSION:
+                        return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
                     return json.dumps(data, default=serializer)
                 elif kwargs.get("save_as") == "dict":
                     return copy.deepcopy(data)
@@ -433,10 +598,18 @@ class CaptionsFormat:
                     raise ValueError(f"Invalid save_as value, got {kwargs.get('save_as')}" +
                                      ", expected string, dict, caption_array")
             else:
+                file, compression = splitCompression(file)
                 if not file.endswith(".json"):
                     file += ".json"
-                with open(file, "w", encoding=encoding) as f:
-                    json.dump(data, f, default=serializer)
+                compression = kwargs.get("compression", compression)
+                if compression and not compression.startswith("."):
+                    compression = "." + compression
+                file += compression or ""
+                with openFile(file, "w", encoding=encoding, compression=compression or "") as f:
+                    if json_version == JSON_VERSION:
+                        json.dump(data, f, separators=(",", ":"), ensure_ascii=False)
+                    else:
+                        json.dump(data, f, default=serializer)
         except IOError as e:
             print(f"I/O error({e.errno}): {e.strerror}")
         except Exception as e:
@@ -462,10 +635,40 @@ class CaptionsFormat:
         time_offset = time or MT()
         if add_end_time:
             time_offset += self.time_length
+        self.merge_many([captionsFormat], offsets=[time_offset])
+
+    def merge_many(self, tracks, mode: str = "concat", offsets: list[MT] = None) -> Counter:
+        """
+        Join many tracks in one pass, e.g. segments of a live stream, see timing.mergeMany.
 
-        for caption in captionsFormat:
-            self.append(caption.copy())
-            self[-1].shift_end_us(time_offset)
+        Tracks are consumed one by one in "concat" mode, so they can be generators or entered CaptionsStream.
+
+        Parameters:
+        - tracks (iterable): CaptionsFormat instances or other iterables of blocks sorted by start time
+        - mode (str, optional): "concat" appends tracks after each other, "interleave" merges them
+          by start time with these captions, see timing.JOIN_MODES (default is "concat")
+        - offsets (list[MicroTime], optional): Time offset of each track, in "concat" mode every track
+          starts at the end of the previous one if not set (default is None)
+
+        Returns:
+            Counter: number of joined tracks
+        """
+        counters = Counter()
+        offsets = [i.toTime() for i in offsets] if offsets is not None else None
+        first = len(self._block_list)
+        if mode == "interleave":
+            first = 0
+            tracks = [sortBlocks(self._block_list), *tracks]
+            if offsets is not None:
+                offsets = [0, *offsets]
+            self._block_list = list(mergeMany(tracks, offsets, mode, counters=counters))
+            counters["tracks"] -= 1
+        else:
+            self._block_list.extend(mergeMany(tracks, offsets, mode, self.time_length.toTime(), counters))
+        for block in self._block_list[first:]:
+            if block.block_type == BlockType.CAPTION and block.end_time and block.end_time > self.time_length:
+                self.time_length = block.end_time
+        return counters
 
     def joinFile(self, filename: str, add_end_time: bool = False, time: MT = None, **kwargs):
         """
@@ -481,16 +684,9 @@ class CaptionsFormat:
             hours (int, optional): Time offset by hours.
             **kwargs: Additional options for customization (e.g. file encoding).
         """
-        encoding = kwargs.get("encoding") or "UTF-8"
-
-        time_offset = time or MT()
-        if add_end_time:
-            time_offset += self.time_length
-
-        with open(filename, "r", encoding=encoding) as stream:
-            if self.detect(stream):
-                self.read(stream, self.getLanguagesFromFilename(filename), time_offset=time_offset)
+        with type(self)(filename, self.default_language, settings=self.settings, **kwargs) as captions:
+            self.join(captions, add_end_time, time)
 
     def getEncoding(self, file: str):
-        with open(file, "rb") as f:
+        with stage("encoding"), openFile(file, "rb") as f:
             return detect_encoding(f.read()).get("encoding")
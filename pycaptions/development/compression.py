@@ -0,0 +1,71 @@
+import bz2
+import gzip
+import io
+import lzma
+import os
+
+
+COMPRESSIONS = {
+    ".gz": gzip,
+    ".bz2": bz2,
+    ".xz": lzma,
+    ".lzma": lzma
+}
+
+MAGIC_BYTES = {
+    b"\x1f\x8b": ".gz",
+    b"BZh": ".bz2",
+    b"\xfd7zXZ\x00": ".xz"
+}
+
+
+def splitCompression(filename: str) -> tuple[str, str | None]:
+    """
+    Returns filename without compression extension and the compression extension (e.g. ".gz") or None.
+    """
+    base, ext = os.path.splitext(filename)
+    if ext.lower() in COMPRESSIONS:
+        return base, ext.lower()
+    return filename, None
+
+
+def detectCompression(filename: str, mode: str = "r") -> str | None:
+    """
+    Returns compression extension of the file, detected by extension or, when reading, by magic bytes.
+    """
+    _, compression = splitCompression(filename)
+    if compression or "r" not in mode:
+        return compression
+    try:
+        with open(filename, "rb") as f:
+            head = f.read(6)
+    except OSError:
+        return None
+    for magic, compression in MAGIC_BYTES.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def openFile(filename: str, mode: str = "r", encoding: str = "UTF-8", compression: str = None) -> io.IOBase:
+    """
+    Opens plain or compressed (gzip, bz2, lzma) file, data is (de)compressed while streaming.
+
+    Parameters:
+    - filename (str): File name
+    - mode (str, optional): "r", "w", "a", "rb", "wb", "ab" (default is "r")
+    - encoding (str, optional): Encoding used in text mode (default is "UTF-8")
+    - compression (str, optional): Compression extension (".gz", ".bz2", ".xz", ".lzma"),
+      "" disables compression (default is detected from filename and magic bytes)
+    """
+    if compression is None:
+        compression = detectCompression(filename, mode)
+    elif compression and not compression.startswith("."):
+        compression = "." + compression
+    binary = "b" in mode
+    if compression:
+        if compression.lower() not in COMPRESSIONS:
+            raise ValueError(f"Unsupported compression {compression}. Expected: '{', '.join(COMPRESSIONS)}'")
+        mode = mode if binary else mode + "t"
+        return COMPRESSIONS[compression.lower()].open(filename, mode, encoding=None if binary else encoding)
+    return open(filename, mode, encoding=None if binary else encoding)
@@ -0,0 +1,192 @@
+import bisect
+import mmap
+import os
+import re
+import struct
+
+from array import array
+
+
+TIMING_LINE = re.compile(rb"[ \t]*(?:(\d+):)?(\d{2}):(\d{2})[.,](\d{3})[ \t]+-->[ \t]+(?:(\d+):)?(\d{2}):(\d{2})[.,](\d{3})")
+"""
+SRT and VTT cue timing line, on bytes, matched at the start of a line.
+"""
+
+INDEX_EXTENSION = ".pcidx"
+INDEX_MAGIC = b"PCIX"
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct("<4sIqqq")
+"""
+magic, version, indexed file size, indexed file mtime (ns), number of cues
+"""
+INDEX_COLUMNS = 5
+"""
+Cue byte offset, start, end, prefix maximum of end and suffix minimum of start (microseconds).
+"""
+
+
+def _microseconds(hours: bytes | None, minutes: bytes, seconds: bytes, milliseconds: bytes) -> int:
+    return ((int(hours or 0)*60 + int(minutes))*60 + int(seconds))*1_000_000 + int(milliseconds)*1_000
+
+
+def scanCues(data: bytes | mmap.mmap, start: int = 0, end: int = None):
+    """
+    Scans raw SRT or VTT bytes for cues.
+
+    Yields:
+        tuple[int, int, int, int, int]: cue offset (including id line), timing line offset,
+        end offset of the end timestamp, start and end time in microseconds
+    """
+    end = len(data) if end is None else end
+    previous = start
+    position = data.find(b"-->", start, end)
+    while position != -1:
+        line_start = max(data.rfind(b"\n", start, position) + 1, start)
+        line_end = data.find(b"\n", position, end)
+        line_end = end if line_end == -1 else line_end
+        match = TIMING_LINE.match(data, line_start, line_end)
+        if match:
+            offset = line_start
+            if line_start > previous:
+                id_start = max(data.rfind(b"\n", previous, line_start - 1) + 1, previous)
+                if data[id_start:line_start].strip():
+                    offset = id_start
+            yield (offset, line_start, match.end(), _microseconds(*match.group(1, 2, 3, 4)),
+                   _microseconds(*match.group(5, 6, 7, 8)))
+            previous = match.end()
+        position = data.find(b"-->", line_end, end)
+
+
+def decodeCues(data: bytes | mmap.mmap, encoding: str = "UTF-8", start: int = 0, end: int = None):
+    """
+    Splits raw SRT or VTT bytes into cues, only id, settings and text slices are decoded.
+
+    Yields:
+        tuple[str, str, int, int, str]: id line, timing settings (text after the end timestamp),
+        start and end time in microseconds and text (everything until the next cue)
+    """
+    end = len(data) if end is None else end
+    with memoryview(data) as view:
+        cue = None
+        for offset, line_start, timing_end, start_time, end_time in scanCues(data, start, end):
+            if cue:
+                yield cue[0], cue[1], cue[2], cue[3], str(view[cue[4]:offset], encoding)
+            line_end = data.find(b"\n", timing_end, end)
+            line_end = end if line_end == -1 else line_end
+            cue = (str(view[offset:line_start], encoding).strip() if offset < line_start else "",
+                   str(view[timing_end:line_end], encoding).strip() if timing_end < line_end else "",
+                   start_time, end_time, min(line_end + 1, end))
+        if cue:
+            yield cue[0], cue[1], cue[2], cue[3], str(view[cue[4]:end], encoding)
+
+
+def indexPath(filename: str) -> str:
+    return filename + INDEX_EXTENSION
+
+
+class CueIndex:
+    """
+    Byte offset and time of every cue in a SRT or VTT file.
+
+    The index is stored in a sidecar file next to the captions file and is
+    valid while the size and modification time of the captions file match.
+    Columns are kept as int64 arrays (or memoryviews of the mapped sidecar),
+    so lookups are binary searches.
+
+    Example:
+
+    index = CueIndex.open("path/to/file.srt")
+    first, last = index.find(start_us, end_us)
+    """
+    def __init__(self, size: int, mtime: int, offsets, starts, ends, max_ends, min_starts):
+        self.size = size
+        self.mtime = mtime
+        self.offsets = offsets
+        self.starts = starts
+        self.ends = ends
+        self.max_ends = max_ends
+        self.min_starts = min_starts
+
+    def __len__(self):
+        return len(self.offsets)
+
+    @classmethod
+    def build(cls, filename: str) -> "CueIndex":
+        """
+        Scans the file and returns its index.
+        """
+        stat = os.stat(filename)
+        offsets, starts, ends = array("q"), array("q"), array("q")
+        if stat.st_size:
+            with open(filename, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                for offset, _, _, start, end in scanCues(data):
+                    offsets.append(offset)
+                    starts.append(start)
+                    ends.append(end)
+        max_ends = array("q", ends)
+        for i in range(1, len(max_ends)):
+            if max_ends[i] < max_ends[i-1]:
+                max_ends[i] = max_ends[i-1]
+        min_starts = array("q", starts)
+        for i in range(len(min_starts)-2, -1, -1):
+            if min_starts[i] > min_starts[i+1]:
+                min_starts[i] = min_starts[i+1]
+        return cls(stat.st_size, stat.st_mtime_ns, offsets, starts, ends, max_ends, min_starts)
+
+    @classmethod
+    def load(cls, filename: str, index_filename: str = None) -> "CueIndex | None":
+        """
+        Returns index from the sidecar file, None if it is missing or outdated.
+        """
+        index_filename = index_filename or indexPath(filename)
+        try:
+            stat = os.stat(filename)
+            with open(index_filename, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if len(data) < INDEX_HEADER.size:
+            return None
+        magic, version, size, mtime, count = INDEX_HEADER.unpack_from(data)
+        if (magic != INDEX_MAGIC or version != INDEX_VERSION or size != stat.st_size
+                or mtime != stat.st_mtime_ns or len(data) != INDEX_HEADER.size + count*INDEX_COLUMNS*8):
+            return None
+        columns = memoryview(data)[INDEX_HEADER.size:].cast("q")
+        return cls(size, mtime, *(columns[i*count:(i+1)*count] for i in range(INDEX_COLUMNS)))
+
+    def save(self, index_filename: str):
+        with open(index_filename, "wb") as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, self.size, self.mtime, len(self)))
+            for column in (self.offsets, self.starts, self.ends, self.max_ends, self.min_starts):
+                f.write(column if isinstance(column, array) else column.tobytes())
+
+    @classmethod
+    def open(cls, filename: str, index_filename: str = None) -> "CueIndex":
+        """
+        Returns index from the sidecar file, the index is built and saved if the sidecar is missing or outdated.
+        """
+        index_filename = index_filename or indexPath(filename)
+        index = cls.load(filename, index_filename)
+        if index is None:
+            index = cls.build(filename)
+            try:
+                index.save(index_filename)
+            except OSError as e:
+                print(f"I/O error({e.errno}): {e.strerror}")
+        return index
+
+    def find(self, start: int = None, end: int = None) -> tuple[int, int]:
+        """
+        Returns range of cue positions [first, last) that contains all cues overlapping [start, end) microseconds.
+        """
+        first = 0 if start is None else bisect.bisect_right(self.max_ends, start)
+        last = len(self) if end is None else bisect.bisect_left(self.min_starts, end)
+        return first, max(first, last)
+
+    def byteRange(self, first: int, last: int, file_size: int = None) -> tuple[int, int]:
+        """
+        Returns byte range of cues [first, last).
+        """
+        if first >= len(self):
+            return file_size or self.size, file_size or self.size
+        return self.offsets[first], self.offsets[last] if last < len(self) else (file_size or self.size)
@@ -0,0 +1,236 @@
+import hashlib
+
+from collections import defaultdict
+from .block import Block
+from .blockType import BlockType
+from .timing import _times, sortBlocks
+from ..microTime import MicroTime as MT
+
+
+PATCH_VERSION = 1
+"""
+Patch format:
+
+{"version": 1, "base": digest of the old captions, "cues": number of old captions, "ops": [...]}
+
+Old captions are referenced by index in start time order, operations:
+ - ["-", index]: delete
+ - ["+", start, end, {language: text}]: insert
+ - ["t", index, start, end]: retime
+ - ["x", index, {language: text}]: replace text, a cue can be both retimed and re-texted
+"""
+
+
+def textHash(block: Block) -> bytes:
+    """
+    Returns hash of text in all languages of the block.
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    for language, text in sorted(block.languages.items()):
+        digest.update(f"{language}\0{text}\0".encode("UTF-8", errors="replace"))
+    return digest.digest()
+
+
+def _cues(blocks) -> list[tuple[int, int, bytes, Block]]:
+    return [(*_times(block), textHash(block), block) for block in sortBlocks(blocks)
+            if block.block_type == BlockType.CAPTION]
+
+
+def baseDigest(cues: list[tuple[int, int, bytes, Block]]) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for start, end, text_hash, _ in cues:
+        digest.update(f"{start},{end},".encode("ascii"))
+        digest.update(text_hash)
+    return digest.hexdigest()
+
+
+class CaptionsDiff:
+    """
+    Differences between an old and a new captions track, see diffBlocks.
+
+    Attributes:
+    - inserted (list[Block]): Captions only in the new track
+    - deleted (list[tuple[int, Block]]): Index in the old track (in start time order) and caption
+    - retimed (list[tuple[int, Block, Block]]): Index, old and new caption with the same text and different time
+    - retexted (list[tuple[int, Block, Block]]): Index, old and new caption at the same time with different text
+    - unchanged (int): Number of equal captions
+    """
+    def __init__(self, base: str, cues: int):
+        self.base = base
+        self.cues = cues
+        self.inserted = []
+        self.deleted = []
+        self.retimed = []
+        self.retexted = []
+        self.unchanged = 0
+
+    def __bool__(self):
+        return bool(self.inserted or self.deleted or self.retimed or self.retexted)
+
+    def __repr__(self):
+        return (f"CaptionsDiff(inserted={len(self.inserted)}, deleted={len(self.deleted)}, "
+                f"retimed={len(self.retimed)}, retexted={len(self.retexted)}, unchanged={self.unchanged})")
+
+    def toPatch(self) -> dict:
+        """
+        Returns JSON serializable patch, see PATCH_VERSION.
+        """
+        ops = [["-", index] for index, _ in self.deleted]
+        ops += [["t", index, *_times(new)] for index, _, new in self.retimed]
+        ops += [["x", index, dict(new.languages)] for index, _, new in self.retexted]
+        ops += [["+", *_times(block), dict(block.languages)] for block in self.inserted]
+        return {"version": PATCH_VERSION, "base": self.base, "cues": self.cues, "ops": ops}
+
+
+def _pairRetimed(old: list, new: list, max_shift: int | None):
+    """
+    Pairs captions with the same text in time order, yields (old, new) positions and unpaired ones with None.
+
+    A caption is skipped if the next one of the same track is closer, so a deleted or inserted
+    repeated line (e.g. "Yes.") does not shift the pairing of the following ones.
+    """
+    i = j = 0
+    while i < len(old) and j < len(new):
+        shift = new[j][0] - old[i][0]
+        if max_shift is not None and shift > max_shift:
+            yield i, None
+            i += 1
+        elif max_shift is not None and -shift > max_shift:
+            yield None, j
+            j += 1
+        elif i + 1 < len(old) and abs(new[j][0] - old[i + 1][0]) < abs(shift):
+            yield i, None
+            i += 1
+        elif j + 1 < len(new) and abs(new[j + 1][0] - old[i][0]) < abs(shift):
+            yield None, j
+            j += 1
+        else:
+            yield i, j
+            i += 1
+            j += 1
+    for i in range(i, len(old)):
+        yield i, None
+    for j in range(j, len(new)):
+        yield None, j
+
+
+def diffBlocks(old, new, max_shift: int = None) -> CaptionsDiff:
+    """
+    Compares captions of two tracks, other blocks (comments, styles, ...) are ignored.
+
+    Cues are matched in three passes, each linear after sorting by start time:
+     1. equal time and text (by content hash)
+     2. equal text, paired in time order, retimed
+     3. overlapping time, paired by the largest overlap with a sweep, re-texted (and retimed if times differ)
+    Remaining old cues are deleted and remaining new cues inserted.
+
+    Parameters:
+    - old (iterable): Blocks of the old track
+    - new (iterable): Blocks of the new track
+    - max_shift (int, optional): Maximum time shift (microseconds) of retimed cues (default is None, unlimited)
+
+    Returns:
+        CaptionsDiff: differences, with toPatch for applyPatch
+    """
+    old_cues = _cues(old)
+    new_cues = _cues(new)
+    result = CaptionsDiff(baseDigest(old_cues), len(old_cues))
+
+    exact = defaultdict(list)
+    for index, (start, end, text_hash, _) in enumerate(old_cues):
+        exact[start, end, text_hash].append(index)
+    for key in exact:
+        exact[key].reverse()
+    old_left = [True] * len(old_cues)
+    new_left = []
+    for index, (start, end, text_hash, _) in enumerate(new_cues):
+        indexes = exact.get((start, end, text_hash))
+        if indexes:
+            old_left[indexes.pop()] = False
+            result.unchanged += 1
+        else:
+            new_left.append(index)
+
+    by_text = defaultdict(lambda: ([], []))
+    for index, cue in enumerate(old_cues):
+        if old_left[index]:
+            by_text[cue[2]][0].append(index)
+    for index in new_left:
+        by_text[new_cues[index][2]][1].append(index)
+    rest = []
+    for old_indexes, new_indexes in by_text.values():
+        pairs = _pairRetimed([old_cues[i] for i in old_indexes], [new_cues[j] for j in new_indexes], max_shift)
+        for i, j in pairs:
+            if i is not None and j is not None:
+                index = old_indexes[i]
+                old_left[index] = False
+                result.retimed.append((index, old_cues[index][3], new_cues[new_indexes[j]][3]))
+            elif j is not None:
+                rest.append(new_indexes[j])
+    rest.sort()
+
+    remaining = [index for index, left in enumerate(old_left) if left]
+    low = 0
+    for new_index in rest:
+        start, end, _, block = new_cues[new_index]
+        while low < len(remaining) and old_cues[remaining[low]][1] < start:
+            low += 1
+        best, best_overlap = None, None
+        position = low
+        while position < len(remaining) and old_cues[remaining[position]][0] <= end:
+            index = remaining[position]
+            old_start, old_end = old_cues[index][:2]
+            overlap = min(old_end, end) - max(old_start, start)
+            if old_left[index] and (overlap > 0 or (old_start, old_end) == (start, end)):
+                if best is None or overlap > best_overlap:
+                    best, best_overlap = index, overlap
+            position += 1
+        if best is None:
+            result.inserted.append(block)
+            continue
+        old_left[best] = False
+        old_block = old_cues[best][3]
+        result.retexted.append((best, old_block, block))
+        if old_cues[best][:2] != (start, end):
+            result.retimed.append((best, old_block, block))
+
+    result.deleted = [(index, old_cues[index][3]) for index, left in enumerate(old_left) if left]
+    result.retimed.sort(key=lambda i: i[0])
+    return result
+
+
+def applyPatch(blocks: list[Block], patch: dict, strict: bool = True) -> list[Block]:
+    """
+    Applies a patch from CaptionsDiff.toPatch to blocks of the old track.
+
+    Parameters:
+    - blocks (list[Block]): Blocks of the old track, changed captions are modified in place
+    - patch (dict): Patch
+    - strict (bool, optional): Raise ValueError if the blocks are not the old track of the patch (default is True)
+
+    Returns:
+        list[Block]: patched blocks sorted by start time
+    """
+    if patch.get("version") != PATCH_VERSION:
+        raise ValueError(f"Unsupported patch version {patch.get('version')}")
+    cues = _cues(blocks)
+    if strict and (len(cues) != patch["cues"] or baseDigest(cues) != patch["base"]):
+        raise ValueError("Patch does not match the captions")
+    deleted = set()
+    inserted = []
+    for op in patch["ops"]:
+        if op[0] == "-":
+            deleted.add(id(cues[op[1]][3]))
+        elif op[0] == "t":
+            block = cues[op[1]][3]
+            block.start_time, block.end_time = MT.fromTime(op[2]), MT.fromTime(op[3])
+        elif op[0] == "x":
+            block = cues[op[1]][3]
+            block.languages.clear()
+            block.languages.update(op[2])
+        elif op[0] == "+":
+            inserted.append(Block(BlockType.CAPTION, next(iter(op[3]), "und"), MT.fromTime(op[1]),
+                                  MT.fromTime(op[2]), languages=op[3]))
+        else:
+            raise ValueError(f"Unknown patch operation {op[0]}")
+    return sortBlocks([block for block in blocks if id(block) not in deleted] + inserted)
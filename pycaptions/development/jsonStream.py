@@ -0,0 +1,106 @@
+import io
+import json
+
+
+BUFFER_SIZE = 1 << 16
+
+
+class JsonStreamReader:
+    """
+    Incremental reader for pycaptions JSON v2 files.
+
+    Reads fields before block_list as a header and then decodes block_list
+    chunks one at a time, so only one chunk is kept in memory.
+
+    Example:
+
+    with open("file.json", encoding="UTF-8") as f:
+        reader = JsonStreamReader(f)
+        header = reader.header()
+        for chunk in reader.chunks():
+            ...
+    """
+    def __init__(self, stream: io.TextIOBase, buffer_size: int = BUFFER_SIZE):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+        self._header = None
+        self._in_block_list = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        data = self.stream.read(self.buffer_size)
+        if not data:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def _peek(self) -> str:
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON file")
+
+    def _expect(self, character: str):
+        if self._peek() != character:
+            raise ValueError(f"Incorect json format: expected '{character}' at {self.pos}")
+        self.pos += 1
+
+    def _value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # numbers and literals can continue in the next part of the file
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def header(self) -> dict:
+        """
+        Returns all fields before block_list.
+        """
+        if self._header is not None:
+            return self._header
+        self._header = dict()
+        self._expect("{")
+        while self._peek() != "}":
+            key = self._value()
+            self._expect(":")
+            if key == "block_list":
+                self._expect("[")
+                self._in_block_list = True
+                return self._header
+            self._header[key] = self._value()
+            if self._peek() == ",":
+                self.pos += 1
+        self.pos += 1
+        self._in_block_list = False
+        return self._header
+
+    def chunks(self):
+        """
+        Yields block_list chunks.
+        """
+        self.header()
+        if not self._in_block_list:
+            return
+        while self._peek() != "]":
+            yield self._value()
+            if self._peek() == ",":
+                self.pos += 1
+        self.pos += 1
+        self._in_block_list = False
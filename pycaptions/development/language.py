@@ -0,0 +1,59 @@
+from functools import lru_cache
+from langcodes import standardize_tag, tag_is_valid
+
+
+CACHE_SIZE = 4096
+"""
+Maximum number of cached tags that are not in COMMON_LANGUAGES.
+"""
+
+COMMON_LANGUAGES = {tag: tag for tag in (
+    "und", "en", "es", "fr", "de", "it", "pt", "nl", "sv", "da", "no", "nb", "nn", "fi", "is",
+    "pl", "cs", "sk", "sl", "hr", "sr", "bs", "mk", "bg", "ro", "hu", "el", "tr", "ru", "uk",
+    "be", "lt", "lv", "et", "ga", "cy", "eu", "ca", "gl", "ar", "he", "fa", "ur", "hi", "bn",
+    "ta", "te", "ml", "kn", "mr", "gu", "pa", "th", "vi", "id", "ms", "ja", "ko", "zh",
+    "zh-CN", "zh-TW", "zh-HK", "zh-SG", "zh-MO", "zh-Hans", "zh-Hant", "en-US", "en-GB",
+    "en-AU", "en-CA", "es-ES", "es-MX", "es-419", "fr-FR", "fr-CA", "pt-BR", "pt-PT",
+    "de-DE", "it-IT", "ja-JP", "ko-KR", "ru-RU", "ar-SA"
+)}
+COMMON_LANGUAGES.update({
+    "tl": "fil", "eng": "en", "spa": "es", "fre": "fr", "fra": "fr", "ger": "de", "deu": "de",
+    "ita": "it", "por": "pt", "jpn": "ja", "kor": "ko", "chi": "zh", "zho": "zh", "rus": "ru",
+    "ara": "ar", "hin": "hi"
+})
+"""
+Precomputed results of `standardize_tag(tag, macro=True)` for frequently used valid tags.
+"""
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _standardize(tag: str) -> str | None:
+    try:
+        standardized = standardize_tag(tag, macro=True)
+    except Exception:
+        return None
+    return standardized if tag_is_valid(standardized) else None
+
+
+def standardizeLanguage(tag: str) -> str | None:
+    """
+    Standardize a language tag, results are cached.
+
+    Returns:
+        str | None: standardized tag or None if the tag is not a valid language tag
+    """
+    standardized = COMMON_LANGUAGES.get(tag)
+    if standardized:
+        return standardized
+    return _standardize(tag)
+
+
+def isLanguage(tag: str) -> bool:
+    """
+    Check if the tag is a valid language tag, results are cached.
+    """
+    return tag in COMMON_LANGUAGES or _standardize(tag) is not None
+
+
+def clearLanguageCache():
+    _standardize.cache_clear()
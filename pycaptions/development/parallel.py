@@ -0,0 +1,86 @@
+import io
+import os
+import re
+
+from concurrent.futures import Executor, ProcessPoolExecutor
+from .blockType import BlockType
+
+
+CUE_BOUNDARY = re.compile(r"\n[ \t]*\r?\n(?=(?:[^\n]*\n)?(?:\d+:)?\d{2}:\d{2}[.,]\d{3}[ \t]+-->)")
+"""
+Blank line followed by a cue (optional index or identifier line and a timing line).
+"""
+
+MIN_CHUNK_SIZE = 1 << 20
+"""
+Inputs are not split into chunks smaller than this (in characters).
+"""
+
+CHUNKS_PER_WORKER = 4
+
+
+def splitCues(text: str, chunk_size: int) -> list[str]:
+    """
+    Split text into chunks of at least chunk_size characters, only at cue boundaries.
+    """
+    chunks = []
+    start = 0
+    while start < len(text):
+        match = CUE_BOUNDARY.search(text, start + chunk_size)
+        if not match:
+            chunks.append(text[start:])
+            break
+        chunks.append(text[start:match.start() + 1])
+        start = match.end()
+    return chunks
+
+
+def _parseChunk(reader, chunk: str, languages: list[str], settings, kwargs: dict):
+    from .captionsFormat import CaptionsFormat
+
+    captions = CaptionsFormat(isFile=False, settings=settings)
+    reader(captions, io.StringIO(chunk), languages, **kwargs)
+    return captions._block_list, captions.options["blocks"]
+
+
+def readParallel(self, content: io.IOBase, reader, languages: list[str], workers: int = None,
+                 executor: Executor = None, chunk_size: int = None, **kwargs):
+    """
+    Parse cues in chunks using a process pool and append them in order.
+
+    Parameters:
+    - content (io.IOBase): Stream positioned at the first cue
+    - reader (function): Module level cue reader, called as reader(self, content, languages, **kwargs)
+    - languages (list[str]): List of languages
+    - workers (int, optional): Number of processes (default is os.cpu_count())
+    - executor (Executor, optional): Executor to use instead of creating a new process pool
+    - chunk_size (int, optional): Minimum chunk size in characters (default depends on workers)
+    - **kwargs: Passed to the reader
+    """
+    workers = workers or os.cpu_count() or 1
+    text = content.read()
+    if not chunk_size:
+        chunk_size = max(len(text) // (workers * CHUNKS_PER_WORKER), MIN_CHUNK_SIZE)
+    chunks = splitCues(text, chunk_size)
+    settings = self.getSettings()
+    # chunks are parsed on new instances, extended SRT coordinates need the media size of this one
+    kwargs = {"media_width": self.media_width, "media_height": self.media_height, **kwargs}
+
+    if len(chunks) < 2:
+        results = [_parseChunk(reader, text, languages, settings, kwargs)]
+    elif executor:
+        results = executor.map(_parseChunk, [reader]*len(chunks), chunks,
+                               [languages]*len(chunks), [settings]*len(chunks), [kwargs]*len(chunks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_parseChunk, [reader]*len(chunks), chunks,
+                                    [languages]*len(chunks), [settings]*len(chunks), [kwargs]*len(chunks)))
+
+    for blocks, option_blocks in results:
+        for block in blocks:
+            self.append(block)
+        for block in option_blocks:
+            if block.block_type == BlockType.LAYOUT:
+                self.addLayout(block.options["id"], block)
+            else:
+                self.options["blocks"].append(block)
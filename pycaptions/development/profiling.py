@@ -0,0 +1,125 @@
+import cProfile
+import io
+import pstats
+import threading
+import tracemalloc
+
+from collections import defaultdict
+from .stats import Stats
+
+
+SNAPSHOT_STAGES = ("encoding", "detect", "read", "write")
+"""
+Stages with allocation sites, other stages run once per cue and only their peak is measured.
+"""
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+
+
+class MemoryTrace(Stats):
+    """
+    Stats that also trace memory with tracemalloc: peak memory of every stage
+    and top allocation sites of SNAPSHOT_STAGES.
+
+    Peaks are relative to the memory in use when the stage started, nested
+    stages (e.g. style inside read) are included in the peak of the outer stage.
+    Stages are nested per thread (e.g. read of CaptionsStream runs in its own thread),
+    tracemalloc peak is process wide, so stages running at the same time share it.
+
+    Example:
+
+    with MemoryTrace() as trace:
+        convert("file.srt", output_format="vtt")
+    print(trace.report())
+    """
+    def __init__(self, top: int = 10, callback=None, frames: int = 1):
+        """
+        Parameters:
+        - top (int, optional): Number of allocation sites reported for each stage (default is 10)
+        - callback (callable, optional): See Stats
+        - frames (int, optional): Traceback depth of allocation sites (default is 1)
+        """
+        super().__init__(callback)
+        self.top = top
+        self.frames = frames
+        self.peaks = defaultdict(int)
+        self.sites = defaultdict(lambda: defaultdict(int))
+        self.peak = 0
+        self._stacks = defaultdict(list)
+        self._started = False
+
+    def __enter__(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started = True
+        tracemalloc.reset_peak()
+        return super().__enter__()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        super().__exit__(exc_type, exc_val, exc_tb)
+        self.peak = max(self.peak, self._absolutePeak())
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
+
+    def _absolutePeak(self) -> int:
+        peak = tracemalloc.get_traced_memory()[1]
+        for stack in list(self._stacks.values()):
+            for frame in stack:
+                peak = max(peak, frame[1])
+        return peak
+
+    def startStage(self, name: str):
+        current, peak = tracemalloc.get_traced_memory()
+        # reset_peak below would lose the peak of running stages, of this and other threads
+        for stack in list(self._stacks.values()):
+            if stack:
+                stack[-1][1] = max(stack[-1][1], peak)
+        self.peak = max(self.peak, peak)
+        snapshot = _snapshot() if name in SNAPSHOT_STAGES else None
+        if snapshot:
+            # the snapshot itself is not part of the stage
+            current = tracemalloc.get_traced_memory()[0]
+        self._stacks[threading.get_ident()].append([current, current, snapshot])
+        tracemalloc.reset_peak()
+
+    def addTime(self, name: str, seconds: float, calls: int = 1):
+        stack = self._stacks.get(threading.get_ident())
+        if stack:
+            start, peak, snapshot = stack.pop()
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            self.peaks[name] = max(self.peaks[name], peak - start)
+            if stack:
+                stack[-1][1] = max(stack[-1][1], peak)
+            else:
+                del self._stacks[threading.get_ident()]
+                self.peak = max(self.peak, peak)
+            if snapshot:
+                for stat in _snapshot().compare_to(snapshot, "lineno"):
+                    if stat.size_diff > 0:
+                        self.sites[name][str(stat.traceback)] += stat.size_diff
+        super().addTime(name, seconds, calls)
+
+    def toDict(self) -> dict:
+        data = super().toDict()
+        data["memory"] = {"peak": self.peak, "stages": dict(self.peaks)}
+        return data
+
+    def report(self) -> str:
+        lines = [super().report(), "", f"peak memory {self.peak / 1024:.1f} KiB"]
+        for name, peak in self.peaks.items():
+            lines.append(f"{name:<16}{peak / 1024:>12.1f} KiB peak")
+            top = sorted(self.sites[name].items(), key=lambda i: i[1], reverse=True)[:self.top]
+            lines += [f"    {size / 1024:>10.1f} KiB  {site}" for site, size in top]
+        return "\n".join(lines)
+
+
+def profileReport(profiler: cProfile.Profile, top: int = 25, sort: str = "cumulative") -> str:
+    """
+    Returns top functions of the profile as text.
+    """
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats(sort).print_stats(top)
+    return output.getvalue()
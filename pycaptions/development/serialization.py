@@ -0,0 +1,222 @@
+import json
+import math
+
+from cssutils.css import CSSStyleSheet
+from .block import Block
+from .blockType import BlockType
+from ..microTime import MicroTime as MT
+from ..options import FileExtensions
+
+
+BLOCK_KEY = "__block__"
+
+
+def dumpTime(time: MT) -> int | float | None:
+    """
+    Returns MicroTime as microseconds, None and infinity are preserved.
+    """
+    if time is None:
+        return None
+    time = time.toTime()
+    if math.isinf(time):
+        return time
+    return int(time)
+
+
+def loadTime(time: int | float | None) -> MT | None:
+    if time is None:
+        return None
+    if math.isinf(time):
+        return MT(hours=time)
+    return MT.fromTime(time)
+
+
+def dumpValue(value):
+    """
+    Converts option values into plain python types (dict, list, str, int, float, bool, None).
+    """
+    if isinstance(value, Block):
+        return {BLOCK_KEY: dumpBlock(value)}
+    if isinstance(value, dict):
+        return {key: dumpValue(i) for key, i in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [dumpValue(i) for i in value]
+    if isinstance(value, MT):
+        return dumpTime(value)
+    if isinstance(value, CSSStyleSheet):
+        return value.cssText.decode("UTF-8") if isinstance(value.cssText, bytes) else str(value.cssText)
+    return value
+
+
+def loadValue(value):
+    if isinstance(value, dict):
+        if BLOCK_KEY in value:
+            return loadBlock(value[BLOCK_KEY])
+        return {key: loadValue(i) for key, i in value.items()}
+    if isinstance(value, list):
+        return [loadValue(i) for i in value]
+    return value
+
+
+def dumpBlock(block: Block) -> list:
+    """
+    Returns block as [block_type, default_language, start, end, languages, options].
+    """
+    return [block.block_type, block.default_language, dumpTime(block.start_time),
+            dumpTime(block.end_time), dict(block.languages), dumpValue(block.options)]
+
+
+def loadBlock(data: list) -> Block:
+    block_type, default_language, start, end, languages, options = data
+    options = loadValue(options)
+    if block_type != BlockType.STYLE:
+        block = Block(block_type, default_language, loadTime(start), loadTime(end))
+        block.options = options
+    else:
+        block = Block(block_type, default_language, loadTime(start), loadTime(end), **options)
+    block.languages.update(languages)
+    return block
+
+
+def dumpCaptions(captions) -> dict:
+    """
+    Returns captions data as plain python types, see loadCaptions.
+    """
+    return {
+        "format": getattr(captions, "fileFormat", None),
+        "default_language": captions.default_language,
+        "time_length": dumpTime(captions.time_length),
+        "media_height": captions.media_height,
+        "media_width": captions.media_width,
+        "file_extensions": vars(captions._extensions) if captions._extensions else None,
+        "options": dumpValue(captions.options),
+        "block_list": [dumpBlock(block) for block in captions]
+    }
+
+
+def loadCaptions(captions, data: dict):
+    """
+    Loads data created by dumpCaptions into captions.
+    """
+    if data.get("format"):
+        captions.fileFormat = data["format"]
+    captions.default_language = data["default_language"]
+    captions.time_length = loadTime(data["time_length"]) or MT()
+    captions.media_height = data["media_height"]
+    captions.media_width = data["media_width"]
+    if data.get("file_extensions") is not None:
+        captions.extensions = FileExtensions(**data["file_extensions"])
+    captions.options = loadValue(data["options"])
+    captions._block_list = [loadBlock(block) for block in data["block_list"]]
+
+
+def toBytes(captions) -> bytes:
+    """
+    Compact serialization of captions as UTF-8 JSON, safe to load from a shared cache directory.
+    """
+    return json.dumps(dumpCaptions(captions), ensure_ascii=False, separators=(",", ":")).encode("UTF-8")
+
+
+def fromBytes(captions, data: bytes):
+    loadCaptions(captions, json.loads(data))
+
+
+JSON_CHUNK_SIZE = 1000
+"""
+Number of blocks in one chunk of JSON v2 block_list.
+"""
+
+
+def dumpChunk(blocks: list[Block]) -> dict:
+    """
+    Returns blocks in columnar form used by JSON v2.
+    """
+    languages = []
+    for block in blocks:
+        for language in block.languages:
+            if language not in languages:
+                languages.append(language)
+    default_languages = [block.default_language for block in blocks]
+    options = {str(index): dumpValue(block.options) for index, block in enumerate(blocks) if block.options}
+    return {
+        "count": len(blocks),
+        "block_type": [block.block_type for block in blocks],
+        "default_language": (default_languages[0] if default_languages.count(default_languages[0]) == len(blocks)
+                             else default_languages),
+        "start": [dumpTime(block.start_time) for block in blocks],
+        "end": [dumpTime(block.end_time) for block in blocks],
+        "text": {language: [block.languages.get(language) for block in blocks] for language in languages},
+        "options": options
+    }
+
+
+def loadChunk(chunk: dict, start: int | float = None, end: int | float = None) -> list[Block]:
+    """
+    Returns blocks of a JSON v2 chunk, if start or end (microseconds) is set only
+    untimed blocks and blocks overlapping [start, end) are returned.
+    """
+    default_languages = chunk["default_language"]
+    if not isinstance(default_languages, list):
+        default_languages = [default_languages] * chunk["count"]
+    indices = range(chunk["count"])
+    if start is not None or end is not None:
+        indices = [index for index, (block_start, block_end) in enumerate(zip(chunk["start"], chunk["end"]))
+                   if block_start is None or block_end is None
+                   or ((start is None or block_end > start) and (end is None or block_start < end))]
+    blocks = []
+    for index in indices:
+        block_type = chunk["block_type"][index]
+        block_start = loadTime(chunk["start"][index])
+        block_end = loadTime(chunk["end"][index])
+        options = chunk["options"].get(str(index))
+        if block_type == BlockType.STYLE and options:
+            block = Block(block_type, default_languages[index], block_start, block_end, **loadValue(options))
+        else:
+            block = Block(block_type, default_languages[index], block_start, block_end)
+            if options:
+                block.options = loadValue(options)
+        blocks.append(block)
+    for language, texts in chunk["text"].items():
+        for block, index in zip(blocks, indices):
+            if texts[index] is not None:
+                block.languages[language] = texts[index]
+    return blocks
+
+
+def dumpJsonHeader(captions, filename: str = "") -> dict:
+    """
+    Returns all JSON v2 fields except block_list.
+    """
+    return {
+        "identifier": "pycaptions",
+        "json_version": 2,
+        "default_language": captions.default_language,
+        "time_length": dumpTime(captions.time_length),
+        "filename": filename,
+        "media_height": captions.media_height,
+        "media_width": captions.media_width,
+        "file_extensions": vars(captions.extensions),
+        "options": dumpValue(captions.options)
+    }
+
+
+def dumpJson(captions, filename: str = "", chunk_size: int = JSON_CHUNK_SIZE) -> dict:
+    """
+    Returns captions as JSON v2 data.
+
+    JSON v2 stores times as microseconds and blocks as a list of columnar chunks.
+    """
+    data = dumpJsonHeader(captions, filename)
+    blocks = captions._block_list
+    data["block_list"] = [dumpChunk(blocks[i:i+chunk_size]) for i in range(0, len(blocks), chunk_size)]
+    return data
+
+
+def loadJsonHeader(captions, data: dict):
+    captions.default_language = data["default_language"]
+    captions.time_length = loadTime(data["time_length"]) or MT()
+    captions.filename = data["filename"]
+    captions.media_height = data.get("media_height") or 1080
+    captions.media_width = data.get("media_width") or 1920
+    captions.extensions = FileExtensions(**data["file_extensions"])
+    captions.options = loadValue(data["options"])
@@ -0,0 +1,200 @@
+import io
+import os
+import re
+
+from .compression import splitCompression
+from ..lrc import EXTENSIONS as LRC_EXTENSIONS
+from ..sami import EXTENSIONS as SAMI_EXTENSIONS
+from ..srt import EXTENSIONS as SRT_EXTENSIONS
+from ..sub import EXTENSIONS as SUB_EXTENSIONS
+from ..ttml import EXTENSIONS as TTML_EXTENSIONS
+from ..usf import EXTENSIONS as USF_EXTENSIONS
+from ..vtt import EXTENSIONS as VTT_EXTENSIONS
+
+
+HEAD_SIZE = 4096
+"""
+Number of characters read from the start of the content for format sniffing.
+"""
+
+MIN_CONFIDENCE = 0.5
+"""
+Scores bellow this value are not considered a match.
+"""
+
+EXTENSION_HINT = 0.1
+
+SRT_TIMING = re.compile(r"^\d+:\d{2}:\d{2}[,.]\d{1,3}\s*-->\s*\d+:\d{2}:\d{2}[,.]\d{1,3}")
+SUB_LINE = re.compile(r"^\{\d+\}\{\d*\}")
+TTML_ROOT = re.compile(r"<(?:\w+:)?tt[\s>]")
+LRC_TIME = re.compile(r"^\[(\d{1,3}):(\d{1,2}(?:[:.]\d{1,3})?)\]")
+LRC_TAG = re.compile(r"^\[[a-zA-Z#]+:[^\]]*\]$")
+
+
+class HeadStream(io.TextIOBase):
+    """
+    Text stream that replays an already read head before the rest of a non-seekable stream.
+
+    Used so that pipes and sockets can be sniffed without losing any content.
+    """
+    def __init__(self, head: str, stream: io.IOBase):
+        self._head = io.StringIO(head)
+        self._stream = stream
+        self.name = getattr(stream, "name", None)
+
+    def readable(self):
+        return True
+
+    def read(self, size: int = -1) -> str:
+        if size is None or size < 0:
+            return self._head.read() + self._stream.read()
+        data = self._head.read(size)
+        if len(data) < size:
+            data += self._stream.read(size - len(data))
+        return data
+
+    def readline(self, size: int = -1) -> str:
+        line = self._head.readline()
+        if not line:
+            return self._stream.readline()
+        if line.endswith("\n"):
+            return line
+        return line + self._stream.readline()
+
+
+def readHead(content: str | io.IOBase, head_size: int = HEAD_SIZE) -> tuple[str, str | io.IOBase]:
+    """
+    Read the head of the content.
+
+    Seekable streams are returned to their original offset. Non-seekable streams
+    are wrapped in HeadStream so the head is not lost.
+
+    Returns:
+        tuple[str, str | io.IOBase]: head and the content that should be used for reading
+    """
+    if isinstance(content, str):
+        return content[:head_size], content
+    if not isinstance(content, io.IOBase):
+        raise ValueError("The content is not a unicode string or I/O stream.")
+    if content.seekable():
+        offset = content.tell()
+        head = content.read(head_size)
+        content.seek(offset)
+        return head, content
+    head = content.read(head_size)
+    return head, HeadStream(head, content)
+
+
+def _nonEmptyLines(head: str, count: int) -> list[str]:
+    lines = []
+    for line in head.splitlines():
+        if line.strip():
+            lines.append(line.strip())
+            if len(lines) == count:
+                break
+    return lines
+
+
+def scoreSRT(head: str, lines: list[str]) -> float:
+    if len(lines) < 2 or not lines[0].isdigit():
+        return 0.0
+    if SRT_TIMING.match(lines[1]):
+        return 1.0 if lines[0] == "1" else 0.9
+    if "-->" in lines[1]:
+        return 0.6
+    return 0.0
+
+
+def scoreVTT(head: str, lines: list[str]) -> float:
+    if head.startswith("WEBVTT"):
+        return 1.0
+    return 0.0
+
+
+def scoreTTML(head: str, lines: list[str]) -> float:
+    if not head.startswith("<"):
+        return 0.0
+    if TTML_ROOT.search(head):
+        return 1.0
+    return 0.0
+
+
+def scoreSUB(head: str, lines: list[str]) -> float:
+    if not lines:
+        return 0.0
+    if SUB_LINE.match(lines[0]) or lines[0].startswith("{DEFAULT}"):
+        return 1.0
+    return 0.0
+
+
+def scoreSAMI(head: str, lines: list[str]) -> float:
+    if head[:5].upper() == "<SAMI":
+        return 1.0
+    return 0.0
+
+
+def scoreUSF(head: str, lines: list[str]) -> float:
+    if head.startswith("<USFSubtitles"):
+        return 1.0
+    if head.startswith("<?xml") and "<USFSubtitles" in head:
+        return 1.0
+    return 0.0
+
+
+def scoreLRC(head: str, lines: list[str]) -> float:
+    if not lines:
+        return 0.0
+    if LRC_TIME.match(lines[0]):
+        return 1.0
+    if LRC_TAG.match(lines[0]):
+        return 0.6
+    return 0.0
+
+
+SNIFFERS = {
+    "srt": (scoreSRT, SRT_EXTENSIONS),
+    "vtt": (scoreVTT, VTT_EXTENSIONS),
+    "ttml": (scoreTTML, TTML_EXTENSIONS),
+    "sub": (scoreSUB, SUB_EXTENSIONS),
+    "sami": (scoreSAMI, SAMI_EXTENSIONS),
+    "usf": (scoreUSF, USF_EXTENSIONS),
+    "lrc": (scoreLRC, LRC_EXTENSIONS)
+}
+"""
+Maps format name to a scoring function and file extensions of the format.
+"""
+
+
+def sniffFormat(head: str, filename: str = None, formats: list[str] = None) -> tuple[str | None, float]:
+    """
+    Score all formats against the head of the content in one pass.
+
+    Parameters:
+    - head (str): Start of the content, see readHead
+    - filename (str, optional): Used as a hint, matching extension adds to the score
+    - formats (list[str], optional): Limit detection to these formats (default is all in SNIFFERS)
+
+    Returns:
+        tuple[str | None, float]: format and confidence, (None, 0.0) if nothing matched
+    """
+    head = head.lstrip("﻿ \t\r\n")
+    lines = _nonEmptyLines(head, 2)
+    extension = None
+    if filename:
+        extension = os.path.splitext(splitCompression(filename)[0])[1].lower()
+
+    best_format, best_score = None, 0.0
+    for format, (score, extensions) in SNIFFERS.items():
+        if formats is not None and format not in formats:
+            continue
+        value = score(head, lines)
+        if not value:
+            continue
+        if extension and extension in extensions:
+            value = min(value + EXTENSION_HINT, 1.0)
+        if value > best_score:
+            best_format, best_score = format, value
+
+    if best_score < MIN_CONFIDENCE:
+        return None, 0.0
+    return best_format, best_score
@@ -0,0 +1,145 @@
+import contextlib
+import contextvars
+import time
+
+from collections import defaultdict
+
+
+_stats = contextvars.ContextVar("pycaptions_stats", default=None)
+_NO_STAGE = contextlib.nullcontext()
+
+STAGES = ("encoding", "detect", "read", "style", "line_breaking", "write")
+"""
+Instrumented stages, "read" and "write" include the "style" and "line_breaking" time spent in them.
+"""
+
+
+class Stats:
+    """
+    Wall time per stage and counters of conversions, collected while the instance is active.
+
+    Stats are context-local like settings, threads started by pycaptions inherit them.
+    Work done in other processes (e.g. workers of ProcessPoolExecutor) is not collected.
+
+    Example:
+
+    with Stats() as stats:
+        convert("file.srt", output_format="vtt")
+    print(stats.report())
+
+    Counters:
+     - bytes_in, bytes_out: Size of read and written files or streams
+     - cues_parsed, cues_written: Number of blocks
+     - parser_loads, parser_cache_hits: Line breaking (budoux) parsers
+     - style_cache_hits, style_cache_misses: Reused VTT style identifiers
+    """
+    def __init__(self, callback=None):
+        """
+        Parameters:
+        - callback (callable, optional): Called as callback(name, value) after every stage (value in seconds)
+          and counter update
+        """
+        self.stages = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.counters = defaultdict(int)
+        self.callback = callback
+        self._tokens = []
+
+    def __enter__(self):
+        self._tokens.append(_stats.set(self))
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _stats.reset(self._tokens.pop())
+
+    def startStage(self, name: str):
+        """
+        Called when a stage starts, used by subclasses (e.g. MemoryTrace).
+        """
+
+    def addTime(self, name: str, seconds: float, calls: int = 1):
+        self.stages[name] += seconds
+        self.calls[name] += calls
+        if self.callback:
+            self.callback(name, seconds)
+
+    def count(self, name: str, value: int = 1):
+        self.counters[name] += value
+        if self.callback:
+            self.callback(name, value)
+
+    def merge(self, data: dict):
+        """
+        Adds stats from toDict (e.g. returned by a worker process).
+        """
+        for name, stage in data.get("stages", {}).items():
+            self.stages[name] += stage["seconds"]
+            self.calls[name] += stage["calls"]
+        for name, value in data.get("counters", {}).items():
+            self.counters[name] += value
+
+    def toDict(self) -> dict:
+        return {
+            "stages": {name: {"seconds": seconds, "calls": self.calls[name]} for name, seconds in self.stages.items()},
+            "counters": dict(self.counters)
+        }
+
+    def report(self) -> str:
+        order = [i for i in STAGES if i in self.stages] + [i for i in self.stages if i not in STAGES]
+        lines = [f"{'stage':<16}{'calls':>10}{'seconds':>12}"]
+        lines += [f"{name:<16}{self.calls[name]:>10}{self.stages[name]:>12.4f}" for name in order]
+        lines += [f"{name:<22}{value:>16}" for name, value in sorted(self.counters.items())]
+        return "\n".join(lines)
+
+
+class _Stage:
+    __slots__ = ("stats", "name", "start")
+
+    def __init__(self, stats: Stats, name: str):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.stats.startStage(self.name)
+        self.start = time.perf_counter()
+        return self.stats
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stats.addTime(self.name, time.perf_counter() - self.start)
+
+
+def currentStats() -> Stats | None:
+    return _stats.get()
+
+
+def stage(name: str):
+    """
+    Context manager that adds its wall time to the stage of the active Stats, does nothing if none is active.
+    """
+    stats = _stats.get()
+    if stats is None:
+        return _NO_STAGE
+    return _Stage(stats, name)
+
+
+def count(name: str, value: int = 1):
+    stats = _stats.get()
+    if stats is not None:
+        stats.count(name, value)
+
+
+class CountingWriter:
+    """
+    Text stream proxy that counts encoded size of the written text as bytes_out.
+    """
+    def __init__(self, stream, stats: Stats, encoding: str = "UTF-8"):
+        self.stream = stream
+        self.stats = stats
+        self.encoding = encoding
+
+    def write(self, text: str) -> int:
+        self.stats.count("bytes_out", len(text.encode(self.encoding, errors="replace")))
+        return self.stream.write(text)
+
+    def __getattr__(self, name: str):
+        return getattr(self.stream, name)
@@ -8,10 +8,13 @@ from bs4 import BeautifulSoup as BS
 from cssutils import CSSParser
 from cssutils.css import CSSStyleSheet as originalCSSStyleSheet
 
+from .stats import stage
 from .text import get_lines_ratio, get_phrases
 
 class StyleSheet(originalCSSStyleSheet):
     def __json__(self):
+        if isinstance(self.cssText, bytes):
+            return self.cssText.decode("UTF-8")
         return str(self.cssText)
 
 
@@ -31,10 +34,12 @@ class StyleFormat(BS):
         else:
             self.language = "und"
         
-        super().__init__(markup, features, builder, parse_only, from_encoding, exclude_encodings, element_classes, **kwargs)
+        with stage("style"):
+            super().__init__(markup, features, builder, parse_only, from_encoding, exclude_encodings, element_classes, **kwargs)
 
     def parseStyle(self, string):
-        return cssParser.parseStyle(string, encoding="UTF-8")
+        with stage("style"):
+            return cssParser.parseStyle(string, encoding="UTF-8")
     
     def get_lines(self):
         return (BS(line.strip(), 'html.parser').get_text() for index, line in enumerate(str(self).split("<br/>")))
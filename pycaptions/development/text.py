@@ -1,20 +1,51 @@
 import budoux
 
+from .stats import count, stage
+
+PARSER_LOADERS = {
+    "ja": budoux.load_default_japanese_parser,
+    "zh-Hans": budoux.load_default_simplified_chinese_parser,
+    "zh-Hant": budoux.load_default_traditional_chinese_parser,
+    "th": budoux.load_default_thai_parser
+}
+
+PARSER_LANGUAGES = {
+    "ja": "ja",
+    "zh": "zh-Hans",
+    "zh-CN": "zh-Hans",
+    "zh-SG": "zh-Hans",
+    "zh-Hans": "zh-Hans",
+    "zh-HK": "zh-Hant",
+    "zh-MO": "zh-Hant",
+    "zh-TW": "zh-Hant",
+    "zh-Hant": "zh-Hant",
+    "th": "th"
+}
+
+_parsers = dict()
+
+
+def get_parser(lang):
+    """
+    Returns budoux parser for the language or None, parsers are loaded once per process.
+    """
+    name = PARSER_LANGUAGES.get(lang)
+    if not name:
+        return None
+    parser = _parsers.get(name)
+    if parser is None:
+        count("parser_loads")
+        parser = _parsers[name] = PARSER_LOADERS[name]()
+    else:
+        count("parser_cache_hits")
+    return parser
+
 def get_phrases(text, lang):
-    if lang == "ja":
-        parser = budoux.load_default_japanese_parser()
-        return parser.parse(text)
-    if lang in ["zh", "zh-CN", "zh-SG", "zh-Hans"]:
-        parser = budoux.load_default_simplified_chinese_parser()
-        return parser.parse(text)
-    if lang in ["zh-HK", "zh-MO", "zh-TW", "zh-Hant"]:
-        parser = budoux.load_default_simplified_chinese_parser()
-        return parser.parse(text)
-    if lang == "th":
-        parser = budoux.load_default_thai_parser()
-        return parser.parse(text)
-    
-    return text.split(" ")
+    with stage("line_breaking"):
+        parser = get_parser(lang)
+        if parser:
+            return parser.parse(text)
+        return text.split(" ")
 
 def get_lines_ratio(lines, total_characters, character_limit, split_ratios, smaller_first_line):
     if lines > 0:
@@ -0,0 +1,516 @@
+import bisect
+import heapq
+
+from collections import Counter
+from .block import Block
+from .blockType import BlockType
+from ..microTime import MicroTime as MT
+
+
+OVERLAP_POLICIES = ("trim", "merge", "stack", "keep")
+"""
+How overlapping captions are resolved:
+ - "trim": end of the earlier caption is moved before the start of the next one
+ - "merge": overlapping captions are combined into one caption
+ - "stack": timeline is split at every start and end, captions shown at the same time are stacked into one caption
+ - "keep": overlaps are only counted
+"""
+
+MERGE_MODES = ("nearest", "split")
+"""
+How tracks with different segmentation are merged:
+ - "nearest": every cue of the other track is added to the cue it overlaps the most, keeps timing of the first track,
+   a cue left without text gets text of all other cues shown during it
+ - "split": timeline is split at the boundaries of both tracks, each part has text of all cues shown in it
+"""
+
+JOIN_MODES = ("concat", "interleave")
+"""
+How mergeMany joins tracks:
+ - "concat": tracks follow each other, by default every track starts where the previous one ends
+ - "interleave": tracks share the timeline and cues are merged by start time
+"""
+
+DEFAULT_LOOKAHEAD = 64
+"""
+Number of blocks buffered by normalizeStream to reorder nearly sorted input.
+"""
+
+
+def findOverlaps(blocks) -> list[tuple[int, int]]:
+    """
+    Returns pairs of indices (i, j) of overlapping caption blocks, i starts first.
+
+    Blocks are sorted once and swept with a heap of active end times,
+    O(n log n + k) for k overlapping pairs.
+    """
+    order = sorted((block.start_time.toTime(), block.end_time.toTime(), index)
+                   for index, block in enumerate(blocks) if block.block_type == BlockType.CAPTION)
+    active = []
+    pairs = []
+    for start, end, index in order:
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        pairs.extend((other, index) for _, other in active)
+        heapq.heappush(active, (end, index))
+    return pairs
+
+
+def _times(block: Block) -> tuple[int, int]:
+    start = block.start_time.toTime() if block.start_time is not None else 0
+    end = block.end_time.toTime() if block.end_time is not None else start
+    return start, end
+
+
+def _setTimes(block: Block, start: int, end: int):
+    if block.start_time is None or block.start_time.toTime() != start:
+        block.start_time = MT.fromTime(start)
+    if block.end_time is None or block.end_time.toTime() != end:
+        block.end_time = MT.fromTime(end)
+
+
+def _fixDuration(start: int, end: int, min_duration: int, max_duration: int | None,
+                 counters: Counter) -> tuple[int, int]:
+    if end < start:
+        counters["inverted"] += 1
+        end = start
+    if end - start < min_duration:
+        counters["extended"] += 1
+        end = start + min_duration
+    elif max_duration is not None and end - start > max_duration:
+        counters["shortened"] += 1
+        end = start + max_duration
+    return start, end
+
+
+def _sweep(items, policy: str, min_gap: int, min_duration: int, counters: Counter):
+    """
+    Resolves overlaps of (start, end, block) items sorted by start, yields blocks.
+
+    Only the previous caption is kept, so it works on streams.
+    """
+    previous = None
+    pending = []
+    for start, end, block in items:
+        if block.block_type != BlockType.CAPTION:
+            # keep blocks like comments after the caption they follow
+            if previous is None:
+                yield block
+            else:
+                pending.append(block)
+            continue
+        if previous is None:
+            previous = [start, end, block]
+            continue
+        previous_start, previous_end, previous_block = previous
+        if start < previous_end + min_gap:
+            if start < previous_end:
+                counters["overlaps"] += 1
+            if policy == "merge" and start < previous_end:
+                counters["merged"] += 1
+                for language, text in block.languages.items():
+                    previous_block.append(text, language)
+                previous[1] = max(previous_end, end)
+                continue
+            if policy in ("trim", "merge"):
+                # trim the previous caption, move this one if the previous would get too short
+                new_end = max(start - min_gap, previous_start + min_duration)
+                if new_end < previous_end:
+                    counters["trimmed"] += 1
+                    previous[1] = new_end
+                if start < previous[1] + min_gap:
+                    counters["moved"] += 1
+                    start = previous[1] + min_gap
+                    end = max(end, start + min_duration)
+        _setTimes(previous[2], previous[0], previous[1])
+        yield previous[2]
+        yield from pending
+        pending.clear()
+        previous = [start, end, block]
+    if previous:
+        _setTimes(previous[2], previous[0], previous[1])
+        yield previous[2]
+    yield from pending
+
+
+def _stackSegment(start: int, end: int, active: list) -> Block:
+    if len(active) == 1:
+        block = active[0][1]
+        if _times(block) == (start, end):
+            return block
+        block = block.copy()
+        _setTimes(block, start, end)
+        return block
+    block = Block(BlockType.CAPTION, active[0][1].default_language, MT.fromTime(start), MT.fromTime(end))
+    for _, other in active:
+        for language, text in other.languages.items():
+            block.append(text, language)
+    return block
+
+
+def _stack(items, counters: Counter):
+    """
+    Splits the timeline at every start and end, yields one caption for each segment with all active captions.
+    """
+    active = []
+    position = None
+    for start, end, block in items:
+        if block.block_type != BlockType.CAPTION:
+            yield block
+            continue
+        while active and position < start:
+            boundary = min(min(i[0] for i in active), start)
+            if boundary > position:
+                yield _stackSegment(position, boundary, active)
+            position = boundary
+            active = [i for i in active if i[0] > position]
+        if active:
+            counters["overlaps"] += 1
+        else:
+            position = start
+        active.append((end, block))
+    while active:
+        boundary = min(i[0] for i in active)
+        if boundary > position:
+            yield _stackSegment(position, boundary, active)
+        position = boundary
+        active = [i for i in active if i[0] > position]
+
+
+def _resolve(items, policy: str, min_gap: int, min_duration: int, max_duration: int | None, counters: Counter):
+    if policy not in OVERLAP_POLICIES:
+        raise ValueError(f"Invalid overlap policy {policy}. Expected: '{', '.join(OVERLAP_POLICIES)}'")
+    items = ((*_fixDuration(start, end, min_duration, max_duration, counters), block)
+             if block.block_type == BlockType.CAPTION else (start, end, block)
+             for start, end, block in items)
+    if policy == "stack":
+        return _stack(items, counters)
+    return _sweep(items, policy, min_gap, min_duration, counters)
+
+
+def sortBlocks(blocks: list[Block]) -> list[Block]:
+    """
+    Stable sort by start time, blocks without time (e.g. comments) stay after the block they follow.
+
+    Linear for already sorted lists and for concatenations of a few sorted runs.
+    """
+    items = []
+    previous = 0
+    for index, block in enumerate(blocks):
+        if block.start_time is not None:
+            previous = block.start_time.toTime()
+        items.append((previous, index, block))
+    items.sort(key=lambda i: (i[0], i[1]))
+    return [block for _, _, block in items]
+
+
+def _captionTimes(blocks) -> list[tuple[int, int, Block]]:
+    return sorted(((*_times(block), block) for block in blocks if block.block_type == BlockType.CAPTION),
+                  key=lambda i: i[0])
+
+
+def _snap(time: int, anchors: list[int], tolerance: int) -> int:
+    """
+    Returns the nearest of sorted anchors if it is within tolerance, otherwise time.
+    """
+    index = bisect.bisect_left(anchors, time)
+    nearest = min(anchors[max(index - 1, 0):index + 1], key=lambda i: abs(i - time), default=time)
+    return nearest if abs(nearest - time) <= tolerance else time
+
+
+def mergeTracks(blocks: list[Block], other: list[Block], tolerance: int = 0, mode: str = "nearest",
+                counters: Counter = None) -> list[Block]:
+    """
+    Merges languages of another track into blocks by time instead of by position.
+
+    Both tracks are sorted by start and walked with two pointers, so cues are paired
+    in linear time for tracks without very long cues.
+
+    Parameters:
+    - blocks (list[Block]): First track, its caption blocks get languages of the other track
+    - other (list[Block]): Track to merge
+    - tolerance (int, optional): Cues closer than this (microseconds) are paired even if they do not overlap,
+      in "split" mode boundaries closer than this are aligned (default is 0)
+    - mode (str, optional): One of MERGE_MODES (default is "nearest")
+    - counters (Counter, optional): Updated with number of paired, combined, shared, unmatched and split cues
+
+    Returns:
+        list[Block]: merged track, sorted by start time
+    """
+    counters = Counter() if counters is None else counters
+    if mode not in MERGE_MODES:
+        raise ValueError(f"Invalid merge mode {mode}. Expected: '{', '.join(MERGE_MODES)}'")
+    first = _captionTimes(blocks)
+    second = _captionTimes(other)
+    rest = [block for block in other if block.block_type != BlockType.CAPTION]
+
+    if mode == "split":
+        anchors = sorted({time for start, end, _ in first for time in (start, end)})
+        snapped = []
+        for start, end, block in second:
+            start = _snap(start, anchors, tolerance)
+            snapped.append((start, max(_snap(end, anchors, tolerance), start), block))
+        snapped.sort(key=lambda i: i[0])
+        merged = list(_stack(heapq.merge(first, snapped, key=lambda i: i[0]), Counter()))
+        counters["split"] += len(merged) - len(first)
+        others = [block for block in blocks if block.block_type != BlockType.CAPTION]
+        return sortBlocks(merged + others + rest)
+
+    assigned = [[] for _ in first]
+    covering = [[] for _ in first]
+    unmatched = []
+    low = 0
+    for start, end, block in second:
+        while low < len(first) and first[low][1] + tolerance < start:
+            low += 1
+        best, best_key = None, None
+        overlapping = []
+        index = low
+        while index < len(first) and first[index][0] <= end + tolerance:
+            first_start, first_end, _ = first[index]
+            overlap = min(first_end, end) - max(first_start, start)
+            # cues only touching are not paired, unless one of them has no duration
+            if overlap > -tolerance or overlap == 0 and (start == end or first_start == first_end):
+                # on ties prefer a cue without text of this track, e.g. cues at the same time in two regions
+                key = (overlap, not assigned[index])
+                if best is None or key > best_key:
+                    best, best_key = index, key
+                if overlap > 0:
+                    overlapping.append(index)
+            index += 1
+        if best is None:
+            unmatched.append(block)
+        else:
+            assigned[best].append(block)
+            for index in overlapping:
+                if index != best:
+                    covering[index].append(block)
+
+    # e.g. en 1-2s between sl 0-1.5s and 1.5-3s, both paired with other cues, gets text of both
+    for index, blocks_to_add in enumerate(assigned):
+        if not blocks_to_add and covering[index]:
+            assigned[index] = covering[index]
+            counters["shared"] += 1
+
+    for (_, _, block), blocks_to_add in zip(first, assigned):
+        if blocks_to_add:
+            counters["paired"] += 1
+            counters["combined"] += len(blocks_to_add) - 1
+        for added in blocks_to_add:
+            for language, text in added.languages.items():
+                block.append(text, language)
+    counters["unmatched"] += len(unmatched)
+    if not unmatched and not rest:
+        return list(blocks)
+    return sortBlocks(list(blocks) + unmatched + rest)
+
+
+def _shifted(blocks, offset: int):
+    """
+    Yields (start, end, block) with time shifted by offset, blocks are always copies so
+    the joined track does not share blocks (or their times) with the source tracks.
+    """
+    previous = offset
+    for block in blocks:
+        if block.start_time is None:
+            start = end = previous
+            start_time = end_time = None
+        else:
+            start, end = _times(block)
+            start, end = start + offset, end + offset
+            start_time, end_time = MT.fromTime(start), MT.fromTime(end)
+            previous = start
+        # shallow copy of options, Block.copy deep copies them and is the slowest part of joining
+        yield start, end, Block(block.block_type, block.default_language, start_time, end_time,
+                                languages=block.languages, options=dict(block.options))
+
+
+def mergeMany(tracks, offsets: list[int] = None, mode: str = "concat", start: int = 0,
+              counters: Counter = None):
+    """
+    Joins many tracks in one pass, tracks are consumed lazily so they can be streams.
+
+    In "concat" mode the tracks are chained, in "interleave" mode they are k-way merged
+    with a heap by start time, O(n log k). Each track is expected to be sorted by start time.
+
+    Parameters:
+    - tracks (iterable): Iterables of blocks
+    - offsets (list[int], optional): Time offset of each track (microseconds), in "concat" mode
+      every track starts at the end of the previous one if not set (default is None)
+    - mode (str, optional): One of JOIN_MODES (default is "concat")
+    - start (int, optional): End of the preceding captions, offset of the first track in "concat" mode
+      (default is 0)
+    - counters (Counter, optional): Updated with number of tracks
+
+    Yields:
+        Block: blocks of all tracks
+    """
+    counters = Counter() if counters is None else counters
+    if mode not in JOIN_MODES:
+        raise ValueError(f"Invalid join mode {mode}. Expected: '{', '.join(JOIN_MODES)}'")
+    offsets = list(offsets) if offsets is not None else None
+
+    if mode == "interleave":
+        tracks = list(tracks)
+        offsets = offsets or [0] * len(tracks)
+        counters["tracks"] += len(tracks)
+        merged = heapq.merge(*(_shifted(track, offset) for track, offset in zip(tracks, offsets)),
+                             key=lambda i: i[0])
+        for _, _, block in merged:
+            yield block
+        return
+
+    end = start
+    for index, track in enumerate(tracks):
+        offset = offsets[index] if offsets is not None else end
+        counters["tracks"] += 1
+        for _, block_end, block in _shifted(track, offset):
+            if block.block_type == BlockType.CAPTION:
+                end = max(end, block_end)
+            yield block
+
+
+def timeMap(anchors: list[tuple[int, int]] = None, scale: float = 1.0, offset: int = 0):
+    """
+    Returns a function mapping source time to target time (microseconds).
+
+    With two or more anchors the map is piecewise-linear through them, before the first and
+    after the last anchor it continues with the slope of the nearest segment. With one anchor
+    the map goes through it with slope scale, without anchors it is time * scale.
+    Offset is added to the result.
+
+    Parameters:
+    - anchors (list[tuple[int, int]], optional): Pairs of source and target time, sources must be unique
+    - scale (float, optional): Slope with less than two anchors, e.g. 25 / 23.976 for PAL speed-up (default is 1.0)
+    - offset (int, optional): Added to every mapped time (default is 0)
+    """
+    anchors = sorted(anchors or [])
+    sources = [source for source, _ in anchors]
+    if len(set(sources)) != len(sources):
+        raise ValueError("Anchors must have unique source times")
+    if len(anchors) < 2:
+        source, target = anchors[0] if anchors else (0, 0)
+        return lambda time: round(target + (time - source) * scale) + offset
+    slopes = [(t2 - t1) / (s2 - s1) for (s1, t1), (s2, t2) in zip(anchors, anchors[1:])]
+
+    def mapTime(time: int) -> int:
+        index = min(max(bisect.bisect_right(sources, time) - 1, 0), len(slopes) - 1)
+        source, target = anchors[index]
+        return round(target + (time - source) * slopes[index]) + offset
+
+    return mapTime
+
+
+def retime(blocks: list[Block], anchors: list[tuple[int, int]] = None, scale: float = 1.0, offset: int = 0,
+           min_duration: int = 0) -> tuple[list[Block], Counter]:
+    """
+    Maps start and end of all captions with timeMap, e.g. to fix drift of a frame-rate conversion.
+
+    Negative times are clamped to 0, captions that end before they start (e.g. with crossing anchors)
+    end at their start and are extended to min_duration. Blocks are sorted by start time afterwards.
+
+    Parameters:
+    - blocks (list[Block]): Blocks, times are changed in place
+    - anchors (list[tuple[int, int]], optional): Source and target time pairs (microseconds), see timeMap
+    - scale (float, optional): Slope with less than two anchors (default is 1.0)
+    - offset (int, optional): Added to every time (default is 0)
+    - min_duration (int, optional): Minimum duration of repaired captions (default is 0)
+
+    Returns:
+        tuple[list[Block], Counter]: sorted blocks and number of retimed, clamped and inverted captions
+    """
+    counters = Counter()
+    mapTime = timeMap(anchors, scale, offset)
+    for block in blocks:
+        if block.block_type != BlockType.CAPTION or block.start_time is None:
+            continue
+        start, end = (mapTime(time) for time in _times(block))
+        if end < start:
+            counters["inverted"] += 1
+            end = start + min_duration
+        if start < 0:
+            counters["clamped"] += 1
+            start, end = 0, max(end, 0)
+        counters["retimed"] += 1
+        _setTimes(block, start, end)
+    return sortBlocks(blocks), counters
+
+
+def normalizeTiming(blocks: list[Block], policy: str = "trim", min_gap: int = 0, min_duration: int = 0,
+                    max_duration: int = None) -> tuple[list[Block], Counter]:
+    """
+    Sorts blocks by start time and resolves overlaps in one sweep, O(n log n).
+
+    Blocks without time (e.g. comments) stay after the block they follow.
+
+    Parameters:
+    - blocks (list[Block]): Blocks to normalize, caption blocks are changed in place
+    - policy (str, optional): One of OVERLAP_POLICIES (default is "trim")
+    - min_gap (int, optional): Minimum gap between captions in microseconds (default is 0)
+    - min_duration (int, optional): Minimum duration of captions in microseconds (default is 0)
+    - max_duration (int, optional): Maximum duration of captions in microseconds (default is None)
+
+    Returns:
+        tuple[list[Block], Counter]: normalized blocks and counters (overlaps, trimmed, moved, merged, ...)
+    """
+    counters = Counter()
+    items = []
+    previous = 0
+    for block in sortBlocks(blocks):
+        if block.start_time is not None:
+            previous = block.start_time.toTime()
+        items.append((previous, _times(block)[1], block))
+    blocks = list(_resolve(items, policy, min_gap, min_duration, max_duration, counters))
+    return blocks, counters
+
+
+def _reorder(blocks, lookahead: int, counters: Counter):
+    """
+    Yields (start, end, block) sorted by start while no block is more than lookahead positions late.
+    """
+    heap = []
+    last = None
+    previous = 0
+    for index, block in enumerate(blocks):
+        if block.start_time is None:
+            start, end = previous, previous
+        else:
+            start, end = _times(block)
+            previous = start
+        heapq.heappush(heap, (start, index, end, block))
+        if len(heap) > lookahead:
+            start, _, end, block = heapq.heappop(heap)
+            if last is not None and start < last:
+                # arrived after a later block was written, keep the output sorted
+                counters["late"] += 1
+                end, start = max(end, last), last
+            last = start
+            yield start, end, block
+    while heap:
+        start, _, end, block = heapq.heappop(heap)
+        if last is not None and start < last:
+            counters["late"] += 1
+            end, start = max(end, last), last
+        last = start
+        yield start, end, block
+
+
+def normalizeStream(blocks, policy: str = "trim", min_gap: int = 0, min_duration: int = 0, max_duration: int = None,
+                    lookahead: int = DEFAULT_LOOKAHEAD, counters: Counter = None):
+    """
+    Same as normalizeTiming for a stream of blocks (e.g. CaptionsStream), memory use is bounded by lookahead.
+
+    Input should be nearly sorted, blocks arriving more than lookahead positions late start at the
+    start of the previous written block and are counted as "late".
+
+    Parameters:
+    - blocks (Iterable[Block]): Blocks to normalize
+    - lookahead (int, optional): Number of buffered blocks (default is DEFAULT_LOOKAHEAD)
+    - counters (Counter, optional): Updated with counters, see normalizeTiming
+
+    Yields:
+        Block: normalized blocks
+    """
+    counters = Counter() if counters is None else counters
+    yield from _resolve(_reorder(blocks, max(lookahead, 1), counters), policy, min_gap, min_duration, max_duration,
+                        counters)
@@ -1,6 +1,9 @@
 import io
 
-from ..options import style_options
+from .blockType import BlockType
+from .compression import openFile, splitCompression
+from .stats import CountingWriter, currentStats, stage
+from ..options.style import STYLE_OPTIONS, parseStyle
 from ..microTime import MicroTime as MT
 
 def captionsDetector(func):
@@ -16,19 +19,71 @@ def captionsDetector(func):
     return wrapper
 
 
+def _outputFilename(self, filename: str, extension: str, languages: list[str], compression: str = None,
+                    **kwargs) -> tuple[str, str]:
+    """
+    Returns output file name and compression, compression is taken from the filename
+    (e.g. "file.srt.gz") unless it is given.
+    """
+    filename, file_compression = splitCompression(filename)
+    if compression is None:
+        compression = file_compression or ""
+    elif compression and not compression.startswith("."):
+        compression = "." + compression
+    filename = self.makeFilename(filename=filename, extension=getattr(self.extensions, extension),
+                                 languages=languages, **kwargs)
+    return filename + compression, compression
+
+
+def _countCues(generator, stats):
+    for text, data in generator:
+        if data.block_type == BlockType.CAPTION:
+            stats.count("cues_written")
+        yield text, data
+
+
+def _writeOutput(self, filename: str, extension: str, languages: list[str], encoding: str,
+                 stream: io.IOBase, text: str, compression: str = None, **kwargs):
+    stats = currentStats()
+    if stats:
+        stats.count("bytes_out", len(text.encode(encoding, errors="replace")))
+    if stream:
+        stream.write(text)
+        return
+    filename, compression = _outputFilename(self, filename, extension, languages, compression, **kwargs)
+    with openFile(filename, "w", encoding=encoding, compression=compression) as file:
+        file.write(text)
+
+
 def captionsWriter(extension: str, generator_type: str = None, new_line: str = "\n"):
+    """
+    Decorator for captions writers
+
+    Parameters:
+    - filename (str): Output file name, extension and languages are added with makeFilename
+    - languages (list[str], optional): list of languages (default self.default_language)
+    - stream (io.IOBase, optional): Write to this text stream instead of a file
+    - cache (ConversionCache, optional): Reuse outputs of identical conversions
+    - cache_source (str, optional): Hash of the input used as a cache key (default is hash of the captions data)
+    - cache_only (bool, optional): Only write cached output, returns False if there is none
+    - compression (str, optional): Compress the output, "gz", "bz2", "xz" or "lzma"
+      (default is from filename, e.g. "file.srt.gz")
+    """
     def decorator(func):
-        def wrapper(self, filename: str, languages: list[str] = None, **kwargs):
-            filename = self.makeFilename(filename=filename, extension=getattr(self.extensions, extension),
-                                         languages=languages, **kwargs)
+        def wrapper(self, filename: str = None, languages: list[str] = None, **kwargs):
             encoding = kwargs.get("file_encoding") or "UTF-8"
-            languages = languages or [self.default_language]
+            settings = self.getSettings()
+            stream = kwargs.pop("stream", None)
+            cache = kwargs.pop("cache", None)
+            cache_source = kwargs.pop("cache_source", None)
+            cache_only = kwargs.pop("cache_only", False)
+            compression = kwargs.pop("compression", None)
 
             if "lines" in kwargs:
                 lines = kwargs["lines"]
                 del kwargs["lines"]
             else:
-                lines = style_options.lines
+                lines = settings.lines
 
             if "new_line" in kwargs:
                 line_separator = kwargs["new_line"]
@@ -36,28 +91,71 @@ def captionsWriter(extension: str, generator_type: str = None, new_line: str = "
                 line_separator = new_line
 
             if "style" in kwargs:
-                style_name = kwargs["style"]
+                style_name = parseStyle(kwargs["style"])
             else:
-                style_name = style_options.style
+                style_name = settings.style
 
-            if kwargs.get("generator"):
-                generator = kwargs.get("generator")
+            generator = kwargs.pop("generator", None)
+            if cache and not generator:
+                cache_key = cache.key(cache_source or cache.captionsHash(self), extension, languages,
+                                      lines, line_separator, style_name, encoding, **kwargs)
+                entry = cache.get(cache_key, count_miss=not cache_only)
+                if entry:
+                    default_language, data = entry
+                    try:
+                        _writeOutput(self, filename, extension, languages or [default_language], encoding,
+                                     stream, data.decode(encoding), compression, **kwargs)
+                    except IOError as e:
+                        print(f"I/O error({e.errno}): {e.strerror}")
+                        return False
+                    return True
+                if cache_only:
+                    return False
             else:
+                cache = None
+
+            languages = languages or [self.default_language]
+            if not generator:
                 if style_name == "full":
                     generator = (((getattr(data.get_style(i), generator_type)(lines=lines, options=self.options, **kwargs) for i in languages), data) for data in self)
                 else:
                     if style_name != None:
-                        so = "', '".join(style_options.style_option)
+                        so = "', '".join(STYLE_OPTIONS)
                         print(f"Invalid style option {style_name}. Expected: None '{so}'")
                     generator = (((line_separator.join(data.get(lang=i, lines=lines, **kwargs)) for i in languages), data) for data in self)
+            stats = currentStats()
+            if stats:
+                generator = _countCues(generator, stats)
             try:
-                with open(filename, "w", encoding=encoding) as file:
-                    func(self=self, filename=filename, languages=languages, generator=generator, file=file, **kwargs)
+                with stage("write"):
+                    if cache:
+                        output = io.StringIO()
+                        func(self=self, filename=filename, languages=languages, generator=generator, file=output,
+                             **kwargs)
+                        text = output.getvalue()
+                        cache.set(cache_key, self.default_language, text.encode(encoding))
+                        _writeOutput(self, filename, extension, languages, encoding, stream, text, compression,
+                                     **kwargs)
+                    elif stream:
+                        if stats:
+                            stream = CountingWriter(stream, stats, encoding)
+                        func(self=self, filename=filename, languages=languages, generator=generator, file=stream,
+                             **kwargs)
+                    else:
+                        filename, compression = _outputFilename(self, filename, extension, languages, compression,
+                                                                **kwargs)
+                        with openFile(filename, "w", encoding=encoding, compression=compression) as file:
+                            func(self=self, filename=filename, languages=languages, generator=generator,
+                                 file=CountingWriter(file, stats, encoding) if stats else file, **kwargs)
             except IOError as e:
                 print(f"I/O error({e.errno}): {e.strerror}")
+                return False
             except Exception as e:
                 print(f"Error {e}")
+                return False
+            return True
 
+        wrapper.extension = extension
         return wrapper
     return decorator
 
@@ -74,12 +172,16 @@ def captionsReader(func):
     def wrapper(self, content: str | io.IOBase, languages: list[str] = None,
                 time_offset: MT = None, **kwargs):
         if not isinstance(content, io.IOBase):
-            if not not isinstance(content, str):
+            if not isinstance(content, str):
                 raise ValueError("The content is not a unicode string or I/O stream.")
             content = io.StringIO(content)
         languages = languages or [self.default_language]
         time_offset = kwargs.get("time_offset") or MT()
-        func(self, content, languages, **kwargs)
+        with stage("read") as stats:
+            blocks = len(self._block_list)
+            func(self, content, languages, **kwargs)
+        if stats:
+            stats.count("cues_parsed", len(self._block_list) - blocks)
         self.shift_time(time_offset)
 
     return wrapper
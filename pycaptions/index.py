@@ -0,0 +1,287 @@
+"""
+Full-text index of caption files.
+
+The index is a SQLite database, files are re-indexed only if their size or modification time changed.
+
+Example:
+
+with CaptionsIndex("captions.db") as index:
+    index.update(glob.glob("library/**/*.srt", recursive=True))
+    for filename, cue, start in index.search("where is this"):
+        print(filename, cue, start)
+
+Command line:
+
+pycaptions index captions.db library/**/*.srt
+pycaptions index captions.db -q "where is this"
+"""
+import argparse
+import html
+import os
+import re
+import sqlite3
+import sys
+
+from array import array
+from .captions import Captions
+from .development import BlockType
+from .development.text import PARSER_LANGUAGES, get_phrases
+
+
+INDEX_VERSION = 1
+
+MARKUP = re.compile(r"<[^>]*>|\{[^{}]*\}")
+"""
+HTML-like tags (<b>, <br>, <c.yellow>, ...) and MicroDVD control codes ({y:i}).
+"""
+WORD = re.compile(r"[\w\u0300-\u036f\u0e00-\u0e7f]+")
+"""
+Word characters and combining marks (\\w does not match Thai vowel signs).
+"""
+SCRIPTS = (
+    ("ja", re.compile("[\u3040-\u30ff]")),
+    ("zh", re.compile("[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]")),
+    ("th", re.compile("[\u0e00-\u0e7f]"))
+)
+"""
+Scripts without spaces between words (kana, CJK ideographs, Thai), used to pick
+a budoux parser for text in other or undefined languages.
+"""
+TOKEN_SEPARATOR = "\x1f"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, path TEXT UNIQUE, size INTEGER, mtime_ns INTEGER);
+CREATE TABLE IF NOT EXISTS cues (id INTEGER PRIMARY KEY, file INTEGER, cue INTEGER, language TEXT,
+                                 start INTEGER, end INTEGER, tokens TEXT);
+CREATE INDEX IF NOT EXISTS cues_file ON cues (file);
+CREATE TABLE IF NOT EXISTS postings (token TEXT, file INTEGER, cues BLOB, PRIMARY KEY (token, file)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_file ON postings (file);
+"""
+
+
+def stripMarkup(text: str) -> str:
+    return html.unescape(MARKUP.sub(" ", text))
+
+
+def tokenize(text: str, language: str = None) -> list[str]:
+    """
+    Returns lower case words of text without markup.
+
+    Text in languages with a budoux parser (and such scripts in other languages) is split
+    into phrases with get_phrases first, so a query has to be a sequence of whole phrases
+    or a prefix of one.
+    """
+    text = stripMarkup(text).lower()
+    if language not in PARSER_LANGUAGES:
+        language = next((name for name, script in SCRIPTS if script.search(text)), language)
+    if language in PARSER_LANGUAGES:
+        return [token for phrase in get_phrases(text, language) for token in WORD.findall(phrase)]
+    return WORD.findall(text)
+
+
+def _findPhrase(tokens: list[str], query: list[str], prefix: bool) -> bool:
+    length = len(query)
+    for position in range(len(tokens) - length + 1):
+        if tokens[position:position + length - 1] == query[:-1]:
+            last = tokens[position + length - 1]
+            if last == query[-1] or prefix and last.startswith(query[-1]):
+                return True
+    return False
+
+
+class CaptionsIndex:
+    """
+    Inverted index of caption text, postings map words to (file, cue, start time).
+
+    Parameters:
+    - path (str): Database file name, created if it does not exist
+    - **options: Passed to Captions when files are read (e.g. encoding, default_language)
+    """
+    def __init__(self, path: str, **options):
+        self.path = path
+        self.options = options
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+        version = self.connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if version is None:
+            with self.connection:
+                self.connection.execute("INSERT INTO meta VALUES ('version', ?)", (str(INDEX_VERSION),))
+        elif int(version[0]) != INDEX_VERSION:
+            raise ValueError(f"Unsupported index version {version[0]}, expected {INDEX_VERSION}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def _file(self, filename: str) -> tuple[int, int, int] | None:
+        return self.connection.execute("SELECT id, size, mtime_ns FROM files WHERE path = ?", (filename,)).fetchone()
+
+    def _delete(self, file_id: int):
+        self.connection.execute("DELETE FROM postings WHERE file = ?", (file_id,))
+        self.connection.execute("DELETE FROM cues WHERE file = ?", (file_id,))
+        self.connection.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def add(self, filename: str, captions=None, force: bool = False) -> bool:
+        """
+        Index a file, unchanged files (same size and modification time) are skipped.
+
+        Parameters:
+        - filename (str): Captions file name, stored as absolute path
+        - captions (CaptionsFormat, optional): Already read captions of the file (default is None)
+        - force (bool, optional): Index the file even if it did not change (default is False)
+
+        Returns:
+            bool: True if the file was indexed
+        """
+        filename = os.path.abspath(filename)
+        stat = os.stat(filename)
+        row = self._file(filename)
+        if row and not force and row[1:] == (stat.st_size, stat.st_mtime_ns):
+            return False
+        if captions is None:
+            captions = Captions(filename, **self.options)
+            languages = captions.getLanguagesFromFilename(filename)
+            if languages and captions.default_language == "und":
+                captions.setDefaultLanguage(languages[0])
+            with captions:
+                self._insert(filename, stat, row, captions)
+        else:
+            self._insert(filename, stat, row, captions)
+        return True
+
+    def _insert(self, filename: str, stat: os.stat_result, row: tuple | None, captions):
+        with self.connection:
+            if row:
+                self._delete(row[0])
+            file_id = self.connection.execute("INSERT INTO files (path, size, mtime_ns) VALUES (?, ?, ?)",
+                                              (filename, stat.st_size, stat.st_mtime_ns)).lastrowid
+            postings = dict()
+            cue = 0
+            for block in captions:
+                if block.block_type != BlockType.CAPTION:
+                    continue
+                start = block.start_time.toTime() // 1000 if block.start_time is not None else 0
+                end = block.end_time.toTime() // 1000 if block.end_time is not None else start
+                for language, text in block.languages.items():
+                    tokens = tokenize(text, language)
+                    if not tokens:
+                        continue
+                    cue_id = self.connection.execute(
+                        "INSERT INTO cues (file, cue, language, start, end, tokens) VALUES (?, ?, ?, ?, ?, ?)",
+                        (file_id, cue, language, int(start), int(end), TOKEN_SEPARATOR.join(tokens))).lastrowid
+                    for token in set(tokens):
+                        postings.setdefault(token, array("q")).append(cue_id)
+                cue += 1
+            self.connection.executemany("INSERT INTO postings VALUES (?, ?, ?)",
+                                        ((token, file_id, ids.tobytes()) for token, ids in postings.items()))
+
+    def remove(self, filename: str) -> bool:
+        row = self._file(os.path.abspath(filename))
+        if not row:
+            return False
+        with self.connection:
+            self._delete(row[0])
+        return True
+
+    def update(self, filenames: list[str], remove_missing: bool = False) -> dict:
+        """
+        Index new and changed files.
+
+        Parameters:
+        - filenames (list[str]): Captions file names
+        - remove_missing (bool, optional): Remove indexed files that no longer exist (default is False)
+
+        Returns:
+            dict: number of indexed, skipped, failed and removed files
+        """
+        result = {"indexed": 0, "skipped": 0, "failed": 0, "removed": 0}
+        for filename in filenames:
+            try:
+                result["indexed" if self.add(filename) else "skipped"] += 1
+            except Exception as e:
+                print(f"Error {filename}: {e}")
+                result["failed"] += 1
+        if remove_missing:
+            for file_id, path in self.connection.execute("SELECT id, path FROM files").fetchall():
+                if not os.path.exists(path):
+                    with self.connection:
+                        self._delete(file_id)
+                    result["removed"] += 1
+        return result
+
+    def _postings(self, token: str, prefix: bool) -> set[int]:
+        if prefix:
+            rows = self.connection.execute("SELECT cues FROM postings WHERE token >= ? AND token < ?",
+                                           (token, token + "\U0010ffff"))
+        else:
+            rows = self.connection.execute("SELECT cues FROM postings WHERE token = ?", (token,))
+        cues = set()
+        for (data,) in rows:
+            ids = array("q")
+            ids.frombytes(data)
+            cues.update(ids)
+        return cues
+
+    def search(self, query: str, language: str = None, prefix: bool = False,
+               limit: int = None) -> list[tuple[str, int, int]]:
+        """
+        Find cues containing the words of query in this order (phrase search).
+
+        Parameters:
+        - query (str): Words or phrase, tokenized like the indexed text
+        - language (str, optional): Search only text in this language, also used to tokenize the query (default is None)
+        - prefix (bool, optional): The last word of query is a prefix (e.g. "capt" finds "captions") (default is False)
+        - limit (int, optional): Maximum number of results (default is None)
+
+        Returns:
+            list[tuple[str, int, int]]: file name, cue number (captions in file order) and start time in milliseconds,
+            sorted by file name and start time
+        """
+        tokens = tokenize(query, language)
+        if not tokens:
+            return []
+        postings = [self._postings(token, prefix and index == len(tokens) - 1) for index, token in enumerate(tokens)]
+        candidates = set.intersection(*sorted(postings, key=len))
+        results = []
+        ids = sorted(candidates)
+        for chunk in range(0, len(ids), 500):
+            part = ids[chunk:chunk + 500]
+            sql = ("SELECT files.path, cues.cue, cues.start, cues.language, cues.tokens FROM cues "
+                   f"JOIN files ON files.id = cues.file WHERE cues.id IN ({','.join('?' * len(part))})")
+            for path, cue, start, cue_language, cue_tokens in self.connection.execute(sql, part):
+                if language and cue_language != language:
+                    continue
+                if len(tokens) == 1 or _findPhrase(cue_tokens.split(TOKEN_SEPARATOR), tokens, prefix):
+                    results.append((path, cue, start))
+        results = sorted(set(results), key=lambda i: (i[0], i[2], i[1]))
+        return results[:limit] if limit else results
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(prog="PyCaptions index", description="Full-text index of caption files")
+    parser.add_argument("database", help="Index database file name.")
+    parser.add_argument("filenames", nargs="*", help="Files to index, unchanged files are skipped.")
+    parser.add_argument("-q", "--query", help="Phrase to search.")
+    parser.add_argument("-p", "--prefix", action="store_true", help="Last word of the query is a prefix.")
+    parser.add_argument("-l", "--language", help="Search only this language.")
+    parser.add_argument("-n", "--limit", type=int, help="Maximum number of results.")
+    parser.add_argument("--remove-missing", action="store_true", help="Remove indexed files that no longer exist.")
+    args = parser.parse_args(argv)
+
+    with CaptionsIndex(args.database) as index:
+        if args.filenames or args.remove_missing:
+            result = index.update(args.filenames, args.remove_missing)
+            print(", ".join(f"{key} {value}" for key, value in result.items()), file=sys.stderr)
+        if args.query:
+            for filename, cue, start in index.search(args.query, args.language, args.prefix, args.limit):
+                print(f"{filename}\t{cue}\t{start}")
+    return 0
@@ -293,7 +293,8 @@ class MicroTime:
             if begin:
                 begin = MicroTime.parseTTMLTime(begin)
             else:
-                begin = MicroTime(hours=INFINITY)
+                # begin is relative to the parent, missing begin is the start of the parent
+                begin = MicroTime()
             if end:
                 end = MicroTime.parseTTMLTime(end)
             else:
@@ -317,4 +318,4 @@ class MicroTime:
         desired_format = desired_format.lower()
         if desired_format not in MicroTime.time_formats:
             raise ValueError(f"'{desired_format}' is not valid, expected {','.join(list(MicroTime.time_formats))}")
-        MicroTime.time_formats[desired_format](*args, **kwargs)
+        return MicroTime.time_formats[desired_format](*args, **kwargs)
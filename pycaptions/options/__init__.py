@@ -14,8 +14,11 @@ save_extensions.TTML = ".xml"
 style_options = StyleOptions()
 """
 Globaly stores style options. These are default options that you can override with arguments.
+For thread-safe changes use Settings and useSettings instead.
 
 Example
 style_options.style = "full"
 style_options.lines = -1
 """
+
+from .settings import Settings, currentSettings, useSettings
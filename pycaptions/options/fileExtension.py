@@ -4,6 +4,13 @@ class FileExtensions:
     TTML = ".ttml"
     VTT = ".vtt"
 
+    def __init__(self, **extensions):
+        """
+        Extensions that differ from the defaults (e.g. FileExtensions(TTML=".xml")).
+        """
+        for key, value in extensions.items():
+            setattr(self, key, value)
+
     @classmethod
     def getvars(cls) -> dict:
         """
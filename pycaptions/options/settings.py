@@ -0,0 +1,77 @@
+import copy
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from .fileExtension import FileExtensions
+from .style import parseLines, parseStyle
+from . import save_extensions, style_options
+
+
+class Settings:
+    """
+    Immutable reader and writer configuration.
+
+    Unlike the global style_options and save_extensions it can be safely shared between threads.
+    Pass it to CaptionsFormat(settings=...) or activate it for the current context with useSettings.
+
+    Attributes:
+        style (str | None): "full" or None
+        lines (int): Number of lines per language, -1 preserves original
+        extensions (FileExtensions): File extensions used by writers
+    """
+    __slots__ = ("style", "lines", "extensions")
+
+    def __init__(self, style: str | None = "full", lines: int = -1, extensions: FileExtensions = None):
+        object.__setattr__(self, "style", parseStyle(style))
+        object.__setattr__(self, "lines", parseLines(lines))
+        object.__setattr__(self, "extensions", copy.copy(extensions or FileExtensions()))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Settings are immutable, use Settings.replace")
+
+    def __reduce__(self):
+        return (Settings, (self.style, self.lines, self.extensions))
+
+    def __repr__(self):
+        return f"Settings(style={self.style!r}, lines={self.lines!r}, extensions={vars(self.extensions)!r})"
+
+    def replace(self, **changes):
+        """
+        Returns a copy with changed values (e.g. settings.replace(lines=1)).
+        """
+        values = {"style": self.style, "lines": self.lines, "extensions": self.extensions}
+        values.update(changes)
+        return Settings(**values)
+
+
+_current_settings = ContextVar("pycaptions_settings", default=None)
+
+
+def currentSettings() -> Settings:
+    """
+    Returns settings of the current context, if none are set it uses global style_options and save_extensions.
+    """
+    settings = _current_settings.get()
+    if settings is None:
+        return Settings(style_options.style, style_options.lines, save_extensions)
+    return settings
+
+
+@contextmanager
+def useSettings(settings: Settings = None, **changes):
+    """
+    Use settings for the current context (thread or asyncio task).
+
+    Example:
+
+    with useSettings(style=None, lines=1):
+        captions.save("file", output_format="srt")
+    """
+    settings = settings or currentSettings()
+    if changes:
+        settings = settings.replace(**changes)
+    token = _current_settings.set(settings)
+    try:
+        yield settings
+    finally:
+        _current_settings.reset(token)
@@ -1,8 +1,34 @@
-from ..styling import changeStyleOption
+STYLE_OPTIONS = ["full"]
+
+
+def parseLines(value) -> int:
+    """
+    Returns a valid lines value, if the value is invalid it will default to -1.
+    """
+    if isinstance(value, int) and value >= -1:
+        return value
+    print(f"Invalid line value {value}. Expected: n >= -1")
+    return -1
+
+
+def parseStyle(value) -> str | None:
+    """
+    Returns a valid style value, if the value is invalid it will default to None.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.lower()
+        if value == "none":
+            return None
+        if value in STYLE_OPTIONS:
+            return value
+    print(f"Invalid style option {value}. Expected: none {' '.join(STYLE_OPTIONS)}")
+    return None
 
 
 class StyleOptions:
-    style_option = ["full"]
+    style_option = STYLE_OPTIONS
     style_value = "full"
     lines_value = -1
 
@@ -15,11 +41,7 @@ class StyleOptions:
 
     @lines.setter
     def lines(self, value):
-        if isinstance(value, int) and value >= -1:
-            self.lines_value = value
-        else:
-            print(f"Invalid line value {value}. Expected: n >= -1")
-            self.lines_value = -1
+        self.lines_value = parseLines(value)
 
     @property
     def style(self):
@@ -31,18 +53,4 @@ class StyleOptions:
 
     @style.setter
     def style(self, value):
-        if value == None:
-            self.style_value = None
-        elif isinstance(value, str):
-            value = value.lower()
-            if value == "none":
-                self.style_value = None
-            elif value in self.style_option:
-                self.style_value = value
-            else:
-                print(f"Invalid style option {value}. Expected: none {' '.join(self.style_option)}")
-                self.style_value = None
-        else:      
-            print(f"Invalid style option {value}. Expected: none {' '.join(self.style_option)}")
-            self.style_value = None
-        changeStyleOption(self.style_value)
\ No newline at end of file
+        self.style_value = parseStyle(value)
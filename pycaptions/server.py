@@ -0,0 +1,286 @@
+import argparse
+import asyncio
+import io
+import json
+import os
+import time
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+from .captions import Captions, _readMember
+from .options import Settings
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_QUEUE_SIZE = 64
+DEFAULT_TIMEOUT = 30.0
+MAX_BODY_SIZE = 64 * 1024 * 1024
+LATENCY_SAMPLES = 1024
+
+STATUS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    503: "Service Unavailable",
+    504: "Gateway Timeout"
+}
+
+WARMUP_SRT = "1\n00:00:01,000 --> 00:00:02,000\n<b>warm</b> up\n"
+
+
+def _warmup():
+    """
+    Worker initializer, imports and exercises parsers so the first request does not pay for it.
+    """
+    import budoux  # noqa: F401
+    import cssutils  # noqa: F401
+    import lxml  # noqa: F401
+
+    for output_format in ("vtt", "ttml"):
+        _convertPayload(WARMUP_SRT.encode("UTF-8"), "srt", output_format, None, {"style": "full"})
+
+
+def _ping():
+    return os.getpid()
+
+
+def _convertPayload(data: bytes, input_format: str | None, output_format: str, languages: list[str] | None,
+                    options: dict) -> bytes:
+    encoding = options.get("encoding") or "UTF-8"
+    settings = Settings(options.get("style", "full"), options.get("lines", -1))
+    member = "payload." + ".".join((languages or []) + [input_format or "txt"])
+    captions = _readMember(member, data, {"settings": settings, "encoding": encoding})
+    if not captions.fileFormat:
+        raise ValueError("Unknown input format")
+    output = io.StringIO()
+    if not captions.save(None, languages, output_format, stream=output):
+        raise ValueError(f"Could not convert to {output_format}")
+    return output.getvalue().encode(encoding)
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str = None):
+        super().__init__(message or STATUS[status])
+        self.status = status
+
+
+class ConversionServer:
+    """
+    Local HTTP conversion server.
+
+    Conversions run in a pre-warmed process pool. Requests wait in a bounded
+    queue, when it is full new requests are rejected with 503 (backpressure).
+
+    Endpoints:
+     - POST /convert?to=vtt[&from=srt][&languages=en,es][&style=none][&lines=1]: body is converted
+     - GET /stats: JSON statistics
+     - GET /health
+
+    Example:
+
+    server = ConversionServer(port=8765, workers=4)
+    asyncio.run(server.serve_forever())
+    """
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, path: str = None, workers: int = None,
+                 queue_size: int = DEFAULT_QUEUE_SIZE, timeout: float = DEFAULT_TIMEOUT):
+        """
+        Parameters:
+        - host (str, optional): Host to listen on (default is "127.0.0.1")
+        - port (int, optional): TCP port, 0 picks a free port (default is 8765)
+        - path (str, optional): Listen on this unix socket instead of TCP
+        - workers (int, optional): Number of worker processes (default is os.cpu_count())
+        - queue_size (int, optional): Maximum number of waiting requests
+        - timeout (float, optional): Seconds a request may wait and run before 504 is returned
+        """
+        self.host = host
+        self.port = port
+        self.path = path
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.executor = None
+        self.server = None
+        self.queue = None
+        self.dispatchers = []
+        self.started = None
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.counters = {"requests": 0, "completed": 0, "failed": 0, "rejected": 0, "timeouts": 0}
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_warmup)
+        # start all workers now instead of on the first requests
+        await asyncio.gather(*(loop.run_in_executor(self.executor, _ping) for _ in range(self.workers)))
+        self.queue = asyncio.Queue(self.queue_size)
+        self.dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+        if self.path:
+            self.server = await asyncio.start_unix_server(self._handle, path=self.path)
+        else:
+            self.server = await asyncio.start_server(self._handle, self.host, self.port)
+            self.port = self.server.sockets[0].getsockname()[1]
+        self.started = time.monotonic()
+
+    async def stop(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        for task in self.dispatchers:
+            task.cancel()
+        await asyncio.gather(*self.dispatchers, return_exceptions=True)
+        if self.executor:
+            self.executor.shutdown(cancel_futures=True)
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"Serving on {self.path or f'http://{self.host}:{self.port}'} with {self.workers} workers")
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.stop()
+
+    def stats(self) -> dict:
+        latencies = sorted(self.latencies)
+
+        def percentile(value):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * value))] if latencies else 0.0
+
+        return {
+            **self.counters,
+            "queued": self.queue.qsize() if self.queue else 0,
+            "queue_size": self.queue_size,
+            "workers": self.workers,
+            "uptime": time.monotonic() - self.started if self.started else 0.0,
+            "latency": {
+                "mean": sum(latencies) / len(latencies) if latencies else 0.0,
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": latencies[-1] if latencies else 0.0
+            }
+        }
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            args, result = await self.queue.get()
+            try:
+                # requests that timed out while waiting are not converted
+                if result.done():
+                    continue
+                try:
+                    value = await loop.run_in_executor(self.executor, _convertPayload, *args)
+                except Exception as e:
+                    if not result.done():
+                        result.set_exception(e)
+                else:
+                    if not result.done():
+                        result.set_result(value)
+            finally:
+                self.queue.task_done()
+
+    async def convert(self, data: bytes, input_format: str | None, output_format: str,
+                      languages: list[str] | None, options: dict) -> bytes:
+        """
+        Queue a conversion, raises HTTPError 503 if the queue is full and 504 on timeout.
+        """
+        result = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait(((data, input_format, output_format, languages, options), result))
+        except asyncio.QueueFull:
+            self.counters["rejected"] += 1
+            raise HTTPError(503, "Queue is full")
+        try:
+            return await asyncio.wait_for(result, self.timeout)
+        except asyncio.TimeoutError:
+            self.counters["timeouts"] += 1
+            raise HTTPError(504, "Conversion timed out")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        start = time.perf_counter()
+        status, body, content_type = 200, b"", "text/plain; charset=utf-8"
+        try:
+            method, target, headers = await self._readHead(reader)
+            url = urlsplit(target)
+            query = {key: value[-1] for key, value in parse_qs(url.query).items()}
+            if url.path == "/health":
+                body = b"ok"
+            elif url.path == "/stats":
+                body = json.dumps(self.stats()).encode("UTF-8")
+                content_type = "application/json"
+            elif url.path == "/convert":
+                if method != "POST":
+                    raise HTTPError(405)
+                self.counters["requests"] += 1
+                body = await self._convertRequest(reader, headers, query)
+                self.counters["completed"] += 1
+                self.latencies.append(time.perf_counter() - start)
+            else:
+                raise HTTPError(404)
+        except HTTPError as e:
+            status, body = e.status, str(e).encode("UTF-8")
+            if e.status not in (404, 405, 503, 504):
+                self.counters["failed"] += 1
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        except Exception as e:
+            self.counters["failed"] += 1
+            status, body = 400, f"Error {e}".encode("UTF-8")
+        try:
+            writer.write(f"HTTP/1.1 {status} {STATUS[status]}\r\nContent-Type: {content_type}\r\n"
+                         f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("ascii") + body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _readHead(reader: asyncio.StreamReader) -> tuple[str, str, dict]:
+        request_line = (await reader.readline()).decode("latin-1").split()
+        if len(request_line) != 3:
+            raise HTTPError(400, "Invalid request line")
+        headers = dict()
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            key, _, value = line.partition(":")
+            headers[key.strip().lower()] = value.strip()
+        return request_line[0].upper(), request_line[1], headers
+
+    async def _convertRequest(self, reader: asyncio.StreamReader, headers: dict, query: dict) -> bytes:
+        output_format = (query.get("to") or "").lstrip(".").lower()
+        if output_format not in Captions.savers:
+            raise HTTPError(400, f"Incorect output format {output_format}")
+        length = int(headers.get("content-length") or 0)
+        if length > MAX_BODY_SIZE:
+            raise HTTPError(413)
+        data = await reader.readexactly(length)
+        languages = [i for i in query.get("languages", "").split(",") if i] or None
+        options = {"style": None if query.get("style", "full").lower() == "none" else "full",
+                   "lines": int(query.get("lines", -1)), "encoding": query.get("encoding") or "UTF-8"}
+        return await self.convert(data, query.get("from"), output_format, languages, options)
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(prog="pycaptions serve", description="Local captions conversion server")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Host to listen on (default is {DEFAULT_HOST}).")
+    parser.add_argument("-p", "--port", type=int, default=DEFAULT_PORT, help=f"TCP port (default is {DEFAULT_PORT}).")
+    parser.add_argument("-u", "--unix-socket", help="Listen on unix socket path instead of TCP.")
+    parser.add_argument("-w", "--workers", type=int, help="Number of worker processes (default is number of CPUs).")
+    parser.add_argument("-q", "--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help=f"Maximum number of waiting requests (default is {DEFAULT_QUEUE_SIZE}).")
+    parser.add_argument("-t", "--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help=f"Request timeout in seconds (default is {DEFAULT_TIMEOUT}).")
+    args = parser.parse_args(argv)
+
+    server = ConversionServer(args.host, args.port, args.unix_socket, args.workers, args.queue_size, args.timeout)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    return 0
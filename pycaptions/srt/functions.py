@@ -1,9 +1,11 @@
 import io
 
 from ..development import Block, BlockType, captionsDetector, captionsReader, captionsWriter
+from ..development.cueIndex import decodeCues
+from ..development.parallel import readParallel
 from ..microTime import MicroTime as MT
 
-from ..styling import Styling
+from ..styling import getStyling
 
 
 @staticmethod
@@ -27,14 +29,14 @@ def convertFromSRTLayout(self, id, layout, width, height):
         print(f"Error converting layout: Excpected 4 arguments got {len(layout)}")
         return
     for i, v in enumerate(["X1", "X2", "Y1", "Y2"]):
-        if layout[i][2:] != v:
-            print(f"Error converting layout: Invalid field at position {i} expected {v} got {layout[0][2:]}")
+        if layout[i][:2] != v:
+            print(f"Error converting layout: Invalid field at position {i} expected {v} got {layout[i][:2]}")
             return
     try:
-        x1 = int(layout[0][3:])
-        x2 = int(layout[1][3:])
-        y1 = int(layout[2][3:])
-        y2 = int(layout[3][3:])
+        x1 = float(layout[0][3:])
+        x2 = float(layout[1][3:])
+        y1 = float(layout[2][3:])
+        y2 = float(layout[3][3:])
         self.addLayout(id, Block(BlockType.LAYOUT, id=id, layout={
                 "width": (x2-x1) / width,
                 "height": (y2-y1) / height,
@@ -63,11 +65,21 @@ def readSRT(self, content: str | io.IOBase, languages: list[str] = None, **kwarg
     kwargs:
      - media_width (int, optional): Used for extended SRT coordinates conversion
      - media_height (int, optional): Used for extended SRT coordinates conversion
+     - style (str, optional): Style option used for reading (default is from settings)
+     - workers (int, optional): Parse cues in parallel using this many processes, for very large files
+     - executor (Executor, optional): Executor used with workers instead of a new process pool
     """
+    if kwargs.get("workers") or kwargs.get("executor"):
+        readParallel(self, content, readSRTCues, languages, **kwargs)
+    else:
+        readSRTCues(self, content, languages, **kwargs)
+
+
+def readSRTCues(self, content: io.IOBase, languages: list[str], **kwargs):
     width = kwargs.get("media_width") or self.media_width
     height = kwargs.get("media_height") or self.media_height
+    Styling = getStyling(kwargs["style"] if "style" in kwargs else self.getSettings().style)
 
-    counter = 0
     id = content.readline()
     while id:
         start, end = content.readline().split(" --> ")
@@ -77,6 +89,7 @@ def readSRT(self, content: str | io.IOBase, languages: list[str] = None, **kwarg
                         MT.fromSRTTime(end[0]))
         if len(end) == 2:
             convertFromSRTLayout(self, id.strip(), end[1], width, height)
+        counter = 0
         line = content.readline().strip()
         while line:
             if len(languages) > 1:
@@ -89,6 +102,39 @@ def readSRT(self, content: str | io.IOBase, languages: list[str] = None, **kwarg
         id = content.readline()
 
 
+def readSRTMapped(self, data: bytes, languages: list[str], encoding: str = "UTF-8", start: int = 0,
+                  end: int = None, **kwargs):
+    """
+    Reads SRT cues from raw bytes (e.g. a memory-mapped file), timing lines are parsed on bytes.
+
+    Parameters:
+    - data (bytes | mmap.mmap): File content
+    - languages (list[str]): List of languages
+    - encoding (str, optional): Encoding of the cue text (default is "UTF-8")
+    - start (int, optional): Byte offset of the first cue (default is 0)
+    - end (int, optional): Byte offset after the last cue (default is end of data)
+    """
+    width = kwargs.get("media_width") or self.media_width
+    height = kwargs.get("media_height") or self.media_height
+    Styling = getStyling(kwargs["style"] if "style" in kwargs else self.getSettings().style)
+
+    for id, settings, start_time, end_time, text in decodeCues(data, encoding, start, end):
+        caption = Block(BlockType.CAPTION, languages[0], MT.fromTime(start_time), MT.fromTime(end_time))
+        if settings:
+            convertFromSRTLayout(self, id, settings, width, height)
+        counter = 0
+        for line in text.split("\n"):
+            line = line.strip()
+            if not line:
+                break
+            if len(languages) > 1:
+                caption.append(Styling.fromSRT(line), languages[counter])
+                counter += 1
+            else:
+                caption.append(Styling.fromSRT(line), languages[0])
+        self.append(caption)
+
+
 @captionsWriter("SRT", "getSRT")
 def saveSRT(self, filename: str, languages: list[str] = None, generator: list = None,
             file: io.FileIO = None, **kwargs):
@@ -17,11 +17,22 @@ class NoStyle(StyleFormat):
     from .vtt.style import fromVTTunstyled as fromVTT, getVTT
 
 
-def changeStyleOption(style):
+def getStyling(style: str | None):
+    """
+    Returns styling class used by readers for the style option.
+    """
     if style == "full":
-        Styling = FullStyle
-    else:
-        Styling = NoStyle
+        return FullStyle
+    return NoStyle
+
+
+def changeStyleOption(style):
+    """
+    Changes the global default style, same as style_options.style = style.
+    """
+    from .options import style_options
+
+    style_options.style = style
 
 
 Styling = FullStyle
@@ -4,7 +4,7 @@ import langcodes
 
 from ..development import Block, BlockType, captionsDetector, captionsReader, captionsWriter
 from ..microTime import MicroTime as MT
-from ..styling import Styling
+from ..styling import getStyling
 
 
 PATTERN = r"\{.*?\}"
@@ -30,6 +30,7 @@ def readSUB(self, content: str | io.IOBase, languages: list[str] = None, **kwarg
     if not self.options.get("frame_rate"):
         self.options["frame_rate"] = kwargs.get("frame_rate") or 25
     frame_rate = kwargs.get("frame_rate") or self.options.get("frame_rate")
+    Styling = getStyling(kwargs["style"] if "style" in kwargs else self.getSettings().style)
 
     if not self.options.get("blocks"):
         self.options["blocks"] = []
@@ -2,6 +2,7 @@ import io
 
 from bs4 import BeautifulSoup
 from ..development import Block, BlockType, captionsDetector, captionsReader, captionsWriter
+from ..development.timing import mergeTracks
 from ..microTime import MicroTime as MT
 
 
@@ -41,10 +42,13 @@ def readTTML(self, content: str | io.IOBase, languages: list[str] = None, **kwar
         if content.tt.get("xml:lang"):
             languages = [content.tt.get("xml:lang")]
             self.setDefaultLanguage(languages[0])
+    first = len(self._block_list)
     for index, langs in enumerate(content.body.find_all("div")):
         lang = langs.get("xml:lang")
+        # divs after the first are merged by time, languages may be segmented differently
+        track = []
         p_start, p_end = MT.fromTTMLTime(langs.get("begin"), langs.get("dur"), langs.get("end"))
-        for block, line in enumerate(langs.find_all("p")):
+        for line in langs.find_all("p"):
             start, end = MT.fromTTMLTime(line.get("begin"), line.get("dur"), line.get("end"))
             start += p_start
             end += p_start
@@ -53,11 +57,8 @@ def readTTML(self, content: str | io.IOBase, languages: list[str] = None, **kwar
                 end = p_end
             elif end > p_end:
                 end = p_end
-            
-            if index == 0:
-                caption = Block(BlockType.CAPTION, start_time=start, end_time=end)
-            else:
-                caption = self[block]
+
+            caption = Block(BlockType.CAPTION, start_time=start, end_time=end)
             for lang_index, text in enumerate(line.get_text().strip().split("\n")):
                 if len(languages) > 1:
                     caption.append(text, lang or languages[lang_index])
@@ -65,6 +66,10 @@ def readTTML(self, content: str | io.IOBase, languages: list[str] = None, **kwar
                     caption.append(text, lang or languages[0])
             if index == 0:
                 self.append(caption)
+            else:
+                track.append(caption)
+        if track:
+            self._block_list[first:] = mergeTracks(self._block_list[first:], track)
 
 
 @captionsWriter("TTML", "getTTML", "<br/>")
@@ -2,6 +2,9 @@ import io
 import re
 
 from ..development import Block, BlockType, captionsDetector, captionsReader, captionsWriter
+from ..development.cueIndex import decodeCues, scanCues
+from ..development.parallel import readParallel
+from ..development.stats import count
 from ..microTime import MicroTime as MT
 
 
@@ -24,6 +27,25 @@ def detectVTT(content: str | io.IOBase) -> bool:
 
 @captionsReader
 def readVTT(self, content: str | io.IOBase, languages: list[str] = None, **kwargs):
+    """
+    kwargs:
+     - workers (int, optional): Parse cues in parallel using this many processes, for very large files
+     - executor (Executor, optional): Executor used with workers instead of a new process pool
+    """
+    line = readVTTHeader(self, content)
+    if kwargs.get("workers") or kwargs.get("executor"):
+        readParallel(self, io.StringIO(line + "\n" + content.read()), readVTTCues, languages, **kwargs)
+    else:
+        readVTTCues(self, content, languages, line)
+
+
+def readVTTHeader(self, content: io.IOBase) -> str:
+    """
+    Reads metadata, style, region and comment blocks before the first cue.
+
+    Returns:
+        str: the first line of the first cue
+    """
     metadata = Block(BlockType.METADATA, id="default")
     content.readline()
     line = content.readline().strip()
@@ -58,7 +80,9 @@ def readVTT(self, content: str | io.IOBase, languages: list[str] = None, **kwarg
             def replace_style(match):
                 if match.group(1).startswith("#"):
                     if match.group(1) in self.options["style_metadata"]["identifier_to_new"]:
+                        count("style_cache_hits")
                         return self.options["style_metadata"]["identifier_to_new"][match.group(1)]
+                    count("style_cache_misses")
                     self.options["style_metadata"]["style_id_counter"] += 1
                     style_name = f"#style{self.options['style_metadata']['style_id_counter']}"
                     self.options["style_metadata"]["identifier_to_original"][style_name] = match.group(1)
@@ -88,7 +112,12 @@ def readVTT(self, content: str | io.IOBase, languages: list[str] = None, **kwarg
         else:
             break
         line = content.readline()
+    return line
+
 
+def readVTTCues(self, content: io.IOBase, languages: list[str], line: str = None, **kwargs):
+    if line is None:
+        line = content.readline()
     while line:
         if line.startswith("NOTE"):
             temp = line.split(" ", 1)
@@ -105,13 +134,13 @@ def readVTT(self, content: str | io.IOBase, languages: list[str] = None, **kwarg
             if "-->" not in line:
                 caption.options["id"] = line.strip()
                 line = content.readline().strip()
-            start, end = line.split(" --> ", 1)
+            start, end = line.strip().split(" --> ", 1)
             end = end.split(" ", 1)
             if len(end) > 1:
                 caption.options["style"] = end[1]
             caption.start_time = MT.fromVTTTime(start)
             caption.end_time = MT.fromVTTTime(end[0])
-            counter = 1
+            counter = 0
             line = content.readline().strip()
             if line.startswith("{"):
                 caption.block_type = BlockType.METADATA
@@ -126,6 +155,57 @@ def readVTT(self, content: str | io.IOBase, languages: list[str] = None, **kwarg
         line = content.readline()
 
 
+def readVTTMapped(self, data: bytes, languages: list[str], encoding: str = "UTF-8", start: int = None,
+                  end: int = None, **kwargs):
+    """
+    Reads WebVTT from raw bytes (e.g. a memory-mapped file), timing lines are parsed on bytes.
+
+    Parameters:
+    - data (bytes | mmap.mmap): File content
+    - languages (list[str]): List of languages
+    - encoding (str, optional): Encoding of the cue text (default is "UTF-8")
+    - start (int, optional): Byte offset of the first cue (default is the first cue after the header)
+    - end (int, optional): Byte offset after the last cue (default is end of data)
+    """
+    first_cue = next(scanCues(data), None)
+    header_end = first_cue[0] if first_cue else len(data)
+    readVTTHeader(self, io.StringIO(str(data[:header_end], encoding)))
+
+    for id, settings, start_time, end_time, text in decodeCues(data, encoding, start or header_end, end):
+        caption = Block(BlockType.CAPTION)
+        if id:
+            caption.options["id"] = id
+        if settings:
+            caption.options["style"] = settings
+        caption.start_time = MT.fromTime(start_time)
+        caption.end_time = MT.fromTime(end_time)
+        lines = iter(text.split("\n"))
+        counter = 0
+        line = next(lines, "").strip()
+        if line.startswith("{"):
+            caption.block_type = BlockType.METADATA
+        while line:
+            if len(languages) > 1:
+                caption.append(line, languages[counter])
+                counter += 1
+            else:
+                caption.append(line, languages[0])
+            line = next(lines, "").strip()
+        self.append(caption)
+
+        for line in lines:
+            if line.startswith("NOTE"):
+                temp = line.strip().split(" ", 1)
+                comment = Block(BlockType.COMMENT)
+                if len(temp) > 1:
+                    comment.append(temp[1])
+                line = next(lines, "").strip()
+                while line:
+                    comment.append(line)
+                    line = next(lines, "").strip()
+                self.append(comment)
+
+
 @captionsWriter("VTT", "getVTT")
 def saveVTT(self, filename: str, languages: list[str] = None, generator: list = None, 
             file: io.FileIO = None, **kwargs):
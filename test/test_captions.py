@@ -1,8 +1,35 @@
 import unittest
+import unittest.mock
+import asyncio
+import contextlib
+import threading
+import gzip
+import io
 import json
 import os
 import shutil
-from pycaptions import Captions, save_extensions, style_options
+import sys
+import tarfile
+import zipfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pycaptions import (Captions, save_extensions, style_options, Settings, useSettings, convert, ConversionCache,
+                        convert_archive, convert_stream, diff, apply_patch, CaptionsIndex)
+from pycaptions.development import sniffFormat, ParseCache, JsonStreamReader, CueIndex
+from pycaptions.development.serialization import dumpCaptions, dumpJson
+from pycaptions.microTime import MicroTime as MT
+from pycaptions import aio
+from pycaptions.server import ConversionServer
+from pycaptions import cli
+import urllib.request
+import urllib.error
+from pycaptions.options import currentSettings
+from pycaptions.development import Block, BlockType, MemoryTrace, Stats
+from pycaptions.development.timing import normalizeStream
+from pycaptions.development.stats import currentStats
+from pycaptions.development.text import get_phrases
+from pycaptions.development.language import COMMON_LANGUAGES
+from langcodes import standardize_tag
 
 
 IGNORE_JSON_FIELDS = ["filename"]
@@ -103,5 +130,684 @@ class TestCaptions(unittest.TestCase):
                     c.save(_out, ["en", "es"], output_format=ext, lines=1)
                     self.assertFalse(self.check_file_size(c.makeFilename(_out,ext, ["en","es"])), ext)
 
+    def test_sniff(self):
+        expected = {"test.en.srt": "srt", "test.en.sub": "sub", "test.en.vtt": "vtt",
+                    "test.ttml": "ttml", "test.sami": "sami"}
+        for filename, format in expected.items():
+            with open(TEST_FILES_PATH+filename, encoding="UTF-8") as f:
+                self.assertEqual(sniffFormat(f.read(), filename)[0], format)
+
+    def test_sniff_pipe(self):
+        with open(TEST_FILES_PATH+TEST_FILES[0], "rb") as f:
+            data = f.read()
+        read_fd, write_fd = os.pipe()
+        os.write(write_fd, data)
+        os.close(write_fd)
+        with os.fdopen(read_fd, "r", encoding="UTF-8") as stream:
+            c = Captions()
+            c.read(stream)
+        self.assertEqual(c.fileFormat, "srt")
+        with Captions(TEST_FILES_PATH+TEST_FILES[0]) as original:
+            self.assertEqual(len(c), len(original))
+
+    def test_common_languages(self):
+        for tag, standardized in COMMON_LANGUAGES.items():
+            self.assertEqual(standardize_tag(tag, macro=True), standardized, tag)
+        self.assertEqual(Captions.getLanguagesFromFilename("path/test.en.es.srt"), ["en", "es"])
+        self.assertEqual(Captions.getFilename("path/test.en.es.srt"), os.path.join("path", "test"))
+
+    def test_parallel_read(self):
+        with open(TEST_FILES_PATH+TEST_FILES[0], encoding="UTF-8") as f:
+            content = f.read()
+        serial = Captions()
+        serial.read(content)
+        parallel = Captions()
+        parallel.read(content, workers=2, chunk_size=100)
+        self.assertEqual(len(serial), len(parallel))
+        self.assertEqual(serial.time_length, parallel.time_length)
+        for a, b in zip(serial, parallel):
+            self.assertEqual(a.start_time, b.start_time)
+            self.assertEqual(dict(a.languages), dict(b.languages))
+
+        content = "".join(f"{i}\n00:00:{i:02},000 --> 00:00:{i+1:02},000 X1:100 X2:300 Y1:50 Y2:150\nLine {i}\n\n"
+                          for i in range(1, 20))
+        serial = Captions(media_width=640, media_height=360)
+        serial.read(content)
+        parallel = Captions(media_width=640, media_height=360)
+        parallel.read(content, workers=2, chunk_size=100)
+        self.assertEqual(serial.getLayoutById("1").options["layout"]["width"], 200 / 640)
+        self.assertEqual([i.options for i in serial.getLayout()], [i.options for i in parallel.getLayout()])
+
+    def test_settings(self):
+        settings = Settings(style="none", lines=1)
+        self.assertIsNone(settings.style)
+        with self.assertRaises(AttributeError):
+            settings.lines = 2
+
+        def convert(style):
+            with useSettings(style=style):
+                with Captions(TEST_FILES_PATH+TEST_FILES[0], encoding="auto") as c:
+                    return c[0].languages["en"]
+
+        styles = ["full", None]*4
+        with ThreadPoolExecutor(4) as pool:
+            results = list(pool.map(convert, styles))
+        for style, text in zip(styles, results):
+            self.assertEqual("<span" in text, style == "full")
+
+    def test_parse_cache(self):
+        cache = ParseCache("tmp/cache")
+        for filename in TEST_FILES:
+            with Captions(TEST_FILES_PATH+filename, cache=cache) as parsed:
+                pass
+            with Captions(TEST_FILES_PATH+filename, cache=cache) as cached:
+                pass
+            self.assertEqual(dumpCaptions(parsed), dumpCaptions(cached))
+        self.assertEqual(cache.hits, len(TEST_FILES))
+
+        os.makedirs("tmp/cache_languages", exist_ok=True)
+        for language in ("en", "es"):
+            shutil.copy(TEST_FILES_PATH+"test.en.srt", f"tmp/cache_languages/test.{language}.srt")
+        for language in ("en", "es"):
+            with Captions(f"tmp/cache_languages/test.{language}.srt", cache=cache) as cached:
+                self.assertEqual(cached.default_language, language)
+                self.assertEqual(list(cached[0].languages), [language])
+
+        with open("tmp/cache_languages/layout.en.srt", "w", encoding="UTF-8") as f:
+            f.write("1\n00:00:01,000 --> 00:00:02,000 X1:100 X2:500 Y1:50 Y2:150\nLine\n")
+        for _ in range(2):
+            for width in (1920, 640):
+                with Captions("tmp/cache_languages/layout.en.srt", cache=cache, media_width=width) as cached:
+                    self.assertEqual(cached.media_width, width)
+                    self.assertEqual(cached.getLayoutById("1").options["layout"]["width"], 400 / width)
+
+    def test_conversion_cache(self):
+        cache = ConversionCache("tmp/conversion_cache")
+        outputs = []
+        for _ in range(3):
+            self.assertTrue(convert(TEST_FILES_PATH+TEST_FILES[0], "tmp/converted", "vtt", cache=cache, lines=1))
+            with open("tmp/converted.en.vtt", encoding="UTF-8") as f:
+                outputs.append(f.read())
+        self.assertEqual(len(set(outputs)), 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+        self.assertEqual(cache.stats()["hits"], 2)
+
+        disk = ConversionCache("tmp/conversion_cache")
+        self.assertTrue(convert(TEST_FILES_PATH+TEST_FILES[0], "tmp/converted", "vtt", cache=disk, lines=1))
+        self.assertEqual(disk.stats()["disk_hits"], 1)
+        with open("tmp/converted.en.vtt", encoding="UTF-8") as f:
+            self.assertEqual(f.read(), outputs[0])
+
+        disk.store.evict()
+        size = disk.store._size
+        for _ in range(3):
+            disk.set("otest", "en", b"x" * 100)
+        self.assertEqual(disk.store._size, size + len(b"en\n") + 100)
+
+        with unittest.mock.patch.dict(os.environ, {"PYCAPTIONS_CACHE_DIR": "tmp/default_cache"}):
+            self.assertNotEqual(ParseCache().store.directory, ConversionCache().store.directory)
+
+    def test_json_v1(self):
+        for filename in TEST_FILES:
+            name = filename.split('.')[-1]
+            with Captions(TEST_FILES_PATH+filename, encoding="auto") as c:
+                c.toJson(f"tmp/v1_{name}", json_version=1)
+                c.toJson(f"tmp/v2_{name}")
+            with Captions(f"tmp/v1_{name}.json") as c:
+                c.toJson(f"tmp/v1_to_v2_{name}")
+            self.compare_json_ignore_field(f"tmp/v2_{name}.json", f"tmp/v1_to_v2_{name}.json", IGNORE_JSON_FIELDS)
+
+    def test_json_stream(self):
+        with Captions(TEST_FILES_PATH+"test.en.srt") as c:
+            with open("tmp/stream.json", "w", encoding="UTF-8") as f:
+                json.dump(dumpJson(c, "stream", chunk_size=2), f)
+            expected = dumpCaptions(c)["block_list"]
+        with open("tmp/stream.json", encoding="UTF-8") as f:
+            reader = JsonStreamReader(f, buffer_size=7)
+            self.assertEqual(reader.header()["json_version"], 2)
+            self.assertEqual(sum(chunk["count"] for chunk in reader.chunks()), len(c))
+        streamed = Captions()
+        streamed.fromJson("tmp/stream.json")
+        self.assertEqual(dumpCaptions(streamed)["block_list"], expected)
+
+        start, end = MT(seconds=20), MT(seconds=40)
+        ranged = Captions()
+        ranged.fromJson("tmp/stream.json", start_time=start, end_time=end)
+        self.assertTrue(0 < len(ranged) < len(c))
+        self.assertEqual([str(block) for block in ranged],
+                         [str(block) for block in c if block.end_time.toTime() > start.toTime()
+                          and block.start_time.toTime() < end.toTime()])
+
+    def test_load_range(self):
+        start, end = MT(seconds=20), MT(seconds=40)
+        for filename in ["test.en.srt", "test.en.vtt"]:
+            shutil.copy(TEST_FILES_PATH+filename, "tmp/"+filename)
+            if os.path.exists(f"tmp/{filename}.pcidx"):
+                os.remove(f"tmp/{filename}.pcidx")
+            with Captions("tmp/"+filename) as c:
+                expected = [str(block) for block in c if block.block_type == BlockType.CAPTION
+                            and block.end_time > start and block.start_time < end]
+            ranged = Captions.load_range("tmp/"+filename, start, end)
+            self.assertEqual([str(block) for block in ranged if block.block_type == BlockType.CAPTION], expected)
+            self.assertIsNotNone(CueIndex.load("tmp/"+filename))
+            self.assertEqual(len(Captions.load_range("tmp/"+filename)), len(c))
+
+        with open("tmp/test.en.srt", "a", encoding="UTF-8") as f:
+            f.write("\n\n12\n00:01:10,000 --> 00:01:12,000\nAppended\n")
+        self.assertIsNone(CueIndex.load("tmp/test.en.srt"))
+        ranged = Captions.load_range("tmp/test.en.srt", MT(minutes=1, seconds=5))
+        self.assertEqual(ranged[-1].languages["en"], "Appended")
+
+    def test_mmap_read(self):
+        for filename in ["test.en.srt", "test.en.es.srt", "test.en.vtt"]:
+            with Captions(TEST_FILES_PATH+filename) as c:
+                expected = [(block.block_type, str(block.start_time), dict(block.languages)) for block in c]
+            with Captions(TEST_FILES_PATH+filename, mmap=True) as c:
+                self.assertEqual([(block.block_type, str(block.start_time), dict(block.languages)) for block in c],
+                                 expected)
+                self.assertEqual(c.fileFormat, filename.split(".")[-1])
+        with Captions(TEST_FILES_PATH+"test.ttml", mmap=True) as c:
+            self.assertEqual(c.fileFormat, "ttml")
+            self.assertTrue(len(c))
+
+    def test_compression(self):
+        with Captions(TEST_FILES_PATH+"test.en.srt") as c:
+            expected = dumpCaptions(c)["block_list"]
+            c.save("tmp/compressed.srt.gz")
+            c.save("tmp/compressed", output_format="vtt", compression="xz")
+            c.save("tmp/uncompressed", output_format="srt")
+            c.save("tmp/uncompressed", output_format="vtt")
+            c.toJson("tmp/compressed.json.bz2")
+        self.assertTrue(os.path.exists("tmp/compressed.en.srt.gz"))
+        for extension in ["srt.gz", "vtt.xz"]:
+            with Captions("tmp/compressed.en."+extension) as c:
+                self.assertEqual(c.default_language, "en")
+                with Captions("tmp/uncompressed.en."+extension[:3]) as u:
+                    self.assertEqual(dumpCaptions(c)["block_list"], dumpCaptions(u)["block_list"])
+        with Captions("tmp/compressed.json.bz2") as c:
+            self.assertEqual(dumpCaptions(c)["block_list"], expected)
+
+        with open(TEST_FILES_PATH+"test.en.srt", "rb") as f, gzip.open("tmp/magic.en.srt", "wb") as out:
+            out.write(f.read())
+        with Captions("tmp/magic.en.srt") as c:
+            self.assertEqual(dumpCaptions(c)["block_list"], expected)
+
+    def test_archive(self):
+        with zipfile.ZipFile("tmp/pack.zip", "w") as archive:
+            for filename in ["test.en.srt", "test.es.srt", "test.en.vtt"]:
+                archive.write(TEST_FILES_PATH+filename, "pack/"+filename)
+            archive.writestr("pack/readme.txt", "not captions")
+        expected = dict()
+        for filename in ["test.en.srt", "test.es.srt", "test.en.vtt"]:
+            with Captions(TEST_FILES_PATH+filename) as c:
+                expected["pack/"+filename] = (c.fileFormat, c.default_language, dumpCaptions(c)["block_list"])
+
+        for workers in [1, 2]:
+            result = {member: (c.fileFormat, c.default_language, dumpCaptions(c)["block_list"])
+                      for member, c in Captions.open_archive("tmp/pack.zip", workers=workers)}
+            self.assertEqual(result, expected)
+
+        self.assertEqual(convert_archive("tmp/pack.zip", "tmp/pack.tar.gz", "vtt", workers=2), 3)
+        with tarfile.open("tmp/pack.tar.gz") as archive:
+            self.assertEqual(archive.getnames(), ["pack/test.en.vtt", "pack/test.es.vtt", "pack/test.en.1.vtt"])
+        result = {member: (c.fileFormat, c.default_language)
+                  for member, c in Captions.open_archive("tmp/pack.tar.gz", workers=1)}
+        self.assertEqual(result, {"pack/test.en.vtt": ("vtt", "en"), "pack/test.es.vtt": ("vtt", "es"),
+                                  "pack/test.en.1.vtt": ("vtt", "en")})
+
+        with tarfile.open("tmp/collisions.tar", "w") as archive:
+            for filename in ["test.en.vtt", "test.en.srt", "test.en.vtt", "test.en.sub", "test.en.vtt"]:
+                archive.add(TEST_FILES_PATH+filename, filename)
+        self.assertEqual(convert_archive("tmp/collisions.tar", "tmp/collisions.zip", "vtt", workers=1), 5)
+        with zipfile.ZipFile("tmp/collisions.zip") as archive:
+            self.assertEqual(archive.namelist(), ["test.en.vtt", "test.en.srt.vtt", "test.en.1.vtt",
+                                                  "test.en.sub.vtt", "test.en.2.vtt"])
+
+        with zipfile.ZipFile("tmp/bad.zip", "w") as archive:
+            archive.writestr("bad.en.srt", "1\n00:00:01,000 --> 00:00:02,000\nCaf\xe9\n".encode("latin-1"))
+            archive.write(TEST_FILES_PATH+"test.en.srt", "test.en.srt")
+        for workers in [1, 2]:
+            with contextlib.redirect_stdout(io.StringIO()) as messages:
+                self.assertEqual(convert_archive("tmp/bad.zip", "tmp/bad_out.zip", "vtt", workers=workers), 1)
+                formats = {member: c.fileFormat for member, c in Captions.open_archive("tmp/bad.zip", workers=workers)}
+            self.assertIn("Error converting bad.en.srt", messages.getvalue())
+            with zipfile.ZipFile("tmp/bad_out.zip") as archive:
+                self.assertEqual(archive.namelist(), ["test.en.vtt"])
+            self.assertEqual(formats, {"bad.en.srt": None, "test.en.srt": "srt"})
+
+    def test_async(self):
+        running = []
+        started = []
+        release = threading.Event()
+
+        def job(index):
+            started.append(index)
+            running.append(index)
+            release.wait(5)
+            running.remove(index)
+            return len(running)
+
+        async def main():
+            c = await Captions.aload(TEST_FILES_PATH+"test.en.srt")
+            self.assertEqual(c.fileFormat, "srt")
+            self.assertTrue(await c.asave("tmp/async", output_format="vtt"))
+            self.assertTrue(await aio.aconvert(TEST_FILES_PATH+"test.en.srt", "tmp/aconvert", "vtt"))
+            with useSettings(lines=1):
+                self.assertEqual(await aio.run(lambda: currentSettings().lines), 1)
+
+            aio.configure(concurrency=2)
+            tasks = [asyncio.ensure_future(aio.run(job, i)) for i in range(4)]
+            await asyncio.sleep(0.1)
+            self.assertEqual(sorted(started), [0, 1])
+            tasks[3].cancel()
+            release.set()
+            await asyncio.gather(*tasks[:3])
+            self.assertTrue(tasks[3].cancelled())
+            self.assertNotIn(3, started)
+
+        try:
+            asyncio.run(main())
+        finally:
+            release.set()
+            aio.configure()
+        with Captions(TEST_FILES_PATH+"test.en.srt") as c:
+            c.save("tmp/sync", output_format="vtt")
+        with open("tmp/async.en.vtt") as a, open("tmp/sync.en.vtt") as b, open("tmp/aconvert.en.vtt") as d:
+            self.assertEqual(a.read(), b.read())
+            b.seek(0)
+            self.assertEqual(d.read(), b.read())
+
+    def test_server(self):
+        def request(port, path, body=None):
+            r = urllib.request.Request(f"http://127.0.0.1:{port}{path}", data=body, method="POST" if body else "GET")
+            try:
+                with urllib.request.urlopen(r, timeout=10) as response:
+                    return response.status, response.read()
+            except urllib.error.HTTPError as e:
+                return e.code, e.read()
+
+        with open(TEST_FILES_PATH+"test.en.srt", "rb") as f:
+            data = f.read()
+        with Captions(TEST_FILES_PATH+"test.en.srt") as c:
+            c.save("tmp/server", output_format="vtt")
+        with open("tmp/server.en.vtt", "rb") as f:
+            expected = f.read()
+
+        async def main():
+            server = ConversionServer(port=0, workers=1, queue_size=2)
+            await server.start()
+            loop = asyncio.get_running_loop()
+            try:
+                self.assertEqual(await loop.run_in_executor(None, request, server.port, "/convert?to=vtt&languages=en",
+                                                            data), (200, expected))
+                self.assertEqual((await loop.run_in_executor(None, request, server.port, "/convert?to=x", data))[0],
+                                 400)
+                self.assertEqual((await loop.run_in_executor(None, request, server.port, "/missing"))[0], 404)
+                results = await asyncio.gather(*(loop.run_in_executor(None, request, server.port, "/convert?to=vtt",
+                                                                      data) for _ in range(6)))
+                self.assertTrue(all(status in (200, 503) for status, _ in results))
+                status, body = await loop.run_in_executor(None, request, server.port, "/stats")
+                stats = json.loads(body)
+                self.assertEqual(status, 200)
+                self.assertEqual(stats["requests"], 8)
+                self.assertEqual(stats["completed"] + stats["rejected"], 7)
+                self.assertEqual(stats["rejected"], sum(status == 503 for status, _ in results))
+            finally:
+                await server.stop()
+
+        asyncio.run(main())
+
+    def test_cli_batch(self):
+        for directory in ("tmp/batch/in/a", "tmp/batch/in/b"):
+            os.makedirs(directory, exist_ok=True)
+        shutil.copy(TEST_FILES_PATH+"test.en.srt", "tmp/batch/in/a/first.en.srt")
+        shutil.copy(TEST_FILES_PATH+"test.en.vtt", "tmp/batch/in/b/second.en.vtt")
+        with open(TEST_FILES_PATH+"test.en.srt", "rb") as f, gzip.open("tmp/batch/in/b/third.en.srt.gz", "wb") as g:
+            g.write(f.read())
+        args = ["-r", "tmp/batch/in", "-f", "vtt", "srt", "-od", "tmp/batch/out", "--incremental"]
+        self.assertEqual(cli.main(args), 0)
+        for name in ("a/first.en.vtt", "a/first.en.srt", "b/second.en.srt", "b/third.en.vtt"):
+            self.assertTrue(os.path.exists("tmp/batch/out/"+name), name)
+        with open("tmp/batch/out/"+cli.MANIFEST_FILENAME, encoding="UTF-8") as f:
+            manifest = json.load(f)["files"]
+        self.assertEqual(len(manifest), 3)
+
+        os.utime("tmp/batch/in/a/first.en.srt")
+        with open("tmp/batch/in/b/second.en.vtt", "a", encoding="UTF-8") as f:
+            f.write("\n\n99\n00:10:00.000 --> 00:10:01.000\nnew cue\n")
+        cli.main(args)
+        with open("tmp/batch/out/"+cli.MANIFEST_FILENAME, encoding="UTF-8") as f:
+            updated = json.load(f)["files"]
+        first, second = (os.path.abspath(i) for i in ("tmp/batch/in/a/first.en.srt", "tmp/batch/in/b/second.en.vtt"))
+        self.assertEqual(updated[first]["hash"], manifest[first]["hash"])
+        self.assertNotEqual(updated[second]["hash"], manifest[second]["hash"])
+        with open("tmp/batch/out/b/second.en.srt", encoding="UTF-8") as f:
+            self.assertIn("new cue", f.read())
+
+        for output in ("tmp/batch/o1", "tmp/batch/o2"):
+            with contextlib.redirect_stdout(io.StringIO()):
+                cli.main(["-r", "tmp/batch/in", "-f", "vtt", "-od", output, "--incremental", "tmp/batch/shared.json"])
+            self.assertTrue(os.path.exists(output+"/a/first.en.vtt"), output)
+
+        self.assertEqual(cli.main(["tmp/batch/in/**/*.srt", "-f", "vtt", "-J", "2", "-od", "tmp/batch/glob"]), 0)
+        self.assertTrue(os.path.exists("tmp/batch/glob/a/first.en.vtt"))
+
+    def test_stream(self):
+        with Captions(TEST_FILES_PATH+"test.en.srt") as c:
+            expected = io.StringIO()
+            c.save(None, None, "vtt", stream=expected)
+
+        class Pipe(io.TextIOBase):
+            def __init__(self, text):
+                self.text = io.StringIO(text)
+
+            def readable(self):
+                return True
+
+            def readline(self, size=-1):
+                return self.text.readline(size)
+
+            def read(self, size=-1):
+                return self.text.read(size)
+
+        with open(TEST_FILES_PATH+"test.en.srt", encoding="UTF-8") as f:
+            text = f.read()
+        output = io.StringIO()
+        self.assertTrue(convert_stream(Pipe(text), output, "vtt"))
+        self.assertEqual(output.getvalue(), expected.getvalue())
+
+        stdin, stdout = sys.stdin, sys.stdout
+        try:
+            sys.stdin, sys.stdout = io.StringIO(text), io.StringIO()
+            self.assertEqual(cli.main(["-", "-of", "vtt", "-if", "srt"]), 0)
+            self.assertEqual(sys.stdout.getvalue(), expected.getvalue())
+        finally:
+            sys.stdin, sys.stdout = stdin, stdout
+
+    def test_stats(self):
+        events = []
+        with Stats(lambda name, value: events.append(name)) as stats:
+            self.assertTrue(convert(TEST_FILES_PATH+"test.en.vtt", "tmp/stats", "srt"))
+            get_phrases("今日は天気です", "ja")
+            get_phrases("明日は雨です", "ja")
+        self.assertIsNone(currentStats())
+        for name in ("detect", "read", "style", "write", "line_breaking"):
+            self.assertIn(name, stats.stages)
+            self.assertIn(name, events)
+        self.assertEqual(stats.counters["bytes_in"], os.path.getsize(TEST_FILES_PATH+"test.en.vtt"))
+        self.assertEqual(stats.counters["bytes_out"], os.path.getsize("tmp/stats.en.srt"))
+        self.assertEqual(stats.counters["cues_written"], 5)
+        self.assertLessEqual(stats.counters["parser_loads"], 1)
+        self.assertGreaterEqual(stats.counters["parser_cache_hits"], 1)
+
+        merged = Stats()
+        merged.merge(stats.toDict())
+        merged.merge(stats.toDict())
+        self.assertEqual(merged.counters["cues_written"], 10)
+        self.assertIn("write", merged.report())
+
+    def test_profiling(self):
+        with MemoryTrace(top=3) as trace:
+            self.assertTrue(convert(TEST_FILES_PATH+"test.en.srt", "tmp/trace", "vtt"))
+        self.assertGreater(trace.peaks["read"], 0)
+        self.assertGreaterEqual(trace.peak, trace.peaks["read"])
+        self.assertTrue(trace.sites["read"])
+        self.assertIn("peak memory", trace.report())
+
+        # stages of a reader thread end while a stage of the main thread is running (CaptionsStream)
+        started, styled, ended = threading.Event(), threading.Event(), threading.Event()
+        kept = []
+
+        def reader():
+            trace.startStage("read")
+            started.set()
+            styled.wait(5)
+            kept.append([str(i) * 10 for i in range(10000)])
+            trace.addTime("read", 0)
+            ended.set()
+
+        with MemoryTrace() as trace:
+            thread = threading.Thread(target=reader)
+            thread.start()
+            started.wait(5)
+            trace.startStage("style")
+            styled.set()
+            ended.wait(5)
+            trace.addTime("style", 0)
+            thread.join()
+        self.assertTrue(trace.sites["read"])
+        self.assertNotIn("style", trace.sites)
+
+        errors = io.StringIO()
+        with contextlib.redirect_stderr(errors):
+            cli.main([TEST_FILES_PATH+"test.en.srt", "-f", "vtt", "-od", "tmp/profile", "--profile", "tmp/profile.prof",
+                      "--trace-memory", "2"])
+        self.assertTrue(os.path.exists("tmp/profile.prof"))
+        self.assertIn("cumulative", errors.getvalue())
+        self.assertIn("peak memory", errors.getvalue())
+
+    def test_timing(self):
+        def track(*times):
+            captions = Captions()
+            for index, (start, end) in enumerate(times):
+                captions.append(Block(BlockType.CAPTION, "en", MT.fromTime(start*1000), MT.fromTime(end*1000),
+                                      f"cue {index}"))
+            return captions
+
+        def times(captions):
+            return [(i.start_time.toTime() // 1000, i.end_time.toTime() // 1000) for i in captions]
+
+        c = track((5000, 6000), (0, 2000), (1000, 3000), (1500, 1800))
+        self.assertEqual(sorted(c.findOverlaps()), [(1, 2), (1, 3), (2, 3)])
+        c.sort()
+        self.assertEqual(times(c), [(0, 2000), (1000, 3000), (1500, 1800), (5000, 6000)])
+
+        c = track((5000, 6000), (0, 2000), (1000, 3000))
+        counters = c.normalizeTiming("trim", min_gap=MT(milliseconds=100))
+        self.assertEqual(times(c), [(0, 900), (1000, 3000), (5000, 6000)])
+        self.assertEqual((counters["overlaps"], counters["trimmed"]), (1, 1))
+        self.assertEqual(c.time_length.toTime(), 6_000_000)
+        self.assertEqual(c.findOverlaps(), [])
+
+        c = track((0, 2000), (1000, 3000), (5000, 4000))
+        counters = c.normalizeTiming("merge", min_duration=MT(seconds=1))
+        self.assertEqual(times(c), [(0, 3000), (5000, 6000)])
+        self.assertEqual(c[0].languages["en"], "cue 0<br>cue 1")
+        self.assertEqual((counters["merged"], counters["inverted"]), (1, 1))
+
+        c = track((0, 2000), (1000, 3000))
+        c.normalizeTiming("stack")
+        self.assertEqual(times(c), [(0, 1000), (1000, 2000), (2000, 3000)])
+        self.assertEqual([i.languages["en"] for i in c], ["cue 0", "cue 0<br>cue 1", "cue 1"])
+
+        c = track(*[(i*1000 + (500 if i % 3 == 0 else 0), i*1000 + 900) for i in range(30)])
+        c[5], c[6] = c[6], c[5]
+        counters = Counter()
+        blocks = list(normalizeStream(c, lookahead=4, counters=counters))
+        self.assertEqual(len(blocks), 30)
+        starts = [i.start_time.toTime() for i in blocks]
+        self.assertEqual(starts, sorted(starts))
+        self.assertEqual(counters["late"], 0)
+
+        output = io.StringIO()
+        srt = "1\n00:00:00,000 --> 00:00:02,000\na\n\n2\n00:00:01,000 --> 00:00:03,000\nb\n"
+        self.assertTrue(convert_stream(io.StringIO(srt), output, "srt", normalize={"policy": "trim"}))
+        self.assertIn("00:00:00,000 --> 00:00:01,000", output.getvalue())
+
+    def test_merge(self):
+        def track(language, *times):
+            captions = Captions(default_language=language)
+            for index, (start, end) in enumerate(times):
+                captions.append(Block(BlockType.CAPTION, language, MT.fromTime(start*1000), MT.fromTime(end*1000),
+                                      f"{language} {index}"))
+            return captions
+
+        c = track("en", (0, 2000), (2000, 4000), (6000, 7000))
+        c += track("es", (100, 1000), (1000, 2050), (2100, 3900), (9000, 9500))
+        self.assertEqual([i.languages.get("es") for i in c], ["es 0<br>es 1", "es 2", None, "es 3"])
+        self.assertEqual(c[3].start_time.toTime(), 9_000_000)
+        self.assertEqual(c.time_length.toTime(), 9_500_000)
+
+        c = track("en", (0, 1000), (1000, 2000), (2000, 3000))
+        counters = c.merge(track("sl", (0, 1500), (1500, 3000)))
+        self.assertEqual([i.languages.get("sl") for i in c], ["sl 0", "sl 0<br>sl 1", "sl 1"])
+        self.assertEqual(counters["shared"], 1)
+
+        c = track("en", (0, 2000), (2000, 4000))
+        counters = c.merge(track("es", (20, 1000), (1000, 4000)), MT(milliseconds=50), mode="split")
+        self.assertEqual([(i.start_time.toTime() // 1000, i.end_time.toTime() // 1000) for i in c],
+                         [(0, 1000), (1000, 2000), (2000, 4000)])
+        self.assertEqual([(i.languages["en"], i.languages["es"]) for i in c],
+                         [("en 0", "es 0"), ("en 0", "es 1"), ("en 1", "es 1")])
+        self.assertEqual(counters["split"], 1)
+
+        ttml = ('<tt xml:lang="en" xmlns="http://www.w3.org/ns/ttml"><body>'
+                '<div xml:lang="en"><p begin="00:00:00.000" end="00:00:02.000">a</p>'
+                '<p begin="00:00:02.000" end="00:00:04.000">b</p></div>'
+                '<div xml:lang="es"><p begin="00:00:02.100" end="00:00:03.900">B</p></div></body></tt>')
+        with Captions(ttml, isFile=False) as c:
+            self.assertEqual([i.languages.get("es") for i in c], [None, "B"])
+
+    def test_merge_many(self):
+        def track(*times):
+            captions = Captions(default_language="en")
+            for start, end in times:
+                captions.append(Block(BlockType.CAPTION, "en", MT.fromTime(start*1000), MT.fromTime(end*1000),
+                                      f"{start}"))
+            return captions
+
+        def starts(captions):
+            return [i.start_time.toTime() // 1000 for i in captions]
+
+        c = track((0, 1000))
+        segment = track((0, 500), (500, 2000))
+        counters = c.merge_many([segment, track((100, 300))])
+        self.assertEqual(starts(c), [0, 1000, 1500, 3100])
+        self.assertEqual(c.time_length.toTime(), 3_300_000)
+        self.assertEqual(counters["tracks"], 2)
+        self.assertEqual(starts(segment), [0, 500])
+
+        c = track((0, 1000), (3000, 4000))
+        c.merge_many([track((500, 600)), track((0, 100), (2000, 2100))], "interleave",
+                     [MT(seconds=1), MT()])
+        self.assertEqual(starts(c), [0, 0, 1500, 2000, 3000])
+
+        c = track((0, 1000))
+        c.join(track((0, 500)), True, MT(seconds=1))
+        self.assertEqual((c[1].start_time.toTime(), c[1].end_time.toTime()), (2_000_000, 2_500_000))
+
+        source = track((0, 500))
+        c = Captions(default_language="en")
+        c.join(source)
+        self.assertIsNot(c[0], source[0])
+        c.shift_time(MT(seconds=1))
+        c[0]["en"] = "changed"
+        self.assertEqual((source[0].start_time.toTime(), source[0].end_time.toTime()), (0, 500_000))
+        self.assertEqual(source[0]["en"], "0")
+
+        c = Captions(default_language="en")
+        c.merge_many([TEST_FILES_PATH+"test.en.srt"] * 2 + [track((0, 100))], workers=2)
+        with Captions(TEST_FILES_PATH+"test.en.srt") as single:
+            self.assertEqual(len(c), len(single)*2 + 1)
+            self.assertEqual(c[len(single)].start_time.toTime(),
+                             single.time_length.toTime() + single[0].start_time.toTime())
+
+        cli.main([TEST_FILES_PATH+"test.en.srt", TEST_FILES_PATH+"test.en.srt", "-j", "offset", "01:00:00.000",
+                  "-f", "srt", "-od", "tmp/join"])
+        with Captions("tmp/join/test.en.srt") as joined, Captions(TEST_FILES_PATH+"test.en.srt") as single:
+            self.assertEqual(len(joined), len(single)*2)
+
+    def test_diff(self):
+        def track(*cues):
+            captions = Captions(default_language="en")
+            for start, end, text in cues:
+                captions.append(Block(BlockType.CAPTION, "en", MT.fromTime(start*1000), MT.fromTime(end*1000), text))
+            return captions
+
+        old = track((0, 1000, "a"), (1000, 2000, "b"), (2000, 3000, "c"), (3000, 4000, "d"), (5000, 6000, "yes"))
+        new = track((0, 1000, "a"), (1200, 2000, "b"), (2000, 3000, "C"), (5000, 6000, "yes"), (7000, 8000, "e"),
+                    (9000, 9500, "yes"))
+        changes = diff(old, new)
+        self.assertEqual(changes.unchanged, 2)
+        self.assertEqual([i for i, _, _ in changes.retimed], [1])
+        self.assertEqual([(i, new.languages["en"]) for i, _, new in changes.retexted], [(2, "C")])
+        self.assertEqual([i for i, _ in changes.deleted], [3])
+        self.assertEqual(sorted(i.languages["en"] for i in changes.inserted), ["e", "yes"])
+
+        patch = json.loads(json.dumps(changes.toPatch()))
+        apply_patch(old, patch)
+        self.assertFalse(diff(old, new))
+        self.assertEqual(old.time_length.toTime(), 9_500_000)
+        with self.assertRaises(ValueError):
+            apply_patch(old, patch)
+
+        shifted = track(*((i*1000 + 5000, i*1000 + 5500, str(i % 10)) for i in range(100)))
+        changes = diff(track(*((i*1000, i*1000 + 500, str(i % 10)) for i in range(100))), shifted)
+        self.assertEqual((len(changes.retimed), len(changes.inserted), len(changes.deleted)), (100, 0, 0))
+
+    def test_index(self):
+        os.makedirs("tmp/index", exist_ok=True)
+        if os.path.exists("tmp/index/captions.db"):
+            os.remove("tmp/index/captions.db")
+        with open("tmp/index/a.en.srt", "w", encoding="UTF-8") as f:
+            f.write("1\n00:00:01,000 --> 00:00:02,000\n<i>Where is</i> this?\n\n"
+                    "2\n00:00:03,500 --> 00:00:04,000\nThis is where captions live.\n")
+        with open("tmp/index/b.ja.srt", "w", encoding="UTF-8") as f:
+            f.write("1\n00:01:00,000 --> 00:01:02,000\n今日は字幕のテストです\n")
+
+        with CaptionsIndex("tmp/index/captions.db") as index:
+            self.assertEqual(index.update(["tmp/index/a.en.srt", "tmp/index/b.ja.srt"])["indexed"], 2)
+            a = os.path.abspath("tmp/index/a.en.srt")
+            self.assertEqual(index.search("where is this"), [(a, 0, 1000)])
+            self.assertEqual(index.search("WHERE IS"), [(a, 0, 1000)])
+            self.assertEqual(index.search("is where capt", prefix=True), [(a, 1, 3500)])
+            self.assertEqual(index.search("this", "en"), [(a, 0, 1000), (a, 1, 3500)])
+            self.assertEqual(index.search("this", "es"), [])
+            self.assertEqual(index.search("字幕の")[0][2], 60000)
+
+        with CaptionsIndex("tmp/index/captions.db") as index:
+            self.assertEqual(index.update(["tmp/index/a.en.srt", "tmp/index/b.ja.srt"])["skipped"], 2)
+            with open("tmp/index/a.en.srt", "w", encoding="UTF-8") as f:
+                f.write("1\n00:00:05,000 --> 00:00:06,000\nSomething else\n")
+            self.assertEqual(index.update(["tmp/index/a.en.srt"])["indexed"], 1)
+            self.assertEqual(index.search("where is this"), [])
+            self.assertEqual(len(index.search("something")), 1)
+            os.remove("tmp/index/b.ja.srt")
+            self.assertEqual(index.update([], remove_missing=True)["removed"], 1)
+            self.assertEqual(len(index), 1)
+
+    def test_retime(self):
+        def track(*times):
+            captions = Captions(default_language="en")
+            for start, end in times:
+                captions.append(Block(BlockType.CAPTION, "en", MT.fromTime(start*1000), MT.fromTime(end*1000), "a"))
+            return captions
+
+        def times(captions):
+            return [(i.start_time.toTime() // 1000, i.end_time.toTime() // 1000) for i in captions]
+
+        c = track((1000, 2000), (25000, 26000))
+        counters = c.retime(scale=25 / 24, offset=MT(milliseconds=-1100))
+        self.assertEqual(times(c), [(0, 983), (24941, 25983)])
+        self.assertEqual((counters["retimed"], counters["clamped"]), (2, 1))
+        self.assertEqual(c.time_length.toTime(), 25_983_333)
+
+        c = track((0, 1000), (10000, 11000), (20000, 21000), (40000, 41000))
+        c.retime([(MT(seconds=10), MT(seconds=11)), (MT(seconds=20), MT(seconds=23))])
+        self.assertEqual(times(c), [(0, 200), (11000, 12200), (23000, 24200), (47000, 48200)])
+
+        c = track((0, 1000), (5000, 6000))
+        counters = c.retime([(MT(seconds=0), MT(seconds=10)), (MT(seconds=5), MT(seconds=0))],
+                            min_duration=MT(milliseconds=500))
+        self.assertEqual(times(c), [(0, 500), (10000, 10500)])
+        self.assertEqual(counters["inverted"], 2)
+
+        with open("tmp/retime.en.srt", "w", encoding="UTF-8") as f:
+            f.write("1\n00:00:10,000 --> 00:00:11,000\na\n")
+        cli.main(["tmp/retime.en.srt", "-f", "vtt", "-od", "tmp/retime", "--anchor", "00:00.000", "00:01.000",
+                  "--scale", "2", "--shift=-00:00.500"])
+        with Captions("tmp/retime/retime.en.vtt") as c:
+            self.assertEqual(times(c), [(20500, 22500)])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file